@@ -1,101 +1,241 @@
-from fastapi import APIRouter, Depends
+import asyncio
+import hashlib
+from collections.abc import Callable
+from operator import attrgetter
+from pathlib import Path
+from typing import Any, TypeVar
 
-from app.api.deps import get_current_user
-from app.core.errors import AuthForbiddenError
+from fastapi import APIRouter, Header, Response
+import orjson
+
+from app.api.deps import CurrentUser
+from app.core.cache import SingleFlight, TTLCache
+from app.core.errors import AppError, AuthForbiddenError
 from app.models.branch_schemas import (
     WorkspaceBranchCheckoutRequest,
     WorkspaceBranchCheckoutResponse,
     WorkspaceBranchRefListResponse,
-    WorkspaceBranchRepoItem,
     WorkspaceBranchRepoListResponse,
 )
-from app.services.auth_service import AuthUser, auth_service
+from app.services.auth_service import AuthService, AuthUser, auth_service
 from app.services.workspace_branch_service import workspace_branch_service
 from app.services.workspace_service import workspace_service
 
-router = APIRouter()
+# 静态路径 /repos 必须先于 {repo_key:path} 路由注册，保证首个匹配命中常用入口。
+router = APIRouter(prefix='/workspaces/{workspace}/branches')
+
+# 分支/仓库列表每次都需向服务端确认（切换分支后不能沿用浏览器旧副本），
+# 借助 ETag + If-None-Match，内容未变时只回 304。
+_READ_CACHE_CONTROL = 'private, no-cache'
+_REPO_FIELDS = (
+    'repo_key',
+    'display_path',
+    'current_branch',
+    'is_dirty',
+    'dirty_file_count',
+)
+_repo_getter = attrgetter(*_REPO_FIELDS)
+
+# (user_id, workspace) -> (账号数据版本, 工作空间路径 | _DENIED)。
+# 授权调整会递增 auth_service.revision，旧条目随之失效。
+_DENIED = object()
+_workspace_access_cache: TTLCache[tuple[int, str], tuple[int, object]] = TTLCache(
+    maxsize=2048,
+    ttl_seconds=60,
+)
+
+# 仓库/分支查询结果按工作空间路径短期缓存：UI 轮询时直接复用，切换分支后主动失效。
+# 访问控制在读缓存前完成，因此不同用户可以共享同一份 git 查询结果。
+_repo_list_cache: TTLCache[str, Any] = TTLCache(maxsize=256, ttl_seconds=5)
+_branch_list_cache: TTLCache[tuple[str, str], Any] = TTLCache(maxsize=1024, ttl_seconds=5)
+# 缓存未命中时，同一仓库的并发查询只触发一次 git 调用。
+_inflight = SingleFlight()
+# 缓存 key -> 代数；切换分支时递增，切换前发起的查询结果不再写入缓存，也不会被新请求合并复用。
+# 有界且 TTL 远长于列表缓存与单次 git 查询，条目过期时已无引用它的查询或缓存。
+_list_generations: TTLCache[Any, int] = TTLCache(maxsize=2048, ttl_seconds=60)
+# 仓库尚未定位即失败的错误码：未触碰任何仓库，无需让缓存失效。
+_UNRESOLVED_REPO_CODES = frozenset({'INVALID_REPO_KEY', 'REPO_NOT_FOUND'})
+
+T = TypeVar('T')
 
 
 @router.get(
-    '/workspaces/{workspace}/branches/repos',
+    '/repos',
     response_model=WorkspaceBranchRepoListResponse,
 )
-def list_workspace_branch_repos(
+async def list_workspace_branch_repos(
     workspace: str,
-    current_user: AuthUser = Depends(get_current_user),
-) -> WorkspaceBranchRepoListResponse:
-    workspace_path = _require_workspace_access(workspace, current_user)
-    items = workspace_branch_service.list_repos(
+    response: Response,
+    current_user: CurrentUser,
+    if_none_match: str | None = Header(default=None),
+) -> dict[str, Any] | Response:
+    workspace_path = await _require_workspace_access(workspace, current_user)
+    # git 子进程调用放到线程池，避免阻塞事件循环。
+    items = await _cached_to_thread(
+        _repo_list_cache,
+        str(workspace_path),
+        workspace_branch_service.list_repos,
         workspace=workspace,
         workspace_path=workspace_path,
     )
-    return WorkspaceBranchRepoListResponse(
-        workspace=workspace,
-        items=[
-            WorkspaceBranchRepoItem(
-                repo_key=item.repo_key,
-                display_path=item.display_path,
-                current_branch=item.current_branch,
-                is_dirty=item.is_dirty,
-                dirty_file_count=item.dirty_file_count,
-            )
-            for item in items
-        ],
-    )
+    # 直接返回 dict，由 response_model 做唯一一次校验与序列化，避免先建模型再二次校验。
+    payload = {
+        'workspace': workspace,
+        'items': [dict(zip(_REPO_FIELDS, _repo_getter(item))) for item in items],
+    }
+    return _conditional_response(payload, response, if_none_match)
 
 
 @router.get(
-    '/workspaces/{workspace}/branches/{repo_key:path}/refs',
+    '/{repo_key:path}/refs',
     response_model=WorkspaceBranchRefListResponse,
 )
-def list_workspace_repo_refs(
+async def list_workspace_repo_refs(
     workspace: str,
     repo_key: str,
-    current_user: AuthUser = Depends(get_current_user),
-) -> WorkspaceBranchRefListResponse:
-    workspace_path = _require_workspace_access(workspace, current_user)
-    current_branch, branches = workspace_branch_service.list_branches(
+    response: Response,
+    current_user: CurrentUser,
+    if_none_match: str | None = Header(default=None),
+) -> dict[str, Any] | Response:
+    workspace_path = await _require_workspace_access(workspace, current_user)
+    current_branch, branches = await _cached_to_thread(
+        _branch_list_cache,
+        (str(workspace_path), repo_key),
+        workspace_branch_service.list_branches,
         workspace=workspace,
         workspace_path=workspace_path,
         repo_key=repo_key,
     )
-    return WorkspaceBranchRefListResponse(
-        workspace=workspace,
-        repo_key=repo_key,
-        current_branch=current_branch,
-        branches=branches,
-    )
+    payload = {
+        'workspace': workspace,
+        'repo_key': repo_key,
+        'current_branch': current_branch,
+        'branches': branches,
+    }
+    return _conditional_response(payload, response, if_none_match)
 
 
 @router.post(
-    '/workspaces/{workspace}/branches/{repo_key:path}/checkout',
+    '/{repo_key:path}/checkout',
     response_model=WorkspaceBranchCheckoutResponse,
 )
-def checkout_workspace_repo_branch(
+async def checkout_workspace_repo_branch(
     workspace: str,
     repo_key: str,
     body: WorkspaceBranchCheckoutRequest,
-    current_user: AuthUser = Depends(get_current_user),
-) -> WorkspaceBranchCheckoutResponse:
-    workspace_path = _require_workspace_access(workspace, current_user)
-    result = workspace_branch_service.checkout_branch(
-        workspace=workspace,
-        workspace_path=workspace_path,
-        repo_key=repo_key,
-        branch=body.branch,
-        discard_changes=body.discard_changes,
-    )
-    return WorkspaceBranchCheckoutResponse(
-        workspace=workspace,
-        repo_key=result.repo_key,
-        before_branch=result.before_branch,
-        after_branch=result.after_branch,
-        discarded_changes=result.discarded_changes,
-        summary=result.summary,
+    current_user: CurrentUser,
+) -> dict[str, Any]:
+    workspace_path = await _require_workspace_access(workspace, current_user)
+    invalidate = True
+    try:
+        result = await asyncio.to_thread(
+            workspace_branch_service.checkout_branch,
+            workspace=workspace,
+            workspace_path=workspace_path,
+            repo_key=repo_key,
+            branch=body.branch,
+            discard_changes=body.discard_changes,
+        )
+    except AppError as exc:
+        invalidate = exc.code not in _UNRESOLVED_REPO_CODES
+        raise
+    finally:
+        # 失败时也可能已放弃改动或部分切换，统一让查询缓存失效。
+        if invalidate:
+            _invalidate_listing(_repo_list_cache, str(workspace_path))
+            _invalidate_listing(_branch_list_cache, (str(workspace_path), repo_key))
+    return {
+        'workspace': workspace,
+        'repo_key': result.repo_key,
+        'before_branch': result.before_branch,
+        'after_branch': result.after_branch,
+        'discarded_changes': result.discarded_changes,
+        'summary': result.summary,
+    }
+
+
+async def _cached_to_thread(
+    cache: TTLCache[Any, Any],
+    key: Any,
+    func: Callable[..., T],
+    **kwargs: Any,
+) -> T:
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    generation = _list_generations.get(key, 0)
+    value = await _inflight.do(
+        (key, generation),
+        lambda: asyncio.to_thread(func, **kwargs),
     )
+    if _list_generations.get(key, 0) == generation:
+        cache.set(key, value)
+    return value
+
+
+def _invalidate_listing(cache: TTLCache[Any, Any], key: Any) -> None:
+    _list_generations.set(key, _list_generations.get(key, 0) + 1)
+    cache.pop(key)
+
+
+def _etag(payload: dict[str, Any]) -> str:
+    digest = hashlib.blake2b(orjson.dumps(payload), digest_size=8).hexdigest()
+    return f'"{digest}"'
+
 
+def _conditional_response(
+    payload: dict[str, Any],
+    response: Response,
+    if_none_match: str | None,
+) -> dict[str, Any] | Response:
+    """内容未变化时返回 304，省去响应体传输；否则补充 ETag 与缓存头。"""
+    etag = _etag(payload)
+    headers = {'ETag': etag, 'Cache-Control': _READ_CACHE_CONTROL}
+    if if_none_match is not None:
+        candidates = {
+            tag.strip().removeprefix('W/') for tag in if_none_match.split(',')
+        }
+        if etag in candidates or '*' in candidates:
+            return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return payload
 
-def _require_workspace_access(workspace: str, current_user: AuthUser):
-    if not auth_service.can_access_workspace(current_user, workspace):
+
+async def _require_workspace_access(
+    workspace: str,
+    current_user: AuthUser,
+    *,
+    # 服务句柄在定义时绑定为默认参数，热路径上按局部变量读取，省去全局+属性查找。
+    _auth=auth_service,
+    _get_path=workspace_service.get_workspace_path,
+    _cache=_workspace_access_cache,
+    _denied=_DENIED,
+):
+    key = (current_user.id, workspace)
+    revision = _auth.revision
+    cached = _cache.get(key)
+    if cached is not None and cached[0] == revision:
+        if cached[1] is _denied:
+            raise AuthForbiddenError()
+        return cached[1]
+
+    # 未命中时的授权查询与路径解析都是 SQLite/文件系统 I/O，放到线程池执行。
+    workspace_path = await asyncio.to_thread(
+        _load_workspace_access, workspace, current_user, _auth, _get_path
+    )
+    _cache.set(key, (revision, workspace_path))
+    if workspace_path is _denied:
         raise AuthForbiddenError()
-    return workspace_service.get_workspace_path(workspace)
+    return workspace_path
+
+
+def _load_workspace_access(
+    workspace: str,
+    current_user: AuthUser,
+    auth: AuthService,
+    get_path: Callable[[str], Path],
+) -> object:
+    # 与命中路径使用同一组句柄，避免两条路径读到不同的服务实例。
+    if not auth.can_access_workspace(current_user, workspace):
+        return _DENIED
+    return get_path(workspace)
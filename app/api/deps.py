@@ -1,19 +1,50 @@
-from fastapi import Header
+import asyncio
+import hashlib
+from typing import Annotated
 
-from app.core.errors import AuthRequiredError
+from fastapi import Depends
+
+from app.api.deps_common import bearer_token
+from app.core.cache import TTLCache
+from app.core.errors import AuthForbiddenError, AuthRequiredError
 from app.services.auth_service import AuthUser, auth_service
 
+# 鉴权失败的 token 摘要 -> 哨兵。短时间内重复探测直接拒绝，不再查库；
+# 仅保存摘要，避免在内存中留存凭据原文。
+_AUTH_FAILED = object()
+_failed_token_cache: TTLCache[bytes, object] = TTLCache(
+    maxsize=16384,
+    ttl_seconds=60,
+)
 
-def get_current_user(authorization: str | None = Header(default=None)) -> AuthUser:
-    if not authorization:
-        raise AuthRequiredError()
 
-    prefix = "Bearer "
-    if not authorization.startswith(prefix):
-        raise AuthRequiredError()
+async def get_current_user(token: str = Depends(bearer_token)) -> AuthUser:
+    cached = auth_service.get_cached_user_by_token(token)
+    if cached is not None:
+        return cached
 
-    token = authorization[len(prefix) :].strip()
-    if not token:
+    digest = _token_digest(token)
+    if _failed_token_cache.get(digest) is _AUTH_FAILED:
         raise AuthRequiredError()
+    # 缓存命中在事件循环内直接返回；仅未命中时才把 SQLite 查询放到线程池。
+    try:
+        user = await asyncio.to_thread(auth_service.get_user_by_token, token)
+    except AuthRequiredError:
+        _failed_token_cache.set(digest, _AUTH_FAILED)
+        raise
+    return user
+
+
+async def require_superadmin(current_user: AuthUser = Depends(get_current_user)) -> AuthUser:
+    # 管理端接口统一在依赖阶段拦截，路由内不再重复角色判断。
+    if current_user.role != "superadmin":
+        raise AuthForbiddenError()
+    return current_user
+
+
+def _token_digest(token: str) -> bytes:
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+
 
-    return auth_service.get_user_by_token(token)
+# 路由签名统一使用该别名，共享同一个 Depends 声明。
+CurrentUser = Annotated[AuthUser, Depends(get_current_user)]
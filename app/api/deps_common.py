@@ -0,0 +1,28 @@
+from fastapi import Header
+
+from app.core.errors import AuthRequiredError
+
+_BEARER_SCHEME = "Bearer"
+
+
+async def bearer_token(authorization: str | None = Header(default=None)) -> str:
+    """
+    解析 `Authorization: Bearer <token>`，缺失或格式不合法时抛出 AuthRequiredError。
+
+    作为共享子依赖使用：FastAPI 按依赖函数做单请求缓存，
+    同一请求内无论多少个上层依赖需要 token，请求头都只解析一次。
+    纯内存操作，声明为 async 以免 FastAPI 为同步依赖额外走一次线程池。
+    """
+    # 一次 split 同时完成“非空 / 前缀 / 切片”三步判断；None 或无空格的值走异常分支。
+    try:
+        scheme, token = authorization.split(" ", 1)
+    except (AttributeError, ValueError):
+        raise AuthRequiredError() from None
+    if scheme != _BEARER_SCHEME:
+        raise AuthRequiredError()
+    # ASGI 服务端已去掉头值首尾空白，仅在确有多余空白时才 strip，省一次字符串分配。
+    if token[:1].isspace() or token[-1:].isspace():
+        token = token.strip()
+    if not token:
+        raise AuthRequiredError()
+    return token
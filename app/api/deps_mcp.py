@@ -1,20 +1,51 @@
-from fastapi import Header
+import asyncio
 
-from app.core.errors import AuthRequiredError
+from fastapi import Depends
+
+from app.api.deps_common import bearer_token
+from app.core.cache import TTLCache
+from app.core.errors import AppError
 from app.services.auth_service import AuthUser, auth_service
+from app.services.mcp_settings_service import mcp_settings_service
 from app.services.mcp_token_service import mcp_token_service
 
+# MCP token -> ((账号版本, 令牌版本), 用户资料版本, (user_id, 用户))。
+# 命中时同时跳过 verify_token 与 get_user_by_id 两次 SQLite 查询。
+_mcp_token_user_cache: TTLCache[
+    str, tuple[tuple[int, int], int, tuple[int, AuthUser]]
+] = TTLCache(maxsize=4096, ttl_seconds=300)
+
+
+async def get_current_mcp_user(token: str = Depends(bearer_token)) -> AuthUser:
+    revision = (auth_service.revision, mcp_token_service.revision)
+    cached = _mcp_token_user_cache.get(token)
+    if (
+        cached is not None
+        and cached[0] == revision
+        and cached[1] == auth_service.profile_revision(cached[2][0])
+    ):
+        return cached[2][1]
+
+    profile_revision, user_id, user = await asyncio.to_thread(_load_mcp_user, token)
+    _mcp_token_user_cache.set(token, (revision, profile_revision, (user_id, user)))
+    return user
+
 
-def get_current_mcp_user(authorization: str | None = Header(default=None)) -> AuthUser:
-    if not authorization:
-        raise AuthRequiredError()
-    prefix = "Bearer "
-    if not authorization.startswith(prefix):
-        raise AuthRequiredError()
+async def require_mcp_enabled() -> None:
+    # 设置在服务内有短 TTL 缓存：命中时直接在事件循环内判断，未命中才到线程池查 SQLite。
+    settings_value = mcp_settings_service.get_cached_settings()
+    if settings_value is None:
+        settings_value = await asyncio.to_thread(mcp_settings_service.get_settings)
+    if not settings_value.mcp_enabled:
+        raise AppError(
+            code="MCP_DISABLED",
+            message="MCP is disabled",
+            status_code=400,
+        )
 
-    token = authorization[len(prefix) :].strip()
-    if not token:
-        raise AuthRequiredError()
 
+def _load_mcp_user(token: str) -> tuple[int, int, AuthUser]:
     user_id = mcp_token_service.verify_token(token)
-    return auth_service.get_user_by_id(user_id)
+    # 先取资料版本再查库：查询期间的资料刷新会使本次写入的缓存立即失效。
+    profile_revision = auth_service.profile_revision(user_id)
+    return profile_revision, user_id, auth_service.get_user_by_id(user_id)
@@ -1,22 +1,34 @@
 from __future__ import annotations
 
+import asyncio
+import codecs
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
 from datetime import date, datetime, timezone
+import functools
+import itertools
+from operator import itemgetter
+import os
 from pathlib import Path
 import re
+import shutil
+import subprocess
 import time
 from typing import Any
 
 from fastapi import APIRouter, Depends, Request
+from fastapi.responses import ORJSONResponse
+import orjson
 from pydantic import BaseModel, Field
 
-from app.api.deps import get_current_user
-from app.api.deps_mcp import get_current_mcp_user
+from app.api.deps import get_current_user, require_superadmin
+from app.api.deps_mcp import get_current_mcp_user, require_mcp_enabled
 from app.core.errors import AppError, AuthForbiddenError
 from app.core.errors import WorkspaceCreateError
+from app.core.timefmt import utc_isoformat_ns
 from app.models.schemas import (
     CreateMcpIndexJobRequest,
     McpAuthInfoResponse,
-    McpIndexFailureItem,
     McpIndexFailureListResponse,
     McpIndexJobItem,
     McpIndexJobListResponse,
@@ -36,6 +48,17 @@ from app.services.mcp_vector_service import mcp_vector_service
 from app.services.workspace_service import workspace_service
 
 router = APIRouter()
+# 工具调用路由统一挂载“MCP 已启用”检查；管理与设置接口不受开关影响，保留在 router 上。
+mcp_tool_router = APIRouter(dependencies=[Depends(require_mcp_enabled)])
+
+# ripgrep 可用时 grep 直接交给原生进程（并行遍历 + SIMD 字面量预过滤），否则回退到 Python 扫描。
+_RG_BIN = shutil.which("rg")
+_RG_TIMEOUT_SECONDS = 30
+_MATCH_ALL_GLOBS = frozenset({"*", "**", "**/*"})
+# Python 回退扫描按块读取文件，整块交给正则引擎搜索，而不是逐行调用 search。
+_GREP_BLOCK_CHARS = 1 << 20
+# 这些构造在整块文本中可能“看到”换行或文本边界，与逐行匹配语义不同，只能逐行扫描。
+_LINE_SCAN_TOKENS = ("\\A", "\\Z", "(?=", "(?!", "(?<=", "(?<!")
 
 
 class McpToolCallRequest(BaseModel):
@@ -50,13 +73,15 @@ class McpToolCallResponse(BaseModel):
 
 
 @router.get("/api/mcp/auth/info", response_model=McpAuthInfoResponse)
-def get_mcp_auth_info(
+async def get_mcp_auth_info(
     request: Request,
     current_user: AuthUser = Depends(get_current_user),
 ) -> McpAuthInfoResponse:
-    info = mcp_token_service.get_info(current_user.id)
-    token = mcp_token_service.get_token(current_user.id)
-    mcp_url, template = mcp_settings_service.build_mcp_url(_request_base_url(request))
+    info, token, (mcp_url, template) = await asyncio.to_thread(
+        _load_auth_info,
+        current_user.id,
+        _request_base_url(request),
+    )
     return McpAuthInfoResponse(
         mcp_url=mcp_url,
         workspace_mcp_url_template=template,
@@ -68,12 +93,15 @@ def get_mcp_auth_info(
 
 
 @router.post("/api/mcp/auth/reset-token", response_model=McpResetTokenResponse)
-def reset_mcp_token(
+async def reset_mcp_token(
     request: Request,
     current_user: AuthUser = Depends(get_current_user),
 ) -> McpResetTokenResponse:
-    result = mcp_token_service.reset_token(current_user.id)
-    mcp_url, template = mcp_settings_service.build_mcp_url(_request_base_url(request))
+    result, (mcp_url, template) = await asyncio.to_thread(
+        _reset_token,
+        current_user.id,
+        _request_base_url(request),
+    )
     return McpResetTokenResponse(
         token=result.token,
         token_hint=result.token_hint,
@@ -84,11 +112,12 @@ def reset_mcp_token(
 
 
 @router.get("/api/admin/mcp/settings", response_model=McpSettingsItem)
-def get_mcp_settings(
+async def get_mcp_settings(
     current_user: AuthUser = Depends(get_current_user),
 ) -> McpSettingsItem:
-    view = mcp_settings_service.get_settings_view(
-        is_superadmin=current_user.role == "superadmin"
+    view = await asyncio.to_thread(
+        mcp_settings_service.get_settings_view,
+        is_superadmin=current_user.role == "superadmin",
     )
     return McpSettingsItem(
         mcp_enabled=view.mcp_enabled,
@@ -110,11 +139,12 @@ def get_mcp_settings(
 
 
 @router.put("/api/admin/mcp/settings", response_model=McpSettingsItem)
-def update_mcp_settings(
+async def update_mcp_settings(
     body: UpdateMcpSettingsRequest,
     current_user: AuthUser = Depends(get_current_user),
 ) -> McpSettingsItem:
-    updated = mcp_settings_service.update_settings(
+    updated = await asyncio.to_thread(
+        mcp_settings_service.update_settings,
         is_superadmin=current_user.role == "superadmin",
         mcp_enabled=body.mcp_enabled,
         mcp_base_path=body.mcp_base_path,
@@ -151,43 +181,49 @@ def update_mcp_settings(
 
 
 @router.post("/api/admin/mcp/index-jobs", response_model=McpIndexJobItem)
-def create_mcp_index_job(
+async def create_mcp_index_job(
     body: CreateMcpIndexJobRequest,
-    current_user: AuthUser = Depends(get_current_user),
-) -> McpIndexJobItem:
-    if current_user.role != "superadmin":
-        raise AuthForbiddenError()
-    workspace_service.get_workspace_path(body.workspace)
-    item = mcp_index_job_service.create_job(
+    current_user: AuthUser = Depends(require_superadmin),
+) -> dict[str, Any]:
+    await asyncio.to_thread(workspace_service.get_workspace_path, body.workspace)
+    item = await asyncio.to_thread(
+        mcp_index_job_service.create_job,
         user_id=current_user.id,
         workspace=body.workspace,
         mode=body.mode,
     )
-    return _to_job_item(item)
+    return _job_payload(item)
 
 
-@router.get("/api/admin/mcp/index-jobs/{job_id}", response_model=McpIndexJobItem)
-def get_mcp_index_job(
+# 任务详情、列表与失败明细是前端轮询进度的热路径：服务层数据可信，跳过 response_model 的
+# 二次校验，直接由 orjson 输出；responses 中保留模型声明，OpenAPI 文档不变。
+@router.get(
+    "/api/admin/mcp/index-jobs/{job_id}",
+    responses={200: {"model": McpIndexJobItem}},
+)
+async def get_mcp_index_job(
     job_id: str,
     current_user: AuthUser = Depends(get_current_user),
-) -> McpIndexJobItem:
-    item = mcp_index_job_service.get_job(
+) -> ORJSONResponse:
+    item = await asyncio.to_thread(
+        mcp_index_job_service.get_job,
         job_id=job_id,
         requester_id=current_user.id,
         requester_is_superadmin=current_user.role == "superadmin",
     )
-    return _to_job_item(item)
+    return ORJSONResponse(_job_payload(item))
 
 
-@router.get("/api/admin/mcp/index-jobs", response_model=McpIndexJobListResponse)
-def list_mcp_index_jobs(
+@router.get("/api/admin/mcp/index-jobs", responses={200: {"model": McpIndexJobListResponse}})
+async def list_mcp_index_jobs(
     current_user: AuthUser = Depends(get_current_user),
     workspace: str | None = None,
     status: str | None = None,
     page: int = 1,
     size: int = 20,
-) -> McpIndexJobListResponse:
-    items, total = mcp_index_job_service.list_jobs(
+) -> ORJSONResponse:
+    items, total = await asyncio.to_thread(
+        mcp_index_job_service.list_jobs,
         requester_id=current_user.id,
         requester_is_superadmin=current_user.role == "superadmin",
         workspace=_normalize_optional(workspace),
@@ -195,11 +231,13 @@ def list_mcp_index_jobs(
         page=page,
         size=size,
     )
-    return McpIndexJobListResponse(
-        items=[_to_job_item(item) for item in items],
-        total=total,
-        page=max(1, page),
-        size=max(1, min(size, 200)),
+    return ORJSONResponse(
+        {
+            "items": [_job_payload(item) for item in items],
+            "total": total,
+            "page": max(1, page),
+            "size": max(1, min(size, 200)),
+        }
     )
 
 
@@ -207,41 +245,43 @@ def list_mcp_index_jobs(
     "/api/admin/mcp/index-jobs/{job_id}/retry-failures",
     response_model=McpIndexJobItem,
 )
-def retry_mcp_index_job_failures(
+async def retry_mcp_index_job_failures(
     job_id: str,
-    current_user: AuthUser = Depends(get_current_user),
-) -> McpIndexJobItem:
-    if current_user.role != "superadmin":
-        raise AuthForbiddenError()
-    item = mcp_index_job_service.retry_job_failures(
+    current_user: AuthUser = Depends(require_superadmin),
+) -> dict[str, Any]:
+    item = await asyncio.to_thread(
+        mcp_index_job_service.retry_job_failures,
         source_job_id=job_id,
         user_id=current_user.id,
     )
-    return _to_job_item(item)
+    return _job_payload(item)
 
 
 @router.get(
     "/api/admin/mcp/index-jobs/{job_id}/failures",
-    response_model=McpIndexFailureListResponse,
+    responses={200: {"model": McpIndexFailureListResponse}},
 )
-def list_mcp_index_job_failures(
+async def list_mcp_index_job_failures(
     job_id: str,
     current_user: AuthUser = Depends(get_current_user),
     page: int = 1,
     size: int = 100,
-) -> McpIndexFailureListResponse:
-    items, total = mcp_index_job_service.list_job_failures(
+) -> ORJSONResponse:
+    items, total = await asyncio.to_thread(
+        mcp_index_job_service.list_job_failures,
         source_job_id=job_id,
         requester_id=current_user.id,
         requester_is_superadmin=current_user.role == "superadmin",
         page=page,
         size=size,
     )
-    return McpIndexFailureListResponse(
-        items=[_to_failure_item(item) for item in items],
-        total=total,
-        page=max(1, page),
-        size=max(1, min(size, 500)),
+    return ORJSONResponse(
+        {
+            "items": [_failure_payload(item) for item in items],
+            "total": total,
+            "page": max(1, page),
+            "size": max(1, min(size, 500)),
+        }
     )
 
 
@@ -249,59 +289,64 @@ def list_mcp_index_job_failures(
     "/api/admin/mcp/index-jobs/{job_id}/retry-failures/by-paths",
     response_model=McpIndexJobItem,
 )
-def retry_mcp_index_job_failures_by_paths(
+async def retry_mcp_index_job_failures_by_paths(
     job_id: str,
     body: RetryJobFailurePathsRequest,
-    current_user: AuthUser = Depends(get_current_user),
-) -> McpIndexJobItem:
-    if current_user.role != "superadmin":
-        raise AuthForbiddenError()
-    item = mcp_index_job_service.retry_job_failure_paths(
+    current_user: AuthUser = Depends(require_superadmin),
+) -> dict[str, Any]:
+    item = await asyncio.to_thread(
+        mcp_index_job_service.retry_job_failure_paths,
         source_job_id=job_id,
         user_id=current_user.id,
         paths=body.paths,
     )
-    return _to_job_item(item)
+    return _job_payload(item)
 
 
 @router.post(
     "/api/admin/mcp/index-jobs/retry-failures",
     response_model=RetryFailedJobsResponse,
 )
-def retry_all_failed_mcp_index_jobs(
+async def retry_all_failed_mcp_index_jobs(
     body: RetryFailedJobsRequest,
-    current_user: AuthUser = Depends(get_current_user),
-) -> RetryFailedJobsResponse:
-    if current_user.role != "superadmin":
-        raise AuthForbiddenError()
-    items = mcp_index_job_service.retry_all_failed_jobs(
+    current_user: AuthUser = Depends(require_superadmin),
+) -> dict[str, Any]:
+    items = await asyncio.to_thread(
+        mcp_index_job_service.retry_all_failed_jobs,
         user_id=current_user.id,
         workspace=_normalize_optional(body.workspace),
     )
-    return RetryFailedJobsResponse(items=[_to_job_item(item) for item in items])
+    return {"items": [_job_payload(item) for item in items]}
 
 
-@router.post("/api/mcp/tool-call", response_model=McpToolCallResponse)
-def mcp_tool_call_general(
+# 工具调用是最高频的接口：跳过 response_model 的重复校验与序列化，直接由 orjson 输出；
+# responses 中保留模型声明，OpenAPI 文档不变。
+@mcp_tool_router.post(
+    "/api/mcp/tool-call",
+    responses={200: {"model": McpToolCallResponse}},
+)
+async def mcp_tool_call_general(
     body: McpToolCallRequest,
     current_user: AuthUser = Depends(get_current_mcp_user),
-) -> McpToolCallResponse:
-    _ensure_mcp_enabled()
-    data = execute_mcp_tool(
+) -> ORJSONResponse:
+    data = await asyncio.to_thread(
+        execute_mcp_tool,
         current_user=current_user,
         tool=body.tool,
         arguments=body.arguments,
     )
-    return McpToolCallResponse(mode="general", data=data)
+    return _tool_call_response("general", None, data)
 
 
-@router.post("/api/mcp/{workspace}/tool-call", response_model=McpToolCallResponse)
-def mcp_tool_call_bound(
+@mcp_tool_router.post(
+    "/api/mcp/{workspace}/tool-call",
+    responses={200: {"model": McpToolCallResponse}},
+)
+async def mcp_tool_call_bound(
     workspace: str,
     body: McpToolCallRequest,
     current_user: AuthUser = Depends(get_current_mcp_user),
-) -> McpToolCallResponse:
-    _ensure_mcp_enabled()
+) -> ORJSONResponse:
     arguments = dict(body.arguments)
     incoming_workspace = arguments.get("workspace")
     if incoming_workspace is not None and str(incoming_workspace) != workspace:
@@ -312,13 +357,32 @@ def mcp_tool_call_bound(
             status_code=400,
         )
     arguments["workspace"] = workspace
-    data = execute_mcp_tool(
+    data = await asyncio.to_thread(
+        execute_mcp_tool,
         current_user=current_user,
         tool=body.tool,
         arguments=arguments,
         bound_workspace=workspace,
     )
-    return McpToolCallResponse(mode="bound", workspace=workspace, data=data)
+    return _tool_call_response("bound", workspace, data)
+
+
+def _tool_call_response(mode: str, workspace: str | None, data: Any) -> ORJSONResponse:
+    """两个工具调用入口共用的响应信封，字段与 McpToolCallResponse 保持一致。"""
+    return ORJSONResponse({"mode": mode, "workspace": workspace, "data": data})
+
+
+# 以下辅助函数把同一请求内的多次读库合并为一次线程池调用。
+def _load_auth_info(user_id: int, base_url: str):
+    return (
+        mcp_token_service.get_info(user_id),
+        mcp_token_service.get_token(user_id),
+        mcp_settings_service.build_mcp_url(base_url),
+    )
+
+
+def _reset_token(user_id: int, base_url: str):
+    return mcp_token_service.reset_token(user_id), mcp_settings_service.build_mcp_url(base_url)
 
 
 def execute_mcp_tool(
@@ -329,283 +393,349 @@ def execute_mcp_tool(
     bound_workspace: str | None = None,
 ) -> Any:
     started = time.perf_counter()
-    workspace_for_audit: str | None = None
-    path_or_query: str | None = None
+    audit = _ToolAudit()
     status = "ok"
     try:
-        if tool == "list_workspaces":
-            workspace = bound_workspace or _normalize_optional(arguments.get("workspace"))
-            if workspace:
-                _assert_workspace_access(current_user, workspace)
-                detail_items = workspace_service.list_workspaces(
-                    {workspace},
-                )
-                item = detail_items[0] if detail_items else None
-                return {
-                    "mode": "workspace_bound",
-                    "message": "当前 MCP 为 workspace 绑定模式，仅返回当前 workspace",
-                    "items": [_workspace_summary_for_mcp(item, fallback_name=workspace)],
-                }
-
-            if current_user.role in {"superadmin", "admin"}:
-                detail_items = workspace_service.list_workspaces()
-            else:
-                accessible = auth_service.get_accessible_workspaces(current_user)
-                detail_items = workspace_service.list_workspaces(set(accessible))
-            return {
-                "mode": "general",
-                "items": [_workspace_summary_for_mcp(item) for item in detail_items],
-            }
-
-        if tool == "list_files":
-            workspace = _required_workspace(
-                current_user,
-                arguments,
-                bound_workspace=bound_workspace,
-            )
-            workspace_for_audit = workspace
-            path = _normalize_optional(arguments.get("path")) or "."
-            depth = _int_value(arguments.get("depth"), default=2, min_value=0, max_value=8)
-            include_hidden = _bool_value(arguments.get("include_hidden"), default=False)
-            path_or_query = path
-            return _list_files(workspace, path=path, depth=depth, include_hidden=include_hidden)
-
-        if tool == "read_file":
-            workspace = _required_workspace(
-                current_user,
-                arguments,
-                bound_workspace=bound_workspace,
-            )
-            workspace_for_audit = workspace
-            path = _normalize_optional(arguments.get("path"))
-            if not path:
-                raise AppError(
-                    code="MCP_TOOL_INVALID_ARGUMENT",
-                    message="path is required",
-                    status_code=400,
-                )
-            start_line = _int_value(arguments.get("start_line"), default=1, min_value=1, max_value=2_000_000)
-            end_line = _int_value(arguments.get("end_line"), default=300, min_value=start_line, max_value=2_000_000)
-            path_or_query = path
-            return _read_file(workspace, path=path, start_line=start_line, end_line=end_line)
-
-        if tool == "grep_files":
-            workspace = _required_workspace(
-                current_user,
-                arguments,
-                bound_workspace=bound_workspace,
-            )
-            workspace_for_audit = workspace
-            pattern = _normalize_optional(arguments.get("pattern"))
-            if not pattern:
-                raise AppError(
-                    code="MCP_TOOL_INVALID_ARGUMENT",
-                    message="pattern is required",
-                    status_code=400,
-                )
-            glob_pattern = _normalize_optional(arguments.get("glob")) or "**/*"
-            top_k = _int_value(arguments.get("top_k"), default=20, min_value=1, max_value=200)
-            path_or_query = pattern
-            return _grep_files(workspace, pattern=pattern, glob_pattern=glob_pattern, top_k=top_k)
-
-        if tool in {"semantic_search", "hybrid_search"}:
-            workspace = _required_workspace(
-                current_user,
-                arguments,
-                bound_workspace=bound_workspace,
-            )
-            workspace_for_audit = workspace
-            query = _normalize_optional(arguments.get("query"))
-            if not query:
-                raise AppError(
-                    code="MCP_TOOL_INVALID_ARGUMENT",
-                    message="query is required",
-                    status_code=400,
-                )
-            top_k = _int_value(arguments.get("top_k"), default=8, min_value=1, max_value=50)
-            path_or_query = query
-            if tool == "semantic_search":
-                return {
-                    "workspace": workspace,
-                    "hits": mcp_vector_service.semantic_search(
-                        workspace=workspace,
-                        query=query,
-                        top_k=top_k,
-                    ),
-                }
-            return {
-                "workspace": workspace,
-                "hits": mcp_vector_service.hybrid_search(
-                    workspace=workspace,
-                    query=query,
-                    top_k=top_k,
-                ),
-            }
-
-        if tool == "search_git_commits":
-            workspace = _required_workspace(
-                current_user,
-                arguments,
-                bound_workspace=bound_workspace,
-            )
-            _ensure_git_workspace(workspace)
-            workspace_for_audit = workspace
-            start_time = _normalize_optional(arguments.get("start_time"))
-            end_time = _normalize_optional(arguments.get("end_time"))
-            if not start_time or not end_time:
-                raise AppError(
-                    code="MCP_TOOL_INVALID_ARGUMENT",
-                    message="start_time and end_time are required",
-                    status_code=400,
-                )
-            page = _required_int_value(
-                arguments.get("page"),
-                name="page",
-                min_value=1,
-                max_value=10_000,
-            )
-            page_size = _required_int_value(
-                arguments.get("page_size"),
-                name="page_size",
-                min_value=1,
-                max_value=100,
-            )
-            _validate_git_commit_time_range(start_time, end_time)
-            author = _normalize_optional(arguments.get("author"))
-            path_or_query = author or f"{start_time}~{end_time}"
-            result = workspace_service.search_git_commits(
-                workspace,
-                start_time=start_time,
-                end_time=end_time,
-                page=page,
-                page_size=page_size,
-                author=author,
-            )
-            return {
-                "workspace": result.workspace,
-                "page": result.page,
-                "page_size": result.page_size,
-                "has_more": result.has_more,
-                "items": [
-                    {
-                        "commit_id": item.commit_id,
-                        "subject": item.subject,
-                        "author": item.author,
-                        "authored_at": item.authored_at,
-                        "repo_path": item.repo.repo_path,
-                        "repo_name": item.repo.repo_name,
-                        "current_branch": item.repo.current_branch,
-                        "head_commit": item.repo.head_commit,
-                        "detached": item.repo.detached,
-                    }
-                    for item in result.items
-                ],
-                "warnings": [
-                    {
-                        "repo_path": warning.repo_path,
-                        "repo_name": warning.repo_name,
-                        "error": warning.error,
-                    }
-                    for warning in result.warnings
-                ],
-            }
-
-        if tool == "get_git_commit_detail":
-            workspace = _required_workspace(
-                current_user,
-                arguments,
-                bound_workspace=bound_workspace,
+        handler = _TOOL_DISPATCH.get(tool)
+        if handler is None:
+            raise AppError(
+                code="MCP_TOOL_NOT_SUPPORTED",
+                message="tool is not supported",
+                details={"tool": tool},
+                status_code=400,
             )
-            _ensure_git_workspace(workspace)
-            workspace_for_audit = workspace
-            commit_id = _normalize_optional(arguments.get("commit_id"))
-            if not commit_id:
-                raise AppError(
-                    code="MCP_TOOL_INVALID_ARGUMENT",
-                    message="commit_id is required",
-                    status_code=400,
-                )
-            repo_path = _normalize_optional(arguments.get("repo_path"))
-            path_or_query = commit_id
-            try:
-                detail = workspace_service.get_git_commit_detail(
-                    workspace,
-                    commit_id=commit_id,
-                    repo_path=repo_path,
-                )
-            except WorkspaceCreateError as exc:
-                reason = (
-                    str(exc.details.get("reason"))
-                    if isinstance(exc.details, dict)
-                    and exc.details.get("reason") is not None
-                    else str(exc)
-                )
-                if "commit matches multiple git modules:" in reason:
-                    matches = [
-                        item.strip()
-                        for item in reason.split(":", maxsplit=1)[1].split(",")
-                        if item.strip()
-                    ]
-                    raise AppError(
-                        code="MCP_GIT_COMMIT_AMBIGUOUS",
-                        message=(
-                            "commit_id matched multiple git modules, "
-                            "please specify repo_path"
-                        ),
-                        details={
-                            "workspace": workspace,
-                            "commit_id": commit_id,
-                            "matches": matches,
-                        },
-                        status_code=400,
-                    ) from exc
-                raise
-            return {
-                "workspace": detail.workspace,
-                "commit_id": detail.commit_id,
-                "subject": detail.subject,
-                "author": detail.author,
-                "authored_at": detail.authored_at,
-                "body": detail.body,
-                "repo_path": detail.repo.repo_path,
-                "repo_name": detail.repo.repo_name,
-                "current_branch": detail.repo.current_branch,
-                "head_commit": detail.repo.head_commit,
-                "detached": detail.repo.detached,
-                "changed_files": detail.changed_files,
-                "patch": detail.patch,
-                "truncated": detail.truncated,
-            }
-
-        raise AppError(
-            code="MCP_TOOL_NOT_SUPPORTED",
-            message="tool is not supported",
-            details={"tool": tool},
-            status_code=400,
-        )
+        return handler(current_user, arguments, bound_workspace, audit)
     except Exception:
         status = "failed"
         raise
     finally:
         elapsed = int((time.perf_counter() - started) * 1000)
-        mcp_audit_service.append(
+        mcp_audit_service.enqueue(
             McpAuditRecord(
                 user_id=current_user.id,
                 tool_name=tool,
-                workspace=workspace_for_audit,
-                path_or_query=path_or_query,
+                workspace=audit.workspace,
+                path_or_query=audit.path_or_query,
                 elapsed_ms=elapsed,
                 status=status,
             )
         )
 
 
+@dataclass
+class _ToolAudit:
+    """工具处理函数在解析参数后回填的审计字段。"""
+
+    workspace: str | None = None
+    path_or_query: str | None = None
+
+
+def _tool_list_workspaces(
+    current_user: AuthUser,
+    arguments: dict[str, Any],
+    bound_workspace: str | None,
+    audit: _ToolAudit,
+) -> Any:
+    workspace = bound_workspace or _normalize_optional(arguments.get("workspace"))
+    if workspace:
+        _assert_workspace_access(current_user, workspace)
+        detail_items = workspace_service.list_workspaces(
+            {workspace},
+        )
+        item = detail_items[0] if detail_items else None
+        return {
+            "mode": "workspace_bound",
+            "message": "当前 MCP 为 workspace 绑定模式，仅返回当前 workspace",
+            "items": [_workspace_summary_for_mcp(item, fallback_name=workspace)],
+        }
+
+    detail_items = workspace_service.list_workspaces(
+        auth_service.get_accessible_workspace_set(current_user)
+    )
+    return {
+        "mode": "general",
+        "items": [_workspace_summary_for_mcp(item) for item in detail_items],
+    }
+
+
+def _tool_list_files(
+    current_user: AuthUser,
+    arguments: dict[str, Any],
+    bound_workspace: str | None,
+    audit: _ToolAudit,
+) -> Any:
+    workspace, root = _required_workspace(
+        current_user,
+        arguments,
+        bound_workspace=bound_workspace,
+    )
+    audit.workspace = workspace
+    path = _normalize_optional(arguments.get("path")) or "."
+    depth = _int_value(arguments.get("depth"), default=2, min_value=0, max_value=8)
+    include_hidden = _bool_value(arguments.get("include_hidden"), default=False)
+    audit.path_or_query = path
+    return _list_files(workspace, root, path=path, depth=depth, include_hidden=include_hidden)
+
+
+def _tool_read_file(
+    current_user: AuthUser,
+    arguments: dict[str, Any],
+    bound_workspace: str | None,
+    audit: _ToolAudit,
+) -> Any:
+    workspace, root = _required_workspace(
+        current_user,
+        arguments,
+        bound_workspace=bound_workspace,
+    )
+    audit.workspace = workspace
+    path = _normalize_optional(arguments.get("path"))
+    if not path:
+        raise AppError(
+            code="MCP_TOOL_INVALID_ARGUMENT",
+            message="path is required",
+            status_code=400,
+        )
+    start_line = _int_value(arguments.get("start_line"), default=1, min_value=1, max_value=2_000_000)
+    end_line = _int_value(arguments.get("end_line"), default=300, min_value=start_line, max_value=2_000_000)
+    audit.path_or_query = path
+    return _read_file(workspace, root, path=path, start_line=start_line, end_line=end_line)
+
+
+def _tool_grep_files(
+    current_user: AuthUser,
+    arguments: dict[str, Any],
+    bound_workspace: str | None,
+    audit: _ToolAudit,
+) -> Any:
+    workspace, root = _required_workspace(
+        current_user,
+        arguments,
+        bound_workspace=bound_workspace,
+    )
+    audit.workspace = workspace
+    pattern = _normalize_optional(arguments.get("pattern"))
+    if not pattern:
+        raise AppError(
+            code="MCP_TOOL_INVALID_ARGUMENT",
+            message="pattern is required",
+            status_code=400,
+        )
+    glob_pattern = _normalize_optional(arguments.get("glob")) or "**/*"
+    top_k = _int_value(arguments.get("top_k"), default=20, min_value=1, max_value=200)
+    audit.path_or_query = pattern
+    return _grep_files(workspace, root, pattern=pattern, glob_pattern=glob_pattern, top_k=top_k)
+
+
+def _tool_vector_search(
+    current_user: AuthUser,
+    arguments: dict[str, Any],
+    bound_workspace: str | None,
+    audit: _ToolAudit,
+    *,
+    hybrid: bool,
+) -> Any:
+    workspace, root = _required_workspace(
+        current_user,
+        arguments,
+        bound_workspace=bound_workspace,
+    )
+    audit.workspace = workspace
+    query = _normalize_optional(arguments.get("query"))
+    if not query:
+        raise AppError(
+            code="MCP_TOOL_INVALID_ARGUMENT",
+            message="query is required",
+            status_code=400,
+        )
+    top_k = _int_value(arguments.get("top_k"), default=8, min_value=1, max_value=50)
+    audit.path_or_query = query
+    if hybrid:
+        return {
+            "workspace": workspace,
+            "hits": mcp_vector_service.hybrid_search(
+                workspace=workspace,
+                query=query,
+                top_k=top_k,
+            ),
+        }
+    return {
+        "workspace": workspace,
+        "hits": mcp_vector_service.semantic_search(
+            workspace=workspace,
+            query=query,
+            top_k=top_k,
+        ),
+    }
+
+
+def _tool_search_git_commits(
+    current_user: AuthUser,
+    arguments: dict[str, Any],
+    bound_workspace: str | None,
+    audit: _ToolAudit,
+) -> Any:
+    workspace, root = _required_workspace(
+        current_user,
+        arguments,
+        bound_workspace=bound_workspace,
+    )
+    _ensure_git_workspace(workspace, root)
+    audit.workspace = workspace
+    start_time = _normalize_optional(arguments.get("start_time"))
+    end_time = _normalize_optional(arguments.get("end_time"))
+    if not start_time or not end_time:
+        raise AppError(
+            code="MCP_TOOL_INVALID_ARGUMENT",
+            message="start_time and end_time are required",
+            status_code=400,
+        )
+    page = _required_int_value(
+        arguments.get("page"),
+        name="page",
+        min_value=1,
+        max_value=10_000,
+    )
+    page_size = _required_int_value(
+        arguments.get("page_size"),
+        name="page_size",
+        min_value=1,
+        max_value=100,
+    )
+    _validate_git_commit_time_range(start_time, end_time)
+    author = _normalize_optional(arguments.get("author"))
+    audit.path_or_query = author or f"{start_time}~{end_time}"
+    result = workspace_service.search_git_commits(
+        workspace,
+        start_time=start_time,
+        end_time=end_time,
+        page=page,
+        page_size=page_size,
+        author=author,
+    )
+    return {
+        "workspace": result.workspace,
+        "page": result.page,
+        "page_size": result.page_size,
+        "has_more": result.has_more,
+        "items": [
+            {
+                "commit_id": item.commit_id,
+                "subject": item.subject,
+                "author": item.author,
+                "authored_at": item.authored_at,
+                "repo_path": item.repo.repo_path,
+                "repo_name": item.repo.repo_name,
+                "current_branch": item.repo.current_branch,
+                "head_commit": item.repo.head_commit,
+                "detached": item.repo.detached,
+            }
+            for item in result.items
+        ],
+        "warnings": [
+            {
+                "repo_path": warning.repo_path,
+                "repo_name": warning.repo_name,
+                "error": warning.error,
+            }
+            for warning in result.warnings
+        ],
+    }
+
+
+def _tool_get_git_commit_detail(
+    current_user: AuthUser,
+    arguments: dict[str, Any],
+    bound_workspace: str | None,
+    audit: _ToolAudit,
+) -> Any:
+    workspace, root = _required_workspace(
+        current_user,
+        arguments,
+        bound_workspace=bound_workspace,
+    )
+    _ensure_git_workspace(workspace, root)
+    audit.workspace = workspace
+    commit_id = _normalize_optional(arguments.get("commit_id"))
+    if not commit_id:
+        raise AppError(
+            code="MCP_TOOL_INVALID_ARGUMENT",
+            message="commit_id is required",
+            status_code=400,
+        )
+    repo_path = _normalize_optional(arguments.get("repo_path"))
+    audit.path_or_query = commit_id
+    try:
+        detail = workspace_service.get_git_commit_detail(
+            workspace,
+            commit_id=commit_id,
+            repo_path=repo_path,
+        )
+    except WorkspaceCreateError as exc:
+        reason = (
+            str(exc.details.get("reason"))
+            if isinstance(exc.details, dict)
+            and exc.details.get("reason") is not None
+            else str(exc)
+        )
+        if "commit matches multiple git modules:" in reason:
+            matches = [
+                item.strip()
+                for item in reason.split(":", maxsplit=1)[1].split(",")
+                if item.strip()
+            ]
+            raise AppError(
+                code="MCP_GIT_COMMIT_AMBIGUOUS",
+                message=(
+                    "commit_id matched multiple git modules, "
+                    "please specify repo_path"
+                ),
+                details={
+                    "workspace": workspace,
+                    "commit_id": commit_id,
+                    "matches": matches,
+                },
+                status_code=400,
+            ) from exc
+        raise
+    return {
+        "workspace": detail.workspace,
+        "commit_id": detail.commit_id,
+        "subject": detail.subject,
+        "author": detail.author,
+        "authored_at": detail.authored_at,
+        "body": detail.body,
+        "repo_path": detail.repo.repo_path,
+        "repo_name": detail.repo.repo_name,
+        "current_branch": detail.repo.current_branch,
+        "head_commit": detail.repo.head_commit,
+        "detached": detail.repo.detached,
+        "changed_files": detail.changed_files,
+        "patch": detail.patch,
+        "truncated": detail.truncated,
+    }
+
+
+# 工具名 -> 处理函数；新增工具只需实现处理函数并在此登记。
+_TOOL_DISPATCH: dict[str, Callable[[AuthUser, dict[str, Any], str | None, _ToolAudit], Any]] = {
+    "list_workspaces": _tool_list_workspaces,
+    "list_files": _tool_list_files,
+    "read_file": _tool_read_file,
+    "grep_files": _tool_grep_files,
+    "semantic_search": functools.partial(_tool_vector_search, hybrid=False),
+    "hybrid_search": functools.partial(_tool_vector_search, hybrid=True),
+    "search_git_commits": _tool_search_git_commits,
+    "get_git_commit_detail": _tool_get_git_commit_detail,
+}
+
+
 def _required_workspace(
     current_user: AuthUser,
     arguments: dict[str, Any],
     *,
     bound_workspace: str | None = None,
-) -> str:
+) -> tuple[str, Path]:
+    """校验并返回 (workspace, 工作空间根目录)；根目录随结果下传，避免工具内重复解析。"""
     workspace = _normalize_optional(arguments.get("workspace"))
     if bound_workspace:
         # 绑定入口下，workspace 以路径绑定值为准；若调用方显式传入且不一致则拒绝。
@@ -626,18 +756,17 @@ def _required_workspace(
             message="workspace is required",
             status_code=400,
         )
-    _assert_workspace_access(current_user, workspace)
-    return workspace
+    root = _assert_workspace_access(current_user, workspace)
+    return workspace, root
 
 
-def _assert_workspace_access(current_user: AuthUser, workspace: str) -> None:
+def _assert_workspace_access(current_user: AuthUser, workspace: str) -> Path:
     if not auth_service.can_access_workspace(current_user, workspace):
         raise AuthForbiddenError()
-    workspace_service.get_workspace_path(workspace)
+    return workspace_service.get_workspace_path(workspace)
 
 
-def _ensure_git_workspace(workspace: str) -> None:
-    root = workspace_service.get_workspace_path(workspace)
+def _ensure_git_workspace(workspace: str, root: Path) -> None:
     if not (root / ".git").exists():
         raise AppError(
             code="MCP_GIT_UNAVAILABLE",
@@ -668,16 +797,15 @@ def _user_workspaces(current_user: AuthUser) -> list[str]:
     return auth_service.get_accessible_workspaces(current_user)
 
 
-def _list_files(workspace: str, *, path: str, depth: int, include_hidden: bool) -> dict[str, Any]:
-    root = workspace_service.get_workspace_path(workspace)
-    target = (root / path).resolve()
-    if root not in target.parents and target != root:
-        raise AppError(
-            code="PATH_OUT_OF_WORKSPACE",
-            message="path escapes workspace root",
-            details={"workspace": workspace, "path": path},
-            status_code=400,
-        )
+def _list_files(
+    workspace: str,
+    root: Path,
+    *,
+    path: str,
+    depth: int,
+    include_hidden: bool,
+) -> dict[str, Any]:
+    target = _resolve_workspace_target(root, path, workspace=workspace)
     if not target.exists():
         raise AppError(
             code="FILE_NOT_FOUND",
@@ -686,52 +814,85 @@ def _list_files(workspace: str, *, path: str, depth: int, include_hidden: bool)
             status_code=404,
         )
 
-    base_depth = len(target.parts)
-    items: list[dict[str, Any]] = []
-    iterator = [target] if target.is_file() else list(target.rglob("*"))
-    for item in iterator:
+    relative_target = target.relative_to(root)
+    if not include_hidden and any(part.startswith(".") for part in relative_target.parts):
+        return {"workspace": workspace, "path": path, "items": []}
+
+    if target.is_file():
+        stat_result = target.stat()
+        items = [_file_item(str(relative_target), "file", stat_result)]
+    else:
+        items = list(_walk_entries(target, relative_target, depth, include_hidden))
+    items.sort(key=itemgetter("path"))
+    return {"workspace": workspace, "path": path, "items": items}
+
+
+def _walk_entries(
+    target: Path,
+    relative_target: Path,
+    max_depth: int,
+    include_hidden: bool,
+) -> Iterator[dict[str, Any]]:
+    """
+    基于 os.scandir 的迭代遍历。
+
+    说明：
+    - DirEntry 自带类型与 stat 缓存，避免每个条目多次 stat 系统调用。
+    - 超过 max_depth 的目录不再下钻；隐藏条目在进入时直接跳过。
+    - 与 rglob 一致：列出符号链接本身，但不进入符号链接目录。
+    """
+    if max_depth < 1:
+        return
+    prefix = "" if relative_target == Path(".") else f"{relative_target}/"
+    stack: list[tuple[str, str, int]] = [(str(target), prefix, 1)]
+    while stack:
+        directory, rel_prefix, current_depth = stack.pop()
         try:
-            relative = item.relative_to(root)
-        except ValueError:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not include_hidden and entry.name.startswith("."):
+                        continue
+                    relative = rel_prefix + entry.name
+                    try:
+                        if entry.is_dir():
+                            kind = "dir"
+                        elif entry.is_file():
+                            kind = "file"
+                        else:
+                            continue
+                        stat_result = entry.stat()
+                        if (
+                            kind == "dir"
+                            and current_depth < max_depth
+                            and not entry.is_symlink()
+                        ):
+                            stack.append((entry.path, relative + "/", current_depth + 1))
+                    except OSError:
+                        continue
+                    yield _file_item(relative, kind, stat_result)
+        except OSError:
             continue
-        if not include_hidden and any(part.startswith(".") for part in relative.parts):
-            continue
-        current_depth = len(item.parts) - base_depth
-        if current_depth > depth:
-            continue
-        if item.is_dir():
-            items.append(
-                {
-                    "path": str(relative),
-                    "type": "dir",
-                    "size": None,
-                    "mtime": datetime.fromtimestamp(item.stat().st_mtime, tz=timezone.utc).isoformat(),
-                }
-            )
-        elif item.is_file():
-            items.append(
-                {
-                    "path": str(relative),
-                    "type": "file",
-                    "size": int(item.stat().st_size),
-                    "mtime": datetime.fromtimestamp(item.stat().st_mtime, tz=timezone.utc).isoformat(),
-                }
-            )
-    items.sort(key=lambda row: row["path"])
-    return {"workspace": workspace, "path": path, "items": items}
 
 
-def _read_file(workspace: str, *, path: str, start_line: int, end_line: int) -> dict[str, Any]:
+def _file_item(relative: str, kind: str, stat_result: os.stat_result) -> dict[str, Any]:
+    return {
+        "path": relative,
+        "type": kind,
+        "size": int(stat_result.st_size) if kind == "file" else None,
+        "mtime": utc_isoformat_ns(stat_result.st_mtime_ns),
+    }
+
+
+def _read_file(
+    workspace: str,
+    root: Path,
+    *,
+    path: str,
+    start_line: int,
+    end_line: int,
+) -> dict[str, Any]:
     settings_value = mcp_settings_service.get_settings()
-    root = workspace_service.get_workspace_path(workspace)
-    target = (root / path).resolve()
-    if root not in target.parents and target != root:
-        raise AppError(
-            code="PATH_OUT_OF_WORKSPACE",
-            message="path escapes workspace root",
-            details={"workspace": workspace, "path": path},
-            status_code=400,
-        )
+    target = _resolve_workspace_target(root, path, workspace=workspace)
     if not target.exists() or not target.is_file():
         raise AppError(
             code="FILE_NOT_FOUND",
@@ -752,17 +913,27 @@ def _read_file(workspace: str, *, path: str, start_line: int, end_line: int) ->
             status_code=400,
         )
 
-    text = _read_text_with_fallback(target)
-    lines = text.splitlines()
+    # 只读取到所需的最后一行（多读一行用于判断是否截断），避免为小片段加载整个文件。
+    max_lines = settings_value.kb_read_max_lines
     start_idx = max(0, start_line - 1)
-    end_idx = min(len(lines), end_line)
-    snippet = lines[start_idx:end_idx]
+    wanted = min(max(0, end_line - start_idx), max_lines + 1)
+    try:
+        with target.open("r", encoding="utf-8") as handle:
+            snippet = [
+                line.rstrip("\n")
+                for line in itertools.islice(handle, start_idx, start_idx + wanted)
+            ]
+    except UnicodeDecodeError as exc:
+        raise AppError(
+            code="FILE_ENCODING_UNSUPPORTED",
+            message="file is not utf-8 text",
+            details={"path": str(target)},
+            status_code=400,
+        ) from exc
 
-    max_lines = settings_value.kb_read_max_lines
-    truncated = False
-    if len(snippet) > max_lines:
+    truncated = len(snippet) > max_lines
+    if truncated:
         snippet = snippet[:max_lines]
-        truncated = True
 
     content = "\n".join(snippet)
     return {
@@ -776,30 +947,257 @@ def _read_file(workspace: str, *, path: str, start_line: int, end_line: int) ->
     }
 
 
-def _grep_files(workspace: str, *, pattern: str, glob_pattern: str, top_k: int) -> dict[str, Any]:
-    root = workspace_service.get_workspace_path(workspace)
-    regex = re.compile(pattern)
+def _grep_files(
+    workspace: str,
+    root: Path,
+    *,
+    pattern: str,
+    glob_pattern: str,
+    top_k: int,
+) -> dict[str, Any]:
+    regex = re.compile(pattern, re.MULTILINE)
+    if _RG_BIN is not None:
+        rg_matches = _grep_with_ripgrep(
+            root,
+            pattern=pattern,
+            glob_pattern=glob_pattern,
+            top_k=top_k,
+        )
+        if rg_matches is not None:
+            return {"workspace": workspace, "matches": rg_matches}
+
+    glob_regex = _compile_glob(glob_pattern)
+    scan_file = (
+        _grep_file_lines
+        if any(token in pattern for token in _LINE_SCAN_TOKENS)
+        else _grep_file_blocks
+    )
     matches: list[dict[str, Any]] = []
-    for path in root.rglob("*"):
-        if not path.is_file():
+    for file_path, relative in _iter_workspace_files(root):
+        if glob_regex is not None and glob_regex.fullmatch(relative) is None:
             continue
-        if "/.git/" in path.as_posix():
+        matches.extend(scan_file(file_path, relative, regex, limit=top_k - len(matches)))
+        if len(matches) >= top_k:
+            break
+    return {"workspace": workspace, "matches": matches}
+
+
+def _grep_file_lines(
+    file_path: str,
+    relative: str,
+    regex: re.Pattern[str],
+    *,
+    limit: int,
+) -> list[dict[str, Any]]:
+    """
+    逐行流式匹配单个文件，不再为整个文件构造文本与行列表。
+
+    说明：
+    - 命中行截断后再保存，长行（压缩后的 JS/CSS、日志）不会被整段保留。
+    - 文件不是 UTF-8 文本时整体跳过，与整读解码失败时的行为一致。
+    """
+    found: list[dict[str, Any]] = []
+    try:
+        with open(file_path, encoding="utf-8") as handle:
+            for idx, line in enumerate(handle, start=1):
+                line = line.rstrip("\n")
+                if regex.search(line):
+                    found.append({"path": relative, "line": idx, "text": line[:1000]})
+                    if len(found) >= limit:
+                        break
+    except (OSError, UnicodeDecodeError):
+        return []
+    return found
+
+
+def _grep_file_blocks(
+    file_path: str,
+    relative: str,
+    regex: re.Pattern[str],
+    *,
+    limit: int,
+) -> list[dict[str, Any]]:
+    """
+    按块读取单个文件，在整块文本上搜索命中，结果与逐行匹配一致。
+
+    说明：
+    - 每块截止到最后一个换行符，剩余半行并入下一块；无匹配的行不产生任何 Python 层开销。
+    - 多行模式下整块搜索可能跨行命中，候选行需再单独校验一次，命中后从下一行继续搜索。
+    """
+    found: list[dict[str, Any]] = []
+    line_no = 1
+    pending = ""
+    try:
+        with open(file_path, encoding="utf-8") as handle:
+            while True:
+                chunk = handle.read(_GREP_BLOCK_CHARS)
+                block = pending + chunk
+                if chunk:
+                    cut = block.rfind("\n") + 1
+                    if not cut:
+                        pending = block
+                        continue
+                    block, pending = block[:cut], block[cut:]
+                if block:
+                    line_no = _grep_block(block, line_no, relative, regex, found, limit)
+                if not chunk or len(found) >= limit:
+                    break
+    except (OSError, UnicodeDecodeError):
+        return []
+    return found
+
+
+def _grep_block(
+    block: str,
+    line_no: int,
+    relative: str,
+    regex: re.Pattern[str],
+    found: list[dict[str, Any]],
+    limit: int,
+) -> int:
+    """在由完整行组成的文本块中收集命中行，返回下一块首行的行号。"""
+    pos = 0
+    end = len(block)
+    while pos < end:
+        match = regex.search(block, pos)
+        if match is None or match.start() >= end:
+            break
+        start = match.start()
+        line_start = block.rfind("\n", pos, start) + 1 or pos
+        line_no += block.count("\n", pos, line_start)
+        line_end = block.find("\n", start)
+        if line_end == -1:
+            line_end = end
+        line = block[line_start:line_end]
+        if regex.search(line):
+            found.append({"path": relative, "line": line_no, "text": line[:1000]})
+            if len(found) >= limit:
+                return line_no
+        pos = line_end + 1
+        line_no += 1
+    return line_no + block.count("\n", pos, end)
+
+
+def _grep_with_ripgrep(
+    root: Path,
+    *,
+    pattern: str,
+    glob_pattern: str,
+    top_k: int,
+) -> list[dict[str, Any]] | None:
+    """
+    使用 ripgrep 执行 grep。
+
+    说明：
+    - 文件范围对齐 Python 实现：包含隐藏文件、不读取 .gitignore、排除 .git 目录；
+      --follow 纳入指向文件的符号链接，位于符号链接目录下的命中再剔除（Python 遍历不进入这类目录）。
+    - --text 让含 NUL 字节的文件照常搜索；含非 UTF-8 内容的文件整体剔除，与 Python 解码失败即跳过一致。
+    - --sort=path 按路径顺序输出（rg 因此单线程遍历），top_k 截断结果稳定可复现；
+      Python 实现按目录遍历顺序截断，top_k 不足以覆盖全部命中时两者选中的文件可能不同。
+    - 行按 \n 切分；Python 文本模式还会把单独的 \r 视为换行，这类文件行号可能不同。
+    - glob 以 "/" 锚定到工作空间根目录，命中结果再经同一 glob 正则复核，保证匹配语义不变。
+    - 正则语法不兼容、超时或进程异常时返回 None，由调用方回退到 Python 实现。
+    """
+    args = [
+        _RG_BIN,
+        "--json",
+        "--no-config",
+        "--hidden",
+        "--no-ignore",
+        "--follow",
+        "--text",
+        "--sort=path",
+        "--no-messages",
+        "--max-count",
+        str(top_k),
+        "--glob",
+        "!.git",
+    ]
+    if glob_pattern not in _MATCH_ALL_GLOBS:
+        args.extend(["--glob", "/" + glob_pattern.lstrip("/")])
+    args.extend(["--", pattern, "."])
+    try:
+        completed = subprocess.run(
+            args,
+            cwd=str(root),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=_RG_TIMEOUT_SECONDS,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    # 退出码 1 表示没有匹配；2 既可能是个别文件读取失败（如失效的符号链接，Python 实现同样跳过），
+    # 也可能是正则语法差异。只有搜索真正执行时才会输出 summary，据此区分，后者交给 Python 实现。
+    if completed.returncode not in (0, 1, 2):
+        return None
+    lines = completed.stdout.splitlines()
+    if not lines or b'"type":"summary"' not in lines[-1]:
+        return None
+
+    glob_regex = _compile_glob(glob_pattern)
+    searchable: dict[str, bool] = {}
+    symlinked_dirs: dict[str, bool] = {}
+    matches: list[dict[str, Any]] = []
+    for raw in lines:
+        if not raw.startswith(b'{"type":"match"'):
             continue
-        try:
-            relative = str(path.relative_to(root))
-        except ValueError:
+        data = orjson.loads(raw)["data"]
+        relative = data["path"].get("text")
+        # 非 UTF-8 文件名以 base64 形式返回，无法作为结果路径输出，直接跳过。
+        if relative is None:
             continue
-        if not _glob_match(relative, glob_pattern):
+        relative = relative.removeprefix("./")
+        allowed = searchable.get(relative)
+        if allowed is None:
+            allowed = (
+                (glob_regex is None or glob_regex.fullmatch(relative) is not None)
+                and not _under_symlinked_dir(root, relative, symlinked_dirs)
+                and _is_utf8_file(os.path.join(root, relative))
+            )
+            searchable[relative] = allowed
+        if not allowed:
             continue
-        text = _safe_read_text(path)
+        text = data["lines"].get("text")
         if text is None:
             continue
-        for idx, line in enumerate(text.splitlines(), start=1):
-            if regex.search(line):
-                matches.append({"path": relative, "line": idx, "text": line[:1000]})
-                if len(matches) >= top_k:
-                    return {"workspace": workspace, "matches": matches}
-    return {"workspace": workspace, "matches": matches}
+        matches.append(
+            {
+                "path": relative,
+                "line": data["line_number"],
+                "text": text.rstrip("\r\n")[:1000],
+            }
+        )
+        if len(matches) >= top_k:
+            break
+    return matches
+
+
+def _under_symlinked_dir(root: Path, relative: str, cache: dict[str, bool]) -> bool:
+    """判断相对路径的某一级父目录是否为符号链接（结果按目录缓存）。"""
+    parent = relative.rpartition("/")[0]
+    if not parent:
+        return False
+    cached = cache.get(parent)
+    if cached is None:
+        cached = os.path.islink(os.path.join(root, parent)) or _under_symlinked_dir(
+            root, parent, cache
+        )
+        cache[parent] = cached
+    return cached
+
+
+def _is_utf8_file(path: str) -> bool:
+    """按块增量解码，判断文件是否整体为合法 UTF-8（与 Python 实现的跳过条件一致）。"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        with open(path, "rb") as handle:
+            while chunk := handle.read(_GREP_BLOCK_CHARS):
+                decoder.decode(chunk)
+            decoder.decode(b"", final=True)
+    except (OSError, UnicodeDecodeError):
+        return False
+    return True
 
 
 def _semantic_fallback(workspace: str, *, query: str, top_k: int) -> dict[str, Any]:
@@ -807,26 +1205,28 @@ def _semantic_fallback(workspace: str, *, query: str, top_k: int) -> dict[str, A
     if not tokens:
         return {"workspace": workspace, "hits": []}
 
+    # 先用一个编译好的多词交替正则在 C 层筛出命中的文件与行，
+    # 仅对命中行逐词计分，计分规则（命中的词数）保持不变。
+    lowered_tokens = [token.lower() for token in tokens]
+    token_regex = re.compile("|".join(re.escape(token) for token in lowered_tokens))
     root = workspace_service.get_workspace_path(workspace)
     hits: list[dict[str, Any]] = []
-    for path in root.rglob("*"):
-        if not path.is_file():
-            continue
-        if "/.git/" in path.as_posix():
-            continue
-        text = _safe_read_text(path)
+    for file_path, relative in _iter_workspace_files(root):
+        text = _safe_read_text(file_path)
         if text is None:
             continue
-        lines = text.splitlines()
-        for idx, line in enumerate(lines, start=1):
-            lowered = line.lower()
-            score = sum(1 for token in tokens if token.lower() in lowered)
-            if score <= 0:
+        lowered_text = text.lower()
+        if token_regex.search(lowered_text) is None:
+            continue
+        lines = zip(text.splitlines(), lowered_text.splitlines())
+        for idx, (line, lowered) in enumerate(lines, start=1):
+            if token_regex.search(lowered) is None:
                 continue
+            score = sum(1 for token in lowered_tokens if token in lowered)
             hits.append(
                 {
-                    "chunk_id": f"{path}:{idx}",
-                    "path": str(path.relative_to(root)),
+                    "chunk_id": f"{file_path}:{idx}",
+                    "path": relative,
                     "start_line": idx,
                     "end_line": idx,
                     "score": score,
@@ -838,36 +1238,69 @@ def _semantic_fallback(workspace: str, *, query: str, top_k: int) -> dict[str, A
     return {"workspace": workspace, "hits": hits[:top_k]}
 
 
-def _glob_match(path: str, pattern: str) -> bool:
-    if pattern in {"*", "**", "**/*"}:
-        return True
+@functools.lru_cache(maxsize=256)
+def _compile_glob(pattern: str) -> re.Pattern[str] | None:
+    """把 glob 编译为正则并缓存；匹配全部路径的写法返回 None。"""
+    if pattern in _MATCH_ALL_GLOBS:
+        return None
     regex = re.escape(pattern)
     regex = regex.replace(r"\*\*", ".*").replace(r"\*", "[^/]*")
-    return re.fullmatch(regex, path) is not None
+    return re.compile(regex)
+
 
+def _resolve_workspace_target(root: Path, path: str, *, workspace: str) -> Path:
+    target = (root / path).resolve()
+    # 字符串前缀比较，避免为每次检查构造完整的 parents 序列。
+    root_str = str(root)
+    target_str = str(target)
+    if target_str != root_str and not target_str.startswith(root_str.rstrip(os.sep) + os.sep):
+        raise AppError(
+            code="PATH_OUT_OF_WORKSPACE",
+            message="path escapes workspace root",
+            details={"workspace": workspace, "path": path},
+            status_code=400,
+        )
+    return target
 
-def _safe_read_text(path: Path) -> str | None:
+
+def _iter_workspace_files(root: Path) -> Iterator[tuple[str, str]]:
+    """
+    遍历工作空间内的文件，返回 (绝对路径, 相对路径)。
+
+    说明：
+    - 下钻时直接剪掉 .git 目录，不再对每个文件做路径子串判断。
+    - 与 rglob 一致：不进入符号链接目录，但包含指向文件的符号链接。
+    """
+    stack: list[tuple[str, str]] = [(str(root), "")]
+    while stack:
+        directory, rel_prefix = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name != ".git":
+                                stack.append((entry.path, f"{rel_prefix}{entry.name}/"))
+                        elif entry.is_file():
+                            yield entry.path, rel_prefix + entry.name
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+def _safe_read_text(path: str | Path) -> str | None:
     try:
-        return path.read_text(encoding="utf-8")
+        with open(path, encoding="utf-8") as handle:
+            return handle.read()
     except Exception:
         try:
-            return path.read_text(encoding="utf-8-sig")
+            with open(path, encoding="utf-8-sig") as handle:
+                return handle.read()
         except Exception:
             return None
 
 
-def _read_text_with_fallback(path: Path) -> str:
-    text = _safe_read_text(path)
-    if text is None:
-        raise AppError(
-            code="FILE_ENCODING_UNSUPPORTED",
-            message="file is not utf-8 text",
-            details={"path": str(path)},
-            status_code=400,
-        )
-    return text
-
-
 def _normalize_optional(value: Any) -> str | None:
     if value is None:
         return None
@@ -984,40 +1417,31 @@ def _request_base_url(request: Request) -> str:
     return f"{request.url.scheme}://{request.url.netloc}".rstrip("/")
 
 
-def _ensure_mcp_enabled() -> None:
-    cfg = mcp_settings_service.get_settings()
-    if not cfg.mcp_enabled:
-        raise AppError(
-            code="MCP_DISABLED",
-            message="MCP is disabled",
-            status_code=400,
-        )
-
-
-def _to_job_item(item) -> McpIndexJobItem:
-    return McpIndexJobItem(
-        job_id=item.job_id,
-        workspace=item.workspace,
-        mode=item.mode,
-        status=item.status,
-        percent=item.percent,
-        total_files=item.total_files,
-        total_chunks=item.total_chunks,
-        processed_chunks=item.processed_chunks,
-        failed_chunks=item.failed_chunks,
-        elapsed_ms=item.elapsed_ms,
-        error_message=item.error_message,
-        created_at=item.created_at,
-        updated_at=item.updated_at,
-    )
+def _job_payload(item) -> dict[str, Any]:
+    """McpIndexJobItem 的字段映射，详情、列表与重试接口共用。"""
+    return {
+        "job_id": item.job_id,
+        "workspace": item.workspace,
+        "mode": item.mode,
+        "status": item.status,
+        "percent": item.percent,
+        "total_files": item.total_files,
+        "total_chunks": item.total_chunks,
+        "processed_chunks": item.processed_chunks,
+        "failed_chunks": item.failed_chunks,
+        "elapsed_ms": item.elapsed_ms,
+        "error_message": item.error_message,
+        "created_at": item.created_at,
+        "updated_at": item.updated_at,
+    }
 
 
-def _to_failure_item(item) -> McpIndexFailureItem:
-    return McpIndexFailureItem(
-        job_id=item.job_id,
-        workspace=item.workspace,
-        path=item.path,
-        reason=item.reason,
-        retry_count=item.retry_count,
-        created_at=item.created_at,
-    )
+def _failure_payload(item) -> dict[str, Any]:
+    return {
+        "job_id": item.job_id,
+        "workspace": item.workspace,
+        "path": item.path,
+        "reason": item.reason,
+        "retry_count": item.retry_count,
+        "created_at": item.created_at,
+    }
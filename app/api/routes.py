@@ -1,13 +1,18 @@
 import asyncio
-import json
 import logging
-from datetime import datetime, timezone
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
 
-from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
-from fastapi.responses import FileResponse, StreamingResponse
+import orjson
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
+from pydantic import TypeAdapter
 
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, require_superadmin
 from app.core.errors import AppError, AuthForbiddenError, WorkspaceNotFoundError
+from app.core.timefmt import utc_now_isoformat
 from app.models.schemas import (
     AdminResetUserPasswordRequest,
     BootstrapRequest,
@@ -26,12 +31,10 @@ from app.models.schemas import (
     CreateWorkspaceRequest,
     FileContentResponse,
     FileIndexResponse,
-    FileNodeItem,
     LlmConfigItem,
     LlmConfigListResponse,
     MarkdownContentResponse,
     MarkdownIndexResponse,
-    MarkdownNodeItem,
     LoginRequest,
     LoginResponse,
     SendMessageRequest,
@@ -39,7 +42,6 @@ from app.models.schemas import (
     SessionRunItem,
     SessionDetailResponse,
     SessionListResponse,
-    SessionMessageItem,
     SessionSummaryItem,
     UpdateLlmConfigRequest,
     UpdateWorkspaceAutoPullSettingsRequest,
@@ -79,7 +81,11 @@ from app.services.file_preview_service import file_preview_service
 from app.services.mcp_index_job_service import mcp_index_job_service
 from app.services.mcp_settings_service import mcp_settings_service
 from app.services.personal_agent_service import personal_agent_service
-from app.services.session_run_service import TERMINAL_RUN_STATUS, session_run_service
+from app.services.session_run_service import (
+    TERMINAL_RUN_STATUS,
+    SessionRunEvent,
+    session_run_service,
+)
 from app.services.session_service import session_service
 from app.services.workspace_credential_service import workspace_credential_service
 from app.services.workspace_git_service import workspace_git_service
@@ -95,52 +101,67 @@ from app.services.user_workspace_preference_service import (
 router = APIRouter()
 logger = logging.getLogger(__name__)
 _run_tasks: dict[str, asyncio.Task[None]] = {}
+_run_start_locks: dict[str, tuple[threading.Lock, int]] = {}
+_run_start_locks_guard = threading.Lock()
 _WORKSPACE_WRITE_TOOLS = {"write", "edit", "multiedit", "notebookedit"}
+_SESSION_LIST_ADAPTER = TypeAdapter(SessionListResponse)
+
+
+@contextmanager
+def _session_run_start_lock(session_id: str) -> Iterator[None]:
+    """按会话串行化“检查运行中 run → 创建 run”。
+
+    说明：
+    - 不同会话互不阻塞，只有同一会话的并发发送会排队。
+    - 锁带引用计数，最后一个持有者退出时即从表中移除，表大小不随会话数增长。
+    """
+    with _run_start_locks_guard:
+        lock, holders = _run_start_locks.get(session_id, (None, 0))
+        if lock is None:
+            lock = threading.Lock()
+        _run_start_locks[session_id] = (lock, holders + 1)
+    try:
+        with lock:
+            yield
+    finally:
+        with _run_start_locks_guard:
+            _, holders = _run_start_locks[session_id]
+            if holders <= 1:
+                del _run_start_locks[session_id]
+            else:
+                _run_start_locks[session_id] = (lock, holders - 1)
 
 
-@router.get("/auth/bootstrap-status", response_model=BootstrapStatusResponse)
-def bootstrap_status() -> BootstrapStatusResponse:
-    return BootstrapStatusResponse(requires_setup=auth_service.requires_bootstrap())
+# 以下只读接口的返回值完全由服务层可信数据拼装：跳过 response_model 的二次校验与序列化，
+# 直接由 orjson 输出；responses 中保留模型声明，OpenAPI 文档不变。
+@router.get(
+    "/auth/bootstrap-status",
+    responses={200: {"model": BootstrapStatusResponse}},
+)
+def bootstrap_status() -> ORJSONResponse:
+    return ORJSONResponse({"requires_setup": auth_service.requires_bootstrap()})
 
 
 @router.post("/auth/bootstrap", response_model=UserResponse)
-def bootstrap(body: BootstrapRequest) -> UserResponse:
+def bootstrap(body: BootstrapRequest) -> dict[str, Any]:
     user = auth_service.bootstrap_superadmin(body.username, body.password)
-    return UserResponse(
-        id=user.id,
-        username=user.username,
-        display_name=user.display_name,
-        role=user.role,
-        created_at=user.created_at,
-        created_by=user.created_by,
-        has_local_password=user.has_local_password,
-        accessible_workspaces=[],
-    )
+    return _user_payload(user, [])
 
 
 @router.post("/auth/login", response_model=LoginResponse)
-def login(body: LoginRequest) -> LoginResponse:
+def login(body: LoginRequest) -> dict[str, Any]:
     token, user = auth_service.login(body.username, body.password)
     accessible = auth_service.get_accessible_workspaces(user)
-    return LoginResponse(
-        token=token,
-        user=UserResponse(
-            id=user.id,
-            username=user.username,
-            display_name=user.display_name,
-            role=user.role,
-            created_at=user.created_at,
-            created_by=user.created_by,
-            has_local_password=user.has_local_password,
-            accessible_workspaces=accessible,
-        ),
-    )
-
-
-@router.get("/auth/feishu/status", response_model=FeishuStatusResponse)
-def feishu_status() -> FeishuStatusResponse:
+    return {"token": token, "user": _user_payload(user, accessible)}
+
+
+@router.get(
+    "/auth/feishu/status",
+    responses={200: {"model": FeishuStatusResponse}},
+)
+def feishu_status() -> ORJSONResponse:
     status = feishu_settings_service.get_public_status()
-    return FeishuStatusResponse(enabled=status.enabled, app_id=status.app_id)
+    return ORJSONResponse({"enabled": status.enabled, "app_id": status.app_id})
 
 
 @router.get(
@@ -160,7 +181,7 @@ def feishu_authorize_url(
 
 
 @router.post("/auth/feishu/login", response_model=LoginResponse)
-def feishu_login(body: FeishuLoginRequest) -> LoginResponse:
+def feishu_login(body: FeishuLoginRequest) -> dict[str, Any]:
     config = feishu_settings_service.assert_login_enabled()
     user_access_token = feishu_auth_service.exchange_code_v2(
         base_url=config.base_url,
@@ -181,34 +202,13 @@ def feishu_login(body: FeishuLoginRequest) -> LoginResponse:
         default_workspace_names=config.default_workspace_names,
     )
     accessible = auth_service.get_accessible_workspaces(user)
-    return LoginResponse(
-        token=token,
-        user=UserResponse(
-            id=user.id,
-            username=user.username,
-            display_name=user.display_name,
-            role=user.role,
-            created_at=user.created_at,
-            created_by=user.created_by,
-            has_local_password=user.has_local_password,
-            accessible_workspaces=accessible,
-        ),
-    )
-
-
-@router.get("/auth/me", response_model=UserResponse)
-def get_me(current_user: AuthUser = Depends(get_current_user)) -> UserResponse:
+    return {"token": token, "user": _user_payload(user, accessible)}
+
+
+@router.get("/auth/me", responses={200: {"model": UserResponse}})
+def get_me(current_user: AuthUser = Depends(get_current_user)) -> ORJSONResponse:
     accessible = auth_service.get_accessible_workspaces(current_user)
-    return UserResponse(
-        id=current_user.id,
-        username=current_user.username,
-        display_name=current_user.display_name,
-        role=current_user.role,
-        created_at=current_user.created_at,
-        created_by=current_user.created_by,
-        has_local_password=current_user.has_local_password,
-        accessible_workspaces=accessible,
-    )
+    return ORJSONResponse(_user_payload(current_user, accessible))
 
 
 @router.post("/auth/password/set")
@@ -223,32 +223,18 @@ def set_local_password(
     return {"status": "ok"}
 
 
-@router.get("/users", response_model=UserListResponse)
-def list_users(current_user: AuthUser = Depends(get_current_user)) -> UserListResponse:
+@router.get("/users", responses={200: {"model": UserListResponse}})
+def list_users(current_user: AuthUser = Depends(get_current_user)) -> ORJSONResponse:
     users = auth_service.list_users(current_user)
-    return UserListResponse(
-        items=[
-            UserResponse(
-                id=user.id,
-                username=user.username,
-                display_name=user.display_name,
-                role=user.role,
-                created_at=user.created_at,
-                created_by=user.created_by,
-                has_local_password=user.has_local_password,
-                accessible_workspaces=user.accessible_workspaces or [],
-            )
-            for user in users
-        ]
+    return ORJSONResponse(
+        {"items": [_user_payload(user, user.accessible_workspaces or []) for user in users]}
     )
 
 
 @router.get("/admin/feishu/settings", response_model=FeishuSettingsItem)
 def get_feishu_settings(
-    current_user: AuthUser = Depends(get_current_user),
+    current_user: AuthUser = Depends(require_superadmin),
 ) -> FeishuSettingsItem:
-    if current_user.role != "superadmin":
-        raise AuthForbiddenError()
     item = feishu_settings_service.get_settings_view()
     return FeishuSettingsItem(
         enabled=item.enabled,
@@ -262,10 +248,8 @@ def get_feishu_settings(
 @router.put("/admin/feishu/settings", response_model=FeishuSettingsItem)
 def update_feishu_settings(
     body: UpdateFeishuSettingsRequest,
-    current_user: AuthUser = Depends(get_current_user),
+    current_user: AuthUser = Depends(require_superadmin),
 ) -> FeishuSettingsItem:
-    if current_user.role != "superadmin":
-        raise AuthForbiddenError()
     item = feishu_settings_service.update_settings(
         enabled=body.enabled,
         app_id=body.app_id,
@@ -286,7 +270,7 @@ def update_feishu_settings(
 def create_user(
     body: CreateUserRequest,
     current_user: AuthUser = Depends(get_current_user),
-) -> UserResponse:
+) -> dict[str, Any]:
     normalized = sorted(set(body.workspace_names))
     normalized_ids: list[str] = []
     for workspace in normalized:
@@ -306,16 +290,7 @@ def create_user(
         role=body.role,
         workspace_names=sorted(set(normalized_ids)),
     )
-    return UserResponse(
-        id=user.id,
-        username=user.username,
-        display_name=user.display_name,
-        role=user.role,
-        created_at=user.created_at,
-        created_by=user.created_by,
-        has_local_password=user.has_local_password,
-        accessible_workspaces=user.accessible_workspaces or [],
-    )
+    return _user_payload(user, user.accessible_workspaces or [])
 
 
 @router.put("/users/{user_id}/role", response_model=UserResponse)
@@ -323,24 +298,14 @@ def update_user_role(
     user_id: int,
     body: UpdateUserRoleRequest,
     current_user: AuthUser = Depends(get_current_user),
-) -> UserResponse:
+) -> dict[str, Any]:
     target = auth_service.set_user_role(
         current_user=current_user,
         user_id=user_id,
         role=body.role,
     )
-    users = auth_service.list_users(current_user)
-    enriched = next((item for item in users if item.id == user_id), target)
-    return UserResponse(
-        id=enriched.id,
-        username=enriched.username,
-        display_name=enriched.display_name,
-        role=enriched.role,
-        created_at=enriched.created_at,
-        created_by=enriched.created_by,
-        has_local_password=enriched.has_local_password,
-        accessible_workspaces=enriched.accessible_workspaces or [],
-    )
+    enriched = auth_service.get_user(current_user, user_id) or target
+    return _user_payload(enriched, enriched.accessible_workspaces or [])
 
 
 @router.put("/users/{user_id}/workspaces", response_model=UserResponse)
@@ -348,7 +313,7 @@ def update_user_workspaces(
     user_id: int,
     body: UpdateUserWorkspaceAccessRequest,
     current_user: AuthUser = Depends(get_current_user),
-) -> UserResponse:
+) -> dict[str, Any]:
     normalized = sorted(set(body.workspace_names))
     normalized_ids: list[str] = []
     for workspace in normalized:
@@ -366,20 +331,10 @@ def update_user_workspaces(
         user_id=user_id,
         workspace_names=sorted(set(normalized_ids)),
     )
-    users = auth_service.list_users(current_user)
-    target = next((item for item in users if item.id == user_id), None)
+    target = auth_service.get_user(current_user, user_id)
     if target is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return UserResponse(
-        id=target.id,
-        username=target.username,
-        display_name=target.display_name,
-        role=target.role,
-        created_at=target.created_at,
-        created_by=target.created_by,
-        has_local_password=target.has_local_password,
-        accessible_workspaces=[] if target.role == "superadmin" else accessible,
-    )
+    return _user_payload(target, [] if target.role == "superadmin" else accessible)
 
 
 @router.delete("/users/{user_id}", response_model=DeleteUserResponse)
@@ -390,7 +345,7 @@ def delete_user(
     auth_service.delete_user(current_user=current_user, user_id=user_id)
     return DeleteUserResponse(
         user_id=user_id,
-        deleted_at=datetime.now(timezone.utc).isoformat(),
+        deleted_at=utc_now_isoformat(),
     )
 
 
@@ -408,28 +363,30 @@ def admin_reset_user_password(
     return {"status": "ok"}
 
 
-@router.get("/llm-configs", response_model=LlmConfigListResponse)
+@router.get("/llm-configs", responses={200: {"model": LlmConfigListResponse}})
 def list_llm_configs(
     current_user: AuthUser = Depends(get_current_user),
-) -> LlmConfigListResponse:
+) -> ORJSONResponse:
     items = llm_config_service.list_configs(current_user)
-    return LlmConfigListResponse(
-        items=[
-            LlmConfigItem(
-                id=item.id,
-                name=item.name,
-                base_url=item.base_url,
-                has_auth_token=bool(item.auth_token),
-                model=item.model,
-                default_sonnet_model=item.default_sonnet_model,
-                default_haiku_model=item.default_haiku_model,
-                default_opus_model=item.default_opus_model,
-                is_active=item.is_active,
-                created_at=item.created_at,
-                updated_at=item.updated_at,
-            )
-            for item in items
-        ]
+    return ORJSONResponse(
+        {
+            "items": [
+                {
+                    "id": item.id,
+                    "name": item.name,
+                    "base_url": item.base_url,
+                    "has_auth_token": bool(item.auth_token),
+                    "model": item.model,
+                    "default_sonnet_model": item.default_sonnet_model,
+                    "default_haiku_model": item.default_haiku_model,
+                    "default_opus_model": item.default_opus_model,
+                    "is_active": item.is_active,
+                    "created_at": item.created_at,
+                    "updated_at": item.updated_at,
+                }
+                for item in items
+            ]
+        }
     )
 
 
@@ -525,13 +482,15 @@ def delete_llm_config(
     return {"status": "ok"}
 
 
-@router.get("/workspaces", response_model=WorkspaceListResponse)
+@router.get("/workspaces", responses={200: {"model": WorkspaceListResponse}})
 def list_workspaces(
     current_user: AuthUser = Depends(get_current_user),
-) -> WorkspaceListResponse:
-    accessible = auth_service.get_accessible_workspaces(current_user)
-    allowed = None if current_user.role in {"superadmin", "admin"} else set(accessible)
-    return WorkspaceListResponse(items=workspace_service.list_workspaces(allowed))
+) -> Response:
+    allowed = auth_service.get_accessible_workspace_set(current_user)
+    # 服务层返回的已是 WorkspaceItem 实例，直接由 pydantic-core 序列化为 JSON 字节，
+    # 省去 response_model 的重新校验与 dict 中转。
+    payload = WorkspaceListResponse(items=workspace_service.list_workspaces(allowed))
+    return Response(content=payload.model_dump_json(), media_type="application/json")
 
 
 @router.get(
@@ -571,10 +530,8 @@ def update_user_workspace_preferences(
     response_model=WorkspaceAutoPullSettingsItem,
 )
 def get_workspace_auto_pull_settings(
-    current_user: AuthUser = Depends(get_current_user),
+    current_user: AuthUser = Depends(require_superadmin),
 ) -> WorkspaceAutoPullSettingsItem:
-    if current_user.role != "superadmin":
-        raise AuthForbiddenError()
     item = workspace_auto_pull_service.get_settings()
     return WorkspaceAutoPullSettingsItem(
         enabled=item.enabled,
@@ -592,10 +549,8 @@ def get_workspace_auto_pull_settings(
 )
 def update_workspace_auto_pull_settings(
     body: UpdateWorkspaceAutoPullSettingsRequest,
-    current_user: AuthUser = Depends(get_current_user),
+    current_user: AuthUser = Depends(require_superadmin),
 ) -> WorkspaceAutoPullSettingsItem:
-    if current_user.role != "superadmin":
-        raise AuthForbiddenError()
     item = workspace_auto_pull_service.update_settings(
         enabled=body.enabled,
         interval_minutes=body.interval_minutes,
@@ -645,48 +600,39 @@ def create_workspace(
         note_item = workspace_note_service.upsert_note(
             workspace=item.workspace_id,
             note=normalized_note or None,
-            updated_at=datetime.now(timezone.utc).isoformat(),
+            updated_at=utc_now_isoformat(),
         )
         item.note = note_item.note
     if body.tags:
         tags_item = workspace_tag_service.replace_tags(
             workspace=item.workspace_id,
             tags=body.tags,
-            updated_at=datetime.now(timezone.utc).isoformat(),
+            updated_at=utc_now_isoformat(),
         )
         item.tags = tags_item.tags
     return item
 
 
 @router.delete("/workspaces/{workspace}", response_model=WorkspaceDeleteResponse)
-def delete_workspace(
+async def delete_workspace(
     workspace: str,
     current_user: AuthUser = Depends(get_current_user),
 ) -> WorkspaceDeleteResponse:
-    meta = workspace_service.get_workspace_meta(workspace)
+    meta = await asyncio.to_thread(workspace_service.get_workspace_meta, workspace)
     if meta.mode == "team" and current_user.role != "superadmin":
         raise AuthForbiddenError()
     if meta.mode == "personal":
         if current_user.role != "superadmin" and meta.owner_user_id != current_user.id:
             raise AuthForbiddenError()
 
-    result = workspace_service.delete_workspace(workspace)
-    removed_sessions = (
-        session_service.delete_workspace_sessions(meta.workspace_id)
-        + session_service.delete_workspace_sessions(meta.workspace_name)
-    )
-    workspace_credential_service.delete_workspace_credential(meta.workspace_id)
-    workspace_credential_service.delete_workspace_credential(meta.workspace_name)
-    workspace_git_service.delete_sync_meta(meta.workspace_id)
-    workspace_git_service.delete_sync_meta(meta.workspace_name)
-    workspace_note_service.delete_note(meta.workspace_id)
-    workspace_note_service.delete_note(meta.workspace_name)
-    workspace_tag_service.delete_tags(meta.workspace_id)
-    workspace_tag_service.delete_tags(meta.workspace_name)
-    # 同时按 workspace_id 与 workspace_name 清理 ACL，避免注册表删除后遗留脏授权。
-    # 否则会出现 can_access_workspace=True 但 resolve_workspace_reference=not found 的异常状态。
-    auth_service.remove_workspace_access_for_all_users(meta.workspace_id)
-    auth_service.remove_workspace_access_for_all_users(meta.workspace_name)
+    # 先删除工作区本身，失败时不触碰任何关联数据。
+    result = await asyncio.to_thread(workspace_service.delete_workspace, workspace)
+    # 会话文件清理与数据库记录清理互不依赖，并发执行；
+    # 数据库记录共用同一个 SQLite 文件，放在同一线程内顺序执行以免写锁争用。
+    removed_sessions, _ = await asyncio.gather(
+        asyncio.to_thread(_delete_workspace_sessions, meta),
+        asyncio.to_thread(_delete_workspace_records, meta),
+    )
 
     return WorkspaceDeleteResponse(
         workspace=workspace,
@@ -695,6 +641,23 @@ def delete_workspace(
     )
 
 
+def _delete_workspace_sessions(meta) -> int:
+    return session_service.delete_workspace_sessions(
+        meta.workspace_id
+    ) + session_service.delete_workspace_sessions(meta.workspace_name)
+
+
+def _delete_workspace_records(meta) -> None:
+    for key in (meta.workspace_id, meta.workspace_name):
+        workspace_credential_service.delete_workspace_credential(key)
+        workspace_git_service.delete_sync_meta(key)
+        workspace_note_service.delete_note(key)
+        workspace_tag_service.delete_tags(key)
+        # 同时按 workspace_id 与 workspace_name 清理 ACL，避免注册表删除后遗留脏授权。
+        # 否则会出现 can_access_workspace=True 但 resolve_workspace_reference=not found 的异常状态。
+        auth_service.remove_workspace_access_for_all_users(key)
+
+
 @router.get("/workspaces/{workspace}/credential", response_model=WorkspaceCredentialItem)
 def get_workspace_credential(
     workspace: str,
@@ -734,7 +697,7 @@ def update_workspace_note(
         if current_user.role != "superadmin" and meta.owner_user_id != current_user.id:
             raise AuthForbiddenError()
     workspace_service.get_workspace_path(meta.workspace_id)
-    updated_at = datetime.now(timezone.utc).isoformat()
+    updated_at = utc_now_isoformat()
     item = workspace_note_service.upsert_note(
         workspace=meta.workspace_id,
         note=body.note,
@@ -760,7 +723,7 @@ def update_workspace_tags(
         if current_user.role != "superadmin" and meta.owner_user_id != current_user.id:
             raise AuthForbiddenError()
     workspace_service.get_workspace_path(meta.workspace_id)
-    updated_at = datetime.now(timezone.utc).isoformat()
+    updated_at = utc_now_isoformat()
     item = workspace_tag_service.replace_tags(
         workspace=meta.workspace_id,
         tags=body.tags,
@@ -852,16 +815,33 @@ async def upload_workspace_skill(
     file: UploadFile = File(...),
     current_user: AuthUser = Depends(get_current_user),
 ) -> WorkspaceAgentProfileItem:
-    meta, workspace_path = _require_personal_workspace_manage_access(
+    meta, workspace_path = await asyncio.to_thread(
+        _require_personal_workspace_manage_access,
         workspace,
         current_user,
     )
     raw = await file.read()
-    workspace_agent_profile_service.upload_skill(
-        workspace_path=workspace_path,
+    return await asyncio.to_thread(
+        _upload_workspace_skill,
+        meta,
+        workspace_path,
         filename=file.filename or "",
         content=raw,
     )
+
+
+def _upload_workspace_skill(
+    meta,
+    workspace_path,
+    *,
+    filename: str,
+    content: bytes,
+) -> WorkspaceAgentProfileItem:
+    workspace_agent_profile_service.upload_skill(
+        workspace_path=workspace_path,
+        filename=filename,
+        content=content,
+    )
     profile = workspace_agent_profile_service.get_profile(meta.workspace_id)
     skills = workspace_agent_profile_service.list_skills(workspace_path)
     return _to_workspace_agent_profile_item(meta, profile, skills)
@@ -889,43 +869,60 @@ def delete_workspace_skill(
     return _to_workspace_agent_profile_item(meta, profile, skills)
 
 
-@router.get("/workspaces/{workspace}/markdown-index", response_model=MarkdownIndexResponse)
+@router.get(
+    "/workspaces/{workspace}/markdown-index",
+    responses={200: {"model": MarkdownIndexResponse}},
+)
 def get_workspace_markdown_index(
     workspace: str,
     current_user: AuthUser = Depends(get_current_user),
-) -> MarkdownIndexResponse:
+) -> ORJSONResponse:
     workspace_path = _require_workspace_access(workspace, current_user)
     nodes = markdown_service.build_index(workspace=workspace, workspace_path=workspace_path)
-    return MarkdownIndexResponse(
-        workspace=workspace,
-        generated_at=datetime.now(timezone.utc).isoformat(),
-        items=[_to_markdown_node_item(node) for node in nodes],
+    # 索引节点 dataclass 的字段与 MarkdownNodeItem/FileNodeItem 一一对应，orjson 原生序列化
+    # dataclass，整棵树的遍历与编码在一次原生调用内完成，不再先递归构造 dict。
+    return ORJSONResponse(
+        {
+            "workspace": workspace,
+            "generated_at": utc_now_isoformat(),
+            "items": nodes,
+        }
     )
 
 
-@router.get("/workspaces/{workspace}/file-index", response_model=FileIndexResponse)
+@router.get(
+    "/workspaces/{workspace}/file-index",
+    responses={200: {"model": FileIndexResponse}},
+)
 def get_workspace_file_index(
     workspace: str,
     current_user: AuthUser = Depends(get_current_user),
-) -> FileIndexResponse:
+) -> ORJSONResponse:
     """
     个人工作空间文件索引（新文件预览功能使用）。
     """
     _, workspace_path = _require_personal_workspace_manage_access(workspace, current_user)
     nodes = file_preview_service.build_index(workspace_path=workspace_path)
-    return FileIndexResponse(
-        workspace=workspace,
-        generated_at=datetime.now(timezone.utc).isoformat(),
-        items=[_to_file_node_item(node) for node in nodes],
+    return ORJSONResponse(
+        {
+            "workspace": workspace,
+            "generated_at": utc_now_isoformat(),
+            "items": nodes,
+        }
     )
 
 
-@router.get("/workspaces/{workspace}/file-content", response_model=FileContentResponse)
+# 文件/Markdown 正文可达数 MB：服务层数据可信，跳过 response_model 对大字符串的二次校验
+# 与序列化，直接由 orjson 输出；responses 中保留模型声明，OpenAPI 文档不变。
+@router.get(
+    "/workspaces/{workspace}/file-content",
+    responses={200: {"model": FileContentResponse}},
+)
 def get_workspace_file_content(
     workspace: str,
     path: str,
     current_user: AuthUser = Depends(get_current_user),
-) -> FileContentResponse:
+) -> ORJSONResponse:
     """
     个人工作空间文件内容读取，支持 markdown/code/text/binary 识别。
     """
@@ -938,16 +935,18 @@ def get_workspace_file_content(
         max_bytes=settings_value.kb_file_max_bytes,
         max_lines=settings_value.kb_read_max_lines,
     )
-    return FileContentResponse(
-        workspace=content.workspace,
-        path=content.path,
-        name=content.name,
-        size=content.size,
-        mtime=content.mtime,
-        content_type=content.content_type,
-        content=content.content,
-        is_binary=content.is_binary,
-        truncated=content.truncated,
+    return ORJSONResponse(
+        {
+            "workspace": content.workspace,
+            "path": content.path,
+            "name": content.name,
+            "size": content.size,
+            "mtime": content.mtime,
+            "content_type": content.content_type,
+            "content": content.content,
+            "is_binary": content.is_binary,
+            "truncated": content.truncated,
+        }
     )
 
 
@@ -974,26 +973,28 @@ def download_workspace_file(
 
 @router.get(
     "/workspaces/{workspace}/markdown-content",
-    response_model=MarkdownContentResponse,
+    responses={200: {"model": MarkdownContentResponse}},
 )
 def get_workspace_markdown_content(
     workspace: str,
     path: str,
     current_user: AuthUser = Depends(get_current_user),
-) -> MarkdownContentResponse:
+) -> ORJSONResponse:
     workspace_path = _require_workspace_access(workspace, current_user)
     content = markdown_service.read_markdown_content(
         workspace=workspace,
         workspace_path=workspace_path,
         relative_path=path,
     )
-    return MarkdownContentResponse(
-        workspace=content.workspace,
-        path=content.path,
-        name=content.name,
-        size=content.size,
-        mtime=content.mtime,
-        content=content.content,
+    return ORJSONResponse(
+        {
+            "workspace": content.workspace,
+            "path": content.path,
+            "name": content.name,
+            "size": content.size,
+            "mtime": content.mtime,
+            "content": content.content,
+        }
     )
 
 
@@ -1069,55 +1070,25 @@ def create_personal_agent_session(
     )
 
 
-@router.get("/workspaces/{workspace}/sessions", response_model=SessionListResponse)
+@router.get("/workspaces/{workspace}/sessions", responses={200: {"model": SessionListResponse}})
 def list_workspace_sessions(
     workspace: str,
     current_user: AuthUser = Depends(get_current_user),
-) -> SessionListResponse:
+) -> Response:
     _require_workspace_access(workspace, current_user)
     sessions = session_service.list_workspace_sessions(
         user_id=current_user.id,
         workspace=workspace,
     )
-    return SessionListResponse(
-        items=[
-            SessionSummaryItem(
-                session_id=session.session_id,
-                workspace=session.workspace,
-                scope=session.scope,
-                created_at=session.created_at,
-                updated_at=session.updated_at,
-                message_count=len(session.messages),
-                last_message_preview=session.messages[-1].text[:120]
-                if session.messages
-                else "",
-            )
-            for session in sessions
-        ]
-    )
+    return _session_list_response(sessions)
 
 
-@router.get("/personal-agent/sessions", response_model=SessionListResponse)
+@router.get("/personal-agent/sessions", responses={200: {"model": SessionListResponse}})
 def list_personal_agent_sessions(
     current_user: AuthUser = Depends(get_current_user),
-) -> SessionListResponse:
+) -> Response:
     sessions = session_service.list_personal_agent_sessions(user_id=current_user.id)
-    return SessionListResponse(
-        items=[
-            SessionSummaryItem(
-                session_id=session.session_id,
-                workspace=session.workspace,
-                scope=session.scope,
-                created_at=session.created_at,
-                updated_at=session.updated_at,
-                message_count=len(session.messages),
-                last_message_preview=session.messages[-1].text[:120]
-                if session.messages
-                else "",
-            )
-            for session in sessions
-        ]
-    )
+    return _session_list_response(sessions)
 
 
 @router.get("/workspaces/{workspace}/sessions/latest", response_model=SessionSummaryItem)
@@ -1161,26 +1132,26 @@ def get_latest_personal_agent_session(
     )
 
 
-@router.get("/sessions/{session_id}", response_model=SessionDetailResponse)
+@router.get("/sessions/{session_id}", responses={200: {"model": SessionDetailResponse}})
 def get_session_detail(
     session_id: str,
     current_user: AuthUser = Depends(get_current_user),
-) -> SessionDetailResponse:
+) -> Response:
     session = session_service.get_session(session_id, user_id=current_user.id)
-    messages = session_service.list_messages(session_id, user_id=current_user.id)
-    return SessionDetailResponse(
-        session_id=session.session_id,
-        workspace=session.workspace,
-        scope=session.scope,
-        created_at=session.created_at,
-        messages=[
-            SessionMessageItem(
-                role=message.role,
-                text=message.text,
-                created_at=message.created_at,
-            )
-            for message in messages
-        ],
+    payload = {
+        "session_id": session.session_id,
+        "workspace": session.workspace,
+        "scope": session.scope,
+        "created_at": session.created_at,
+        # SessionMessage 字段与 SessionMessageItem 一致，orjson 原生序列化 dataclass，
+        # 消息列表一次遍历写出，无需复制列表或逐条构造 dict。
+        "messages": session.messages,
+    }
+    # 长会话逐条构造 SessionMessageItem 的校验开销随消息数线性增长；这里直接交给 orjson，
+    # OPT_UTC_Z 让 UTC 时间与 pydantic 输出一致（以 Z 结尾）。
+    return Response(
+        content=orjson.dumps(payload, option=orjson.OPT_UTC_Z),
+        media_type="application/json",
     )
 
 
@@ -1210,11 +1181,25 @@ def delete_session(
         session_id=session.session_id,
         workspace=session.workspace,
         scope=session.scope,
-        deleted_at=datetime.now(timezone.utc).isoformat(),
+        deleted_at=utc_now_isoformat(),
         removed_runs=removed_runs,
     )
 
 
+def _user_payload(user: AuthUser, accessible_workspaces: list[str]) -> dict[str, Any]:
+    """UserResponse 的字段映射，登录、账号管理与 /auth/me 共用。"""
+    return {
+        "id": user.id,
+        "username": user.username,
+        "display_name": user.display_name,
+        "role": user.role,
+        "created_at": user.created_at,
+        "created_by": user.created_by,
+        "has_local_password": user.has_local_password,
+        "accessible_workspaces": accessible_workspaces,
+    }
+
+
 def _to_session_run_item(run) -> SessionRunItem:
     return SessionRunItem(
         run_id=run.run_id,
@@ -1255,15 +1240,20 @@ async def _execute_session_run(
 ) -> None:
     """
     在后台执行一次 run，并持续把中间输出写入事件日志。
+
+    说明：
+    - 事件日志与 run 状态均为同步磁盘读写，逐块写入时放到线程池，避免流式输出期间阻塞事件循环。
     """
-    session_run_service.set_run_status(
+    await asyncio.to_thread(
+        session_run_service.set_run_status,
         session_id=session_id,
         run_id=run_id,
         user_id=user_id,
         status="running",
     )
 
-    chunks: list[str] = []
+    # 回答正文按 UTF-8 累积在单个 bytearray 中，长回答不再堆积成千上万个小 str 对象。
+    answer_buf = bytearray()
     has_workspace_change = False
     try:
         async for event in stream_agent_response(
@@ -1290,12 +1280,13 @@ async def _execute_session_run(
             normalized_title = title if isinstance(title, str) else None
             normalized_message = message if isinstance(message, str) else None
             if event_type == "chunk" and normalized_data:
-                chunks.append(normalized_data)
+                answer_buf += normalized_data.encode()
             if event_type == "tool":
                 tool_name = _extract_tool_name_from_title(normalized_title)
                 if tool_name is not None and tool_name.lower() in _WORKSPACE_WRITE_TOOLS:
                     has_workspace_change = True
-            session_run_service.append_event(
+            await asyncio.to_thread(
+                session_run_service.append_event,
                 session_id=session_id,
                 run_id=run_id,
                 user_id=user_id,
@@ -1305,7 +1296,8 @@ async def _execute_session_run(
                 message=normalized_message,
             )
         if has_workspace_change:
-            session_run_service.append_event(
+            await asyncio.to_thread(
+                session_run_service.append_event,
                 session_id=session_id,
                 run_id=run_id,
                 user_id=user_id,
@@ -1313,14 +1305,16 @@ async def _execute_session_run(
                 data=workspace,
                 message="workspace changed by agent tools",
             )
-        session_run_service.append_event(
+        await asyncio.to_thread(
+            session_run_service.append_event,
             session_id=session_id,
             run_id=run_id,
             user_id=user_id,
             event_type="done",
             message="completed",
         )
-        session_run_service.set_run_status(
+        await asyncio.to_thread(
+            session_run_service.set_run_status,
             session_id=session_id,
             run_id=run_id,
             user_id=user_id,
@@ -1338,14 +1332,16 @@ async def _execute_session_run(
             run_id,
             user_id,
         )
-        session_run_service.append_event(
+        await asyncio.to_thread(
+            session_run_service.append_event,
             session_id=session_id,
             run_id=run_id,
             user_id=user_id,
             event_type="error",
             message=reason,
         )
-        session_run_service.set_run_status(
+        await asyncio.to_thread(
+            session_run_service.set_run_status,
             session_id=session_id,
             run_id=run_id,
             user_id=user_id,
@@ -1353,9 +1349,10 @@ async def _execute_session_run(
             error_message=reason,
         )
     finally:
-        answer = "".join(chunks)
+        answer = answer_buf.decode()
         if answer:
-            session_service.append_message(
+            await asyncio.to_thread(
+                session_service.append_message,
                 session_id=session_id,
                 user_id=user_id,
                 role="assistant",
@@ -1369,6 +1366,25 @@ async def send_message(
     body: SendMessageRequest,
     current_user: AuthUser = Depends(get_current_user),
 ) -> SessionRunResponse:
+    # 会话/配置读取与 run 落盘都是阻塞 I/O，统一放到线程池一次完成，避免阻塞事件循环。
+    run, run_kwargs = await asyncio.to_thread(
+        _prepare_session_run,
+        session_id,
+        body.message,
+        current_user,
+    )
+    task = asyncio.create_task(
+        _execute_session_run(**run_kwargs),
+        name=f"session-run-{run.run_id}",
+    )
+    _register_background_task(run.run_id, task)
+    return SessionRunResponse(item=_to_session_run_item(run))
+
+
+def _prepare_session_run(session_id: str, message: str, current_user: AuthUser):
+    """
+    校验会话与运行配置，写入用户消息并创建 run，返回 run 及后台执行参数。
+    """
     session = session_service.get_session(session_id, user_id=current_user.id)
     runtime_env = llm_config_service.get_active_env()
     runtime_auth = (
@@ -1437,47 +1453,44 @@ async def send_message(
         user_id=current_user.id,
         workspace_path=workspace_path,
     )
-    running = session_run_service.get_latest_running_run(
-        session_id=session_id,
-        user_id=current_user.id,
-    )
-    if running is not None:
-        raise AppError(
-            code="SESSION_RUN_IN_PROGRESS",
-            message="Another run is still in progress for this session",
-            details={"session_id": session_id, "run_id": running.run_id},
-            status_code=409,
+    # 准备过程在线程池中执行：“检查运行中 run → 创建 run”需要按会话加锁，避免并发请求重复启动。
+    with _session_run_start_lock(session_id):
+        running = session_run_service.get_latest_running_run(
+            session_id=session_id,
+            user_id=current_user.id,
+        )
+        if running is not None:
+            raise AppError(
+                code="SESSION_RUN_IN_PROGRESS",
+                message="Another run is still in progress for this session",
+                details={"session_id": session_id, "run_id": running.run_id},
+                status_code=409,
+            )
+        session_service.append_message(
+            session_id,
+            user_id=current_user.id,
+            role="user",
+            text=message,
         )
-    session_service.append_message(
-        session_id,
-        user_id=current_user.id,
-        role="user",
-        text=body.message,
-    )
 
-    run = session_run_service.create_run(
-        session_id=session_id,
-        user_id=current_user.id,
-        prompt=body.message,
-    )
-    task = asyncio.create_task(
-        _execute_session_run(
+        run = session_run_service.create_run(
             session_id=session_id,
-            run_id=run.run_id,
             user_id=current_user.id,
-            prompt=body.message,
-            workspace=workspace_key,
-            workspace_path=str(workspace_path),
-            workspace_mode=workspace_mode,
-            claude_session_id=session.claude_session_id,
-            runtime_env=runtime_env,
-            mcp_servers=workspace_mcp_servers,
-            allowed_tools=allowed_tools,
-        ),
-        name=f"session-run-{run.run_id}",
-    )
-    _register_background_task(run.run_id, task)
-    return SessionRunResponse(item=_to_session_run_item(run))
+            prompt=message,
+        )
+    return run, {
+        "session_id": session_id,
+        "run_id": run.run_id,
+        "user_id": current_user.id,
+        "prompt": message,
+        "workspace": workspace_key,
+        "workspace_path": str(workspace_path),
+        "workspace_mode": workspace_mode,
+        "claude_session_id": session.claude_session_id,
+        "runtime_env": runtime_env,
+        "mcp_servers": workspace_mcp_servers,
+        "allowed_tools": allowed_tools,
+    }
 
 
 @router.get(
@@ -1506,8 +1519,9 @@ async def stream_session_run(
     after_seq: int = 0,
     current_user: AuthUser = Depends(get_current_user),
 ) -> StreamingResponse:
-    session_service.get_session(session_id, user_id=current_user.id)
-    run = session_run_service.get_run(
+    # 会话与事件日志都在磁盘上，读取放到线程池，长连接的事件循环只负责推送。
+    run = await asyncio.to_thread(
+        _get_session_run,
         session_id=session_id,
         run_id=run_id,
         user_id=current_user.id,
@@ -1516,7 +1530,8 @@ async def stream_session_run(
     async def event_stream():
         # 先回放历史，确保刷新后可以无损恢复到最新可见状态。
         delivered_seq = after_seq
-        history = session_run_service.list_events_after(
+        history = await asyncio.to_thread(
+            session_run_service.list_events_after,
             session_id=session_id,
             run_id=run_id,
             user_id=current_user.id,
@@ -1524,15 +1539,7 @@ async def stream_session_run(
         )
         for item in history:
             delivered_seq = max(delivered_seq, item.seq)
-            payload = {
-                "seq": item.seq,
-                "type": item.type,
-                "created_at": item.created_at,
-                "data": item.data,
-                "title": item.title,
-                "message": item.message,
-            }
-            yield f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+            yield _sse_event(item)
 
         if run.status in TERMINAL_RUN_STATUS:
             return
@@ -1547,25 +1554,19 @@ async def stream_session_run(
                     if event.seq <= delivered_seq:
                         continue
                     delivered_seq = event.seq
-                    payload = {
-                        "seq": event.seq,
-                        "type": event.type,
-                        "created_at": event.created_at,
-                        "data": event.data,
-                        "title": event.title,
-                        "message": event.message,
-                    }
-                    yield f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+                    yield _sse_event(event)
                     if event.type in {"done", "error"}:
                         break
                 except asyncio.TimeoutError:
-                    latest = session_run_service.get_run(
+                    latest = await asyncio.to_thread(
+                        session_run_service.get_run,
                         session_id=session_id,
                         run_id=run_id,
                         user_id=current_user.id,
                     )
                     if latest.status in TERMINAL_RUN_STATUS:
-                        tail = session_run_service.list_events_after(
+                        tail = await asyncio.to_thread(
+                            session_run_service.list_events_after,
                             session_id=session_id,
                             run_id=run_id,
                             user_id=current_user.id,
@@ -1573,15 +1574,7 @@ async def stream_session_run(
                         )
                         for item in tail:
                             delivered_seq = max(delivered_seq, item.seq)
-                            payload = {
-                                "seq": item.seq,
-                                "type": item.type,
-                                "created_at": item.created_at,
-                                "data": item.data,
-                                "title": item.title,
-                                "message": item.message,
-                            }
-                            yield f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+                            yield _sse_event(item)
                         break
         finally:
             session_run_service.unsubscribe(run_id, queue)
@@ -1589,32 +1582,40 @@ async def stream_session_run(
     return StreamingResponse(event_stream(), media_type="text/event-stream")
 
 
-def _to_markdown_node_item(node) -> MarkdownNodeItem:
-    return MarkdownNodeItem(
-        type=node.type,
-        name=node.name,
-        path=node.path,
-        size=node.size,
-        mtime=node.mtime,
-        children=[_to_markdown_node_item(child) for child in node.children or []]
-        if node.children is not None
-        else None,
-    )
+def _sse_event(event: SessionRunEvent) -> bytes:
+    # 复用事件落盘时生成的 JSON 字节，推送时不再逐个订阅者重复序列化。
+    return b"data: " + event.json_bytes + b"\n\n"
 
 
-def _to_file_node_item(node) -> FileNodeItem:
-    return FileNodeItem(
-        type=node.type,
-        name=node.name,
-        path=node.path,
-        size=node.size,
-        mtime=node.mtime,
-        children=[_to_file_node_item(child) for child in node.children or []]
-        if node.children is not None
-        else None,
+def _get_session_run(*, session_id: str, run_id: str, user_id: int):
+    session_service.get_session(session_id, user_id=user_id)
+    return session_run_service.get_run(
+        session_id=session_id,
+        run_id=run_id,
+        user_id=user_id,
     )
 
 
+def _session_list_response(sessions) -> Response:
+    # 会话时间字段需按模型统一规范化；用常驻 TypeAdapter 单次校验后直接序列化为 JSON，
+    # 省去 response_model 的二次校验与 dict 中转。
+    payload = {"items": [_session_summary_payload(session) for session in sessions]}
+    content = _SESSION_LIST_ADAPTER.dump_json(_SESSION_LIST_ADAPTER.validate_python(payload))
+    return Response(content=content, media_type="application/json")
+
+
+def _session_summary_payload(session) -> dict[str, Any]:
+    return {
+        "session_id": session.session_id,
+        "workspace": session.workspace,
+        "scope": session.scope,
+        "created_at": session.created_at,
+        "updated_at": session.updated_at,
+        "message_count": len(session.messages),
+        "last_message_preview": session.messages[-1].text[:120] if session.messages else "",
+    }
+
+
 def _extract_tool_name_from_title(title: str | None) -> str | None:
     if title is None:
         return None
@@ -1723,13 +1724,9 @@ def _require_personal_workspace_manage_access(
 
 
 def _resolve_workspace_with_access(workspace: str, current_user: AuthUser):
-    if not auth_service.can_access_workspace(current_user, workspace):
-        raise AuthForbiddenError()
-    allowed_ids = None
-    # superadmin / admin 都拥有全工作空间访问权，此处不应再传入空的
+    # superadmin / admin 都拥有全工作空间访问权，此处返回 None 而不是空的
     # allowed_workspace_ids 集合，否则会把“可访问”错误收窄成“未找到”。
-    if current_user.role not in {"superadmin", "admin"}:
-        allowed_ids = set(auth_service.get_accessible_workspaces(current_user))
+    allowed_ids = auth_service.require_workspace_access(current_user, workspace)
     try:
         meta = workspace_service.resolve_workspace_reference(
             workspace,
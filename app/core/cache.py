@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, Generic, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+T = TypeVar("T")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    线程安全的进程内 TTL 缓存。
+
+    说明：
+    - 条目超过 ttl_seconds 即视为过期，读取时惰性清理。
+    - 超过 maxsize 时按最久未使用（LRU）淘汰，防止内存无界增长。
+    - 同步路由运行在线程池中，因此所有读写都在锁内完成。
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float) -> None:
+        self._maxsize = maxsize
+        self._ttl_seconds = ttl_seconds
+        self._items: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K, default: Any = None) -> V | Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._items[key]
+                return default
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key: K, value: V) -> None:
+        expires_at = time.monotonic() + self._ttl_seconds
+        with self._lock:
+            self._items[key] = (expires_at, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self._maxsize:
+                self._items.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+
+class SingleFlight:
+    """
+    合并同一 key 的并发异步调用。
+
+    说明：
+    - 同一 key 已有调用进行中时，后续调用直接等待并共享其结果（含异常）。
+    - 底层调用以独立 task 运行，某个等待方被取消不会中断其他等待方。
+    - 仅在单个事件循环内使用，不做跨线程同步。
+    """
+
+    def __init__(self) -> None:
+        self._pending: dict[Hashable, asyncio.Future[Any]] = {}
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._pending[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future[Any]) -> None:
+        if self._pending.get(key) is task:
+            del self._pending[key]
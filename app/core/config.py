@@ -1,7 +1,14 @@
 import os
+import re
 from dataclasses import dataclass
 from pathlib import Path
 
+# 一次扫描整个 .env 文本：可选 export 前缀、非注释的键、首个 `=` 之后的原始值。
+_DOTENV_LINE_RE = re.compile(
+    r"^[^\S\n]*(?!#)(?:export [^\S\n]*)?+([^\s=][^=\n]*?)[^\S\n]*=(.*)$",
+    re.MULTILINE,
+)
+
 
 def _load_local_dotenv() -> None:
     """
@@ -16,20 +23,15 @@ def _load_local_dotenv() -> None:
     if not env_file.exists():
         return
 
-    for raw_line in env_file.read_text(encoding="utf-8").splitlines():
-        line = raw_line.strip()
-        if not line or line.startswith("#"):
-            continue
-        if line.startswith("export "):
-            line = line[len("export ") :].strip()
-        if "=" not in line:
-            continue
-        key, value = line.split("=", 1)
-        key = key.strip()
-        value = value.strip().strip('"').strip("'")
-        if not key:
+    # 正则只认 `\n`：先按 str.splitlines 的全部行边界（含 `\r`、`\x0c`、`\u2028` 等）归一化。
+    text = "\n".join(env_file.read_text(encoding="utf-8").splitlines())
+    parsed: dict[str, str] = {}
+    for match in _DOTENV_LINE_RE.finditer(text):
+        key = match.group(1)
+        if key in parsed or key in os.environ:
             continue
-        os.environ.setdefault(key, value)
+        parsed[key] = match.group(2).strip().strip('"').strip("'")
+    os.environ.update(parsed)
 
 
 @dataclass(frozen=True)
@@ -1,13 +1,18 @@
+import functools
 import logging
 from typing import Any
 
+import orjson
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
 
 logger = logging.getLogger(__name__)
 
 
 class AppError(Exception):
+    # 属性存放在槽位中，错误路径上不再为每个实例分配 __dict__；子类只调用父类构造，无需重复声明。
+    __slots__ = ("code", "message", "details", "status_code")
+
     def __init__(self, code: str, message: str, details: Any = None, status_code: int = 400):
         super().__init__(message)
         self.code = code
@@ -152,9 +157,29 @@ def _error_payload(code: str, message: str, details: Any = None) -> dict[str, An
     }
 
 
+@functools.lru_cache(maxsize=512)
+def _error_body(code: str, message: str) -> bytes:
+    """
+    序列化不带 details 的错误响应体。
+
+    说明：
+    - 与 orjson.dumps(_error_payload(code, message)) 字节一致，按固定模板拼接外层结构。
+    - 鉴权失败、资源不存在等错误在扫描/暴力尝试下高频重复，按 (code, message) 缓存结果。
+    """
+    return b"".join(
+        (
+            b'{"error":{"code":',
+            orjson.dumps(code),
+            b',"message":',
+            orjson.dumps(message),
+            b',"details":null}}',
+        )
+    )
+
+
 def register_exception_handlers(app: FastAPI) -> None:
     @app.exception_handler(AppError)
-    async def _app_error_handler(request: Request, exc: AppError) -> JSONResponse:
+    async def _app_error_handler(request: Request, exc: AppError) -> Response:
         logger.warning(
             "AppError on %s %s: code=%s message=%s details=%s",
             request.method,
@@ -163,19 +188,25 @@ def register_exception_handlers(app: FastAPI) -> None:
             exc.message,
             exc.details,
         )
-        return JSONResponse(
+        if exc.details is None:
+            return Response(
+                content=_error_body(exc.code, exc.message),
+                status_code=exc.status_code,
+                media_type="application/json",
+            )
+        return ORJSONResponse(
             status_code=exc.status_code,
             content=_error_payload(exc.code, exc.message, exc.details),
         )
 
     @app.exception_handler(Exception)
-    async def _internal_error_handler(request: Request, exc: Exception) -> JSONResponse:
+    async def _internal_error_handler(request: Request, exc: Exception) -> ORJSONResponse:
         logger.exception(
             "Unhandled exception on %s %s",
             request.method,
             request.url.path,
         )
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content=_error_payload(
                 code="INTERNAL_SERVER_ERROR",
@@ -0,0 +1,44 @@
+import logging
+from logging.handlers import QueueHandler, QueueListener
+import queue
+import threading
+
+_lock = threading.Lock()
+_listener: QueueListener | None = None
+_original_handlers: list[logging.Handler] = []
+
+
+def start_queue_logging() -> None:
+    """
+    将根 logger 的输出改为入队，由单独的监听线程写入原有 handler。
+
+    说明：
+    - 异常处理器等请求路径上的日志只需一次入队，不再在事件循环里直接做流/文件 I/O。
+    - 根 logger 未配置 handler 时沿用 logging.lastResort，输出与级别过滤保持不变。
+    - 重复调用无副作用；配合 stop_queue_logging() 在应用关闭时写完剩余日志。
+    """
+    global _listener, _original_handlers
+    with _lock:
+        if _listener is not None:
+            return
+        root = logging.getLogger()
+        _original_handlers = list(root.handlers)
+        targets = _original_handlers or [logging.lastResort]
+        log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        listener = QueueListener(log_queue, *targets, respect_handler_level=True)
+        root.handlers = [QueueHandler(log_queue)]
+        listener.start()
+        _listener = listener
+
+
+def stop_queue_logging() -> None:
+    """停止监听线程并恢复根 logger 原有的 handler。"""
+    global _listener, _original_handlers
+    with _lock:
+        listener = _listener
+        if listener is None:
+            return
+        _listener = None
+        logging.getLogger().handlers = _original_handlers
+        _original_handlers = []
+    listener.stop()
@@ -0,0 +1,80 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+import sqlite3
+import threading
+
+# 语句缓存容量（默认 128）；auth 服务的固定 SQL 较多，放宽以免热点语句被挤出。
+_CACHED_STATEMENTS = 256
+
+
+class SQLiteConnectionPool:
+    """
+    按线程复用 sqlite3 连接。
+
+    说明：
+    - 每个线程保留一条空闲连接，省去每次调用的 connect/close 与页缓存重建。
+    - 归还时回滚未提交的事务并重置 row_factory，行为与“用完即关”的短连接一致。
+    - 同一线程内嵌套取用时另开一条连接，不与外层共享事务。
+    - 连接常驻，语句缓存随之保留：热点查询请保持 SQL 文本固定（参数走占位符），以命中已编译语句。
+    """
+
+    def __init__(self, db_path: str) -> None:
+        self._db_path = db_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._opened: list[sqlite3.Connection] = []
+        # close() 后递增；线程内缓存的旧代连接不再复用。
+        self._generation = 0
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        cached = getattr(self._local, "cached", None)
+        self._local.cached = None
+        if cached is not None and cached[0] == self._generation:
+            generation, conn = cached
+        else:
+            generation, conn = self._open()
+        try:
+            yield conn
+        finally:
+            self._release(generation, conn)
+
+    def close(self) -> None:
+        """关闭本池创建的全部连接（用于进程退出或测试清理）。"""
+        with self._lock:
+            self._generation += 1
+            opened, self._opened = self._opened, []
+        for conn in opened:
+            conn.close()
+
+    def _open(self) -> tuple[int, sqlite3.Connection]:
+        # 连接只在所属线程内使用；关闭 same-thread 检查仅为让 close() 能在其他线程回收。
+        conn = sqlite3.connect(
+            self._db_path,
+            check_same_thread=False,
+            cached_statements=_CACHED_STATEMENTS,
+        )
+        with self._lock:
+            self._opened.append(conn)
+            return self._generation, conn
+
+    def _release(self, generation: int, conn: sqlite3.Connection) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = None
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        if generation == self._generation and getattr(self._local, "cached", None) is None:
+            self._local.cached = (generation, conn)
+        else:
+            self._discard(conn)
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            try:
+                self._opened.remove(conn)
+            except ValueError:
+                pass
+        conn.close()
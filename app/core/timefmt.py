@@ -0,0 +1,28 @@
+import functools
+import time
+
+
+def utc_isoformat_ns(value_ns: int) -> str:
+    """
+    按 datetime.isoformat() 的 UTC 格式输出纳秒时间戳。
+
+    说明：
+    - 与 datetime.fromtimestamp(..., timezone.utc).isoformat() 结果一致（微秒为 0 时省略小数部分）。
+    - 整秒部分按秒缓存复用，避免每次构造 datetime 对象与时区换算。
+    """
+    seconds, remainder = divmod(value_ns, 1_000_000_000)
+    micros = remainder // 1000
+    if micros:
+        return f"{_utc_seconds_text(seconds)}.{micros:06d}+00:00"
+    return f"{_utc_seconds_text(seconds)}+00:00"
+
+
+def utc_now_isoformat() -> str:
+    """返回当前 UTC 时间，格式同 datetime.now(timezone.utc).isoformat()。"""
+    return utc_isoformat_ns(time.time_ns())
+
+
+@functools.lru_cache(maxsize=4096)
+def _utc_seconds_text(seconds: int) -> str:
+    # 同一秒内的请求时间戳、同一次检出/构建的文件 mtime 往往共享整秒部分，缓存命中率很高。
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds))
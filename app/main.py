@@ -1,25 +1,33 @@
+import asyncio
 from datetime import datetime, timezone
-from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack, asynccontextmanager, suppress
 from collections.abc import AsyncIterator, Callable
+import functools
 import logging
 from pathlib import Path
 import threading
 import time
 
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import FileResponse
+import orjson
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, Response
+from fastapi.staticfiles import StaticFiles
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.types import Scope
 
 from app.api.branch_routes import router as branch_router
-from app.api.mcp_routes import router as mcp_router
+from app.api.mcp_routes import mcp_tool_router, router as mcp_router
 from app.api.routes import router
 from app.core.config import settings
 from app.core.errors import register_exception_handlers
+from app.core.log_queue import start_queue_logging, stop_queue_logging
 from app.services.auth_service import auth_service
 from app.services.feishu_settings_service import feishu_settings_service
 from app.services.llm_config_service import llm_config_service
 from app.services.mcp_audit_service import mcp_audit_service
 from app.services.mcp_index_job_service import mcp_index_job_service
-from app.services.mcp_settings_service import mcp_settings_service
+from app.services.mcp_settings_service import STATIC_ASSET_PREFIXES, mcp_settings_service
 from app.services.mcp_fastmcp_service import build_fastmcp_asgi_app
 from app.services.mcp_token_service import mcp_token_service
 from app.services.mcp_vector_service import mcp_vector_service
@@ -37,7 +45,8 @@ _fastmcp_app = build_fastmcp_asgi_app()
 logger = logging.getLogger(__name__)
 
 _STATIC_DIR = settings.frontend_static_dir
-_INDEX_FILE = _STATIC_DIR / "index.html"
+# 未构建前端时每次页面访问/探活都会命中 404，响应体预先序列化。
+_NO_FRONTEND_BODY = orjson.dumps({"detail": "Frontend static files not found"})
 
 
 def _combine_lifespans(
@@ -47,21 +56,29 @@ def _combine_lifespans(
 
     @asynccontextmanager
     async def _merged() -> AsyncIterator[None]:
-        async with lifespans[0]():
-            if len(lifespans) == 1:
-                yield
-            else:
-                nested = _combine_lifespans(*lifespans[1:])
-                async with nested():
-                    yield
+        async with AsyncExitStack() as stack:
+            for lifespan in lifespans:
+                await stack.enter_async_context(lifespan())
+            yield
 
     return _merged
 
 
 @asynccontextmanager
 async def _core_lifespan() -> AsyncIterator[None]:
-    _startup()
-    yield
+    start_queue_logging()
+    # 各服务共用同一个 SQLite 文件，建表保持串行；放到线程中执行，不占用事件循环。
+    await asyncio.to_thread(_startup)
+    audit_cleanup_task = asyncio.create_task(_mcp_audit_cleanup_loop())
+    try:
+        yield
+    finally:
+        audit_cleanup_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await audit_cleanup_task
+        # 退出前写完尚在队列中的审计记录与日志。
+        mcp_audit_service.stop_writer()
+        stop_queue_logging()
 
 
 @asynccontextmanager
@@ -81,38 +98,54 @@ async def _app_lifespan(app: FastAPI):
         yield
 
 
+# 所有路由默认由 orjson 序列化；文件下载与 SSE 仍显式返回各自的响应类型。
 app = FastAPI(
     title="Jework",
     version="0.1.0",
     lifespan=_app_lifespan,
+    default_response_class=ORJSONResponse,
 )
 register_exception_handlers(app)
 app.include_router(router)
 app.include_router(branch_router)
 app.include_router(mcp_router)
+app.include_router(mcp_tool_router)
 if _fastmcp_app is not None:
     app.mount("/mcp", _fastmcp_app)
 
 
-def _bind_workspace_from_mcp_path(request: Request, path: str) -> bool:
-    """识别 /mcp/{workspace} 绑定入口并注入上下文。
+@functools.lru_cache(maxsize=4096)
+def _classify(base_path: str, raw_path: str) -> tuple[str | None, str | None]:
+    """按配置的 MCP 入口判定请求路径应重写到的内部路径。
 
-    返回 True 表示该路径已按绑定入口处理，并已完成重写。
+    说明：
+    - 返回 (重写后的 scope path, 绑定的 workspace)；路径无需改写时第一项为 None。
+    - 结果只取决于 (base_path, raw_path)，缓存后重复请求可跳过字符串处理；
+      base_path 是缓存键的一部分，配置变更后旧条目自然失配，无需主动清理。
     """
-    base = "/mcp"
-    if not path.startswith(f"{base}/"):
-        return False
-    suffix = path[len(base) + 1 :]
-    if not suffix:
-        return False
+    incoming_path = raw_path.rstrip("/") or "/"
+
+    # FastMCP 挂载根入口需要以 "/" 结尾，避免 POST /mcp 命中 405。
+    if incoming_path == "/mcp":
+        return "/mcp/", None
     # 仅在单段路径下视为 workspace 绑定，例如 /mcp/test-ai-doc。
-    if "/" in suffix:
-        return False
+    if incoming_path.startswith("/mcp/"):
+        suffix = incoming_path[len("/mcp/") :]
+        if suffix and "/" not in suffix:
+            return "/mcp/", suffix
 
-    request.scope.setdefault("state", {})
-    request.scope["state"]["mcp_bound_workspace"] = suffix
-    request.scope["path"] = "/mcp/"
-    return True
+    if base_path != "/mcp":
+        base = base_path.rstrip("/") or "/"
+        if incoming_path == base or incoming_path.startswith(f"{base}/"):
+            suffix = incoming_path[len(base) :]
+            suffix = suffix if suffix.startswith("/") else f"/{suffix}" if suffix else ""
+            if suffix in {"", "/"}:
+                return "/mcp/", None
+            maybe_workspace = suffix.lstrip("/")
+            if "/" not in maybe_workspace and maybe_workspace:
+                return "/mcp/", maybe_workspace
+            return f"/mcp{suffix}", None
+    return None, None
 
 
 @app.middleware("http")
@@ -120,6 +153,10 @@ async def _rewrite_dynamic_mcp_base_path(
     request: Request,
     call_next,
 ):
+    # 前端静态资源占请求的绝大多数，与 MCP 入口无关，直接放行。
+    if request.scope["path"].startswith(STATIC_ASSET_PREFIXES):
+        return await call_next(request)
+
     # mcp_base_path 在数据库更新后应立即生效。
     # 这里通过请求路径重写到固定实现路由 /mcp*，避免重启服务。
     try:
@@ -127,31 +164,12 @@ async def _rewrite_dynamic_mcp_base_path(
     except Exception:
         configured_base_path = "/mcp"
 
-    raw_path = request.url.path or "/"
-    incoming_path = raw_path.rstrip("/") or "/"
-
-    # FastMCP 挂载根入口需要以 "/" 结尾，避免 POST /mcp 命中 405。
-    if incoming_path == "/mcp":
-        request.scope["path"] = "/mcp/"
-        return await call_next(request)
-    if _bind_workspace_from_mcp_path(request, incoming_path):
-        return await call_next(request)
-
-    if configured_base_path != "/mcp":
-        base = configured_base_path.rstrip("/") or "/"
-        if incoming_path == base or incoming_path.startswith(f"{base}/"):
-            suffix = incoming_path[len(base) :]
-            suffix = suffix if suffix.startswith("/") else f"/{suffix}" if suffix else ""
-            if suffix in {"", "/"}:
-                request.scope["path"] = "/mcp/"
-            else:
-                maybe_workspace = suffix.lstrip("/")
-                if "/" not in maybe_workspace and maybe_workspace:
-                    request.scope.setdefault("state", {})
-                    request.scope["state"]["mcp_bound_workspace"] = maybe_workspace
-                    request.scope["path"] = "/mcp/"
-                else:
-                    request.scope["path"] = f"/mcp{suffix}"
+    scope_path, bound_workspace = _classify(configured_base_path, request.url.path or "/")
+    if bound_workspace is not None:
+        request.scope.setdefault("state", {})
+        request.scope["state"]["mcp_bound_workspace"] = bound_workspace
+    if scope_path is not None:
+        request.scope["path"] = scope_path
     return await call_next(request)
 
 
@@ -170,28 +188,23 @@ def _startup() -> None:
     mcp_index_job_service.init_db()
     mcp_audit_service.init_db()
     mcp_vector_service.init_db()
-    mcp_audit_service.cleanup_old_logs(keep_days=30)
-    _start_mcp_audit_cleanup_daemon()
+    mcp_audit_service.start_writer()
     _start_workspace_auto_pull_daemon()
 
 
-def _start_mcp_audit_cleanup_daemon() -> None:
-    def _loop() -> None:
-        while True:
-            try:
-                removed = mcp_audit_service.cleanup_old_logs(keep_days=30)
-                logger.info(
-                    "mcp audit cleanup finished removed=%s at=%s",
-                    removed,
-                    datetime.now(timezone.utc).isoformat(),
-                )
-            except Exception:
-                logger.exception("mcp audit cleanup failed")
-            # 每 24 小时执行一次，满足“定时清理”策略。
-            time.sleep(24 * 60 * 60)
-
-    thread = threading.Thread(target=_loop, daemon=True)
-    thread.start()
+async def _mcp_audit_cleanup_loop() -> None:
+    # 启动后立即清理一次（不阻塞服务就绪），此后每 24 小时执行一次，满足“定时清理”策略，随应用关闭取消。
+    while True:
+        try:
+            removed = await asyncio.to_thread(mcp_audit_service.cleanup_old_logs, keep_days=30)
+            logger.info(
+                "mcp audit cleanup finished removed=%s at=%s",
+                removed,
+                datetime.now(timezone.utc).isoformat(),
+            )
+        except Exception:
+            logger.exception("mcp audit cleanup failed")
+        await asyncio.sleep(24 * 60 * 60)
 
 
 def _start_workspace_auto_pull_daemon() -> None:
@@ -231,20 +244,24 @@ def _run_workspace_auto_pull_once() -> None:
     workspace_auto_pull_service.mark_run_finished()
 
 
-@app.get("/")
-def home_page() -> FileResponse:
-    if _INDEX_FILE.exists():
-        return FileResponse(_INDEX_FILE)
-    raise HTTPException(status_code=404, detail="Frontend static files not found")
-
+class _SpaStaticFiles(StaticFiles):
+    """前端静态资源；未命中的路径回退到 index.html，交由前端路由处理。"""
 
-@app.get("/{full_path:path}")
-def spa_fallback(full_path: str) -> FileResponse:
-    candidate = (_STATIC_DIR / full_path).resolve()
-    if candidate.exists() and candidate.is_file() and _STATIC_DIR in candidate.parents:
-        return FileResponse(candidate)
+    async def check_config(self) -> None:
+        # 未构建前端时目录可能不存在，交由 get_response 统一返回 404。
+        return None
 
-    if _INDEX_FILE.exists():
-        return FileResponse(_INDEX_FILE)
-
-    raise HTTPException(status_code=404, detail="Frontend static files not found")
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        try:
+            return await super().get_response(path, scope)
+        except StarletteHTTPException as exc:
+            if exc.status_code != 404:
+                raise
+        full_path, stat_result = await run_in_threadpool(self.lookup_path, "index.html")
+        if stat_result is None:
+            return Response(_NO_FRONTEND_BODY, status_code=404, media_type="application/json")
+        return self.file_response(full_path, stat_result, scope)
+
+
+# 需在所有路由之后挂载，仅兜底未被 API 路由匹配的请求。
+app.mount("/", _SpaStaticFiles(directory=_STATIC_DIR, html=True, check_dir=False), name="spa")
@@ -1,9 +1,24 @@
 from datetime import datetime
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
-class WorkspaceItem(BaseModel):
+class _Schema(BaseModel):
+    pass
+
+
+class _DeferredSchema(_Schema):
+    # 仅出现在 responses= 声明里、不参与路由校验的模型，延迟到首次使用时再构建校验器。
+    # 路由 response_model / 请求体用到的模型仍在导入时构建，首个请求不再承担构建开销。
+    model_config = ConfigDict(defer_build=True)
+
+
+class _RequestSchema(_Schema):
+    # 请求体解析后只读：路由与服务层不会回写字段，冻结后误改会直接报错。
+    model_config = ConfigDict(frozen=True)
+
+
+class WorkspaceItem(_Schema):
     workspace_id: str
     name: str
     path: str
@@ -21,11 +36,11 @@ class WorkspaceItem(BaseModel):
     last_pull_error_detail: str | None = None
 
 
-class WorkspaceListResponse(BaseModel):
+class WorkspaceListResponse(_DeferredSchema):
     items: list[WorkspaceItem]
 
 
-class CreateWorkspaceRequest(BaseModel):
+class CreateWorkspaceRequest(_RequestSchema):
     name: str = Field(min_length=1, max_length=128)
     mode: str = Field(default="team", max_length=32)
     note: str | None = Field(default=None, max_length=500)
@@ -35,39 +50,39 @@ class CreateWorkspaceRequest(BaseModel):
     git_pat: str | None = None
 
 
-class UpdateWorkspaceCredentialRequest(BaseModel):
+class UpdateWorkspaceCredentialRequest(_RequestSchema):
     git_username: str | None = None
     git_pat: str | None = None
 
 
-class WorkspaceCredentialItem(BaseModel):
+class WorkspaceCredentialItem(_Schema):
     workspace: str
     git_url: str | None = None
     git_username: str | None = None
     has_git_pat: bool = False
 
 
-class UpdateWorkspaceNoteRequest(BaseModel):
+class UpdateWorkspaceNoteRequest(_RequestSchema):
     note: str | None = Field(default=None, max_length=500)
 
 
-class WorkspaceNoteItem(BaseModel):
+class WorkspaceNoteItem(_Schema):
     workspace: str
     note: str | None = None
     updated_at: str | None = None
 
 
-class UpdateWorkspaceTagsRequest(BaseModel):
+class UpdateWorkspaceTagsRequest(_RequestSchema):
     tags: list[str] = Field(default_factory=list, max_length=20)
 
 
-class WorkspaceTagsItem(BaseModel):
+class WorkspaceTagsItem(_Schema):
     workspace: str
     tags: list[str] = Field(default_factory=list)
     updated_at: str | None = None
 
 
-class WorkspacePullResponse(BaseModel):
+class WorkspacePullResponse(_Schema):
     workspace: str
     before_commit: str | None
     after_commit: str | None
@@ -78,7 +93,7 @@ class WorkspacePullResponse(BaseModel):
     error_detail: str | None = None
 
 
-class WorkspaceAutoPullSettingsItem(BaseModel):
+class WorkspaceAutoPullSettingsItem(_Schema):
     enabled: bool
     interval_minutes: int
     last_run_at: str | None = None
@@ -87,27 +102,27 @@ class WorkspaceAutoPullSettingsItem(BaseModel):
     updated_at: str | None = None
 
 
-class UpdateWorkspaceAutoPullSettingsRequest(BaseModel):
+class UpdateWorkspaceAutoPullSettingsRequest(_RequestSchema):
     enabled: bool
     interval_minutes: int = Field(default=60, ge=15, le=360)
 
 
-class UserWorkspacePreferenceItem(BaseModel):
+class UserWorkspacePreferenceItem(_Schema):
     selected_tags: list[str] = Field(default_factory=list)
     updated_at: str | None = None
 
 
-class UpdateUserWorkspacePreferenceRequest(BaseModel):
+class UpdateUserWorkspacePreferenceRequest(_RequestSchema):
     selected_tags: list[str] = Field(default_factory=list, max_length=20)
 
 
-class WorkspaceDeleteResponse(BaseModel):
+class WorkspaceDeleteResponse(_Schema):
     workspace: str
     removed_sessions: int
     deleted_at: str
 
 
-class AgentMcpServerItem(BaseModel):
+class AgentMcpServerItem(_Schema):
     name: str = Field(min_length=1, max_length=128)
     type: str = Field(min_length=1, max_length=16)
     url: str | None = None
@@ -116,13 +131,13 @@ class AgentMcpServerItem(BaseModel):
     headers: dict[str, str] = Field(default_factory=dict)
 
 
-class WorkspaceSkillItem(BaseModel):
+class WorkspaceSkillItem(_Schema):
     name: str
     relative_path: str
     description: str | None = None
 
 
-class WorkspaceAgentProfileItem(BaseModel):
+class WorkspaceAgentProfileItem(_Schema):
     workspace_id: str
     workspace_name: str
     mcp_servers: list[AgentMcpServerItem] = Field(default_factory=list)
@@ -132,29 +147,29 @@ class WorkspaceAgentProfileItem(BaseModel):
     updated_at: str | None = None
 
 
-class UpdateWorkspaceAgentProfileRequest(BaseModel):
+class UpdateWorkspaceAgentProfileRequest(_RequestSchema):
     mcp_servers: list[AgentMcpServerItem] = Field(default_factory=list)
     extra_allowed_tools: list[str] = Field(default_factory=list)
 
 
-class CreateSessionRequest(BaseModel):
+class CreateSessionRequest(_RequestSchema):
     workspace: str
 
 
-class CreateSessionResponse(BaseModel):
+class CreateSessionResponse(_Schema):
     session_id: str
     workspace: str
     scope: str = "workspace"
     created_at: datetime
 
 
-class SessionMessageItem(BaseModel):
+class SessionMessageItem(_DeferredSchema):
     role: str
     text: str
     created_at: datetime
 
 
-class SessionDetailResponse(BaseModel):
+class SessionDetailResponse(_DeferredSchema):
     session_id: str
     workspace: str
     scope: str = "workspace"
@@ -162,7 +177,7 @@ class SessionDetailResponse(BaseModel):
     messages: list[SessionMessageItem]
 
 
-class SessionSummaryItem(BaseModel):
+class SessionSummaryItem(_Schema):
     session_id: str
     workspace: str
     scope: str = "workspace"
@@ -172,11 +187,11 @@ class SessionSummaryItem(BaseModel):
     last_message_preview: str
 
 
-class SessionListResponse(BaseModel):
+class SessionListResponse(_DeferredSchema):
     items: list[SessionSummaryItem]
 
 
-class DeleteSessionResponse(BaseModel):
+class DeleteSessionResponse(_Schema):
     session_id: str
     workspace: str
     scope: str = "workspace"
@@ -184,11 +199,11 @@ class DeleteSessionResponse(BaseModel):
     removed_runs: int
 
 
-class SendMessageRequest(BaseModel):
+class SendMessageRequest(_RequestSchema):
     message: str
 
 
-class SessionRunItem(BaseModel):
+class SessionRunItem(_Schema):
     run_id: str
     session_id: str
     status: str
@@ -198,11 +213,11 @@ class SessionRunItem(BaseModel):
     error_message: str | None = None
 
 
-class SessionRunResponse(BaseModel):
+class SessionRunResponse(_Schema):
     item: SessionRunItem
 
 
-class SessionRunStreamEvent(BaseModel):
+class SessionRunStreamEvent(_DeferredSchema):
     seq: int
     type: str
     created_at: str
@@ -211,30 +226,30 @@ class SessionRunStreamEvent(BaseModel):
     message: str | None = None
 
 
-class StreamChunk(BaseModel):
+class StreamChunk(_DeferredSchema):
     type: str
     data: str
 
 
-class ErrorResponse(BaseModel):
+class ErrorResponse(_DeferredSchema):
     error: dict
 
 
-class BootstrapStatusResponse(BaseModel):
+class BootstrapStatusResponse(_DeferredSchema):
     requires_setup: bool
 
 
-class BootstrapRequest(BaseModel):
+class BootstrapRequest(_RequestSchema):
     username: str = Field(min_length=3, max_length=32)
     password: str = Field(min_length=6, max_length=128)
 
 
-class LoginRequest(BaseModel):
+class LoginRequest(_RequestSchema):
     username: str = Field(min_length=3, max_length=32)
     password: str = Field(min_length=6, max_length=128)
 
 
-class UserResponse(BaseModel):
+class UserResponse(_Schema):
     id: int
     username: str
     display_name: str | None = None
@@ -245,34 +260,34 @@ class UserResponse(BaseModel):
     accessible_workspaces: list[str] = Field(default_factory=list)
 
 
-class LoginResponse(BaseModel):
+class LoginResponse(_Schema):
     token: str
     user: UserResponse
 
 
-class FeishuStatusResponse(BaseModel):
+class FeishuStatusResponse(_DeferredSchema):
     enabled: bool
     app_id: str | None = None
 
 
-class FeishuAuthorizeUrlResponse(BaseModel):
+class FeishuAuthorizeUrlResponse(_Schema):
     authorize_url: str
 
 
-class FeishuLoginRequest(BaseModel):
+class FeishuLoginRequest(_RequestSchema):
     code: str = Field(min_length=1, max_length=2048)
     redirect_uri: str | None = Field(default=None, max_length=2048)
 
 
-class SetLocalPasswordRequest(BaseModel):
+class SetLocalPasswordRequest(_RequestSchema):
     password: str = Field(min_length=6, max_length=128)
 
 
-class AdminResetUserPasswordRequest(BaseModel):
+class AdminResetUserPasswordRequest(_RequestSchema):
     password: str = Field(min_length=6, max_length=128)
 
 
-class FeishuSettingsItem(BaseModel):
+class FeishuSettingsItem(_Schema):
     enabled: bool
     app_id: str | None = None
     has_app_secret: bool = False
@@ -280,7 +295,7 @@ class FeishuSettingsItem(BaseModel):
     default_workspace_names: list[str] = Field(default_factory=list)
 
 
-class UpdateFeishuSettingsRequest(BaseModel):
+class UpdateFeishuSettingsRequest(_RequestSchema):
     enabled: bool | None = None
     app_id: str | None = Field(default=None, max_length=128)
     app_secret: str | None = Field(default=None, max_length=512)
@@ -288,7 +303,7 @@ class UpdateFeishuSettingsRequest(BaseModel):
     default_workspace_names: list[str] | None = None
 
 
-class McpAuthInfoResponse(BaseModel):
+class McpAuthInfoResponse(_Schema):
     mcp_url: str
     workspace_mcp_url_template: str
     has_token: bool
@@ -297,7 +312,7 @@ class McpAuthInfoResponse(BaseModel):
     updated_at: str | None = None
 
 
-class McpResetTokenResponse(BaseModel):
+class McpResetTokenResponse(_Schema):
     token: str
     token_hint: str
     mcp_url: str
@@ -305,7 +320,7 @@ class McpResetTokenResponse(BaseModel):
     updated_at: str
 
 
-class McpSettingsItem(BaseModel):
+class McpSettingsItem(_Schema):
     mcp_enabled: bool
     mcp_base_path: str
     mcp_public_base_url: str | None = None
@@ -323,7 +338,7 @@ class McpSettingsItem(BaseModel):
     updated_at: str | None = None
 
 
-class UpdateMcpSettingsRequest(BaseModel):
+class UpdateMcpSettingsRequest(_RequestSchema):
     mcp_enabled: bool | None = None
     mcp_base_path: str | None = Field(default=None, max_length=128)
     mcp_public_base_url: str | None = Field(default=None, max_length=512)
@@ -340,12 +355,12 @@ class UpdateMcpSettingsRequest(BaseModel):
     clear_embedding_api_key: bool | None = None
 
 
-class CreateMcpIndexJobRequest(BaseModel):
+class CreateMcpIndexJobRequest(_RequestSchema):
     workspace: str
     mode: str = Field(default="incremental")
 
 
-class McpIndexJobItem(BaseModel):
+class McpIndexJobItem(_Schema):
     job_id: str
     workspace: str
     mode: str
@@ -361,14 +376,14 @@ class McpIndexJobItem(BaseModel):
     updated_at: str
 
 
-class McpIndexJobListResponse(BaseModel):
+class McpIndexJobListResponse(_DeferredSchema):
     items: list[McpIndexJobItem]
     total: int
     page: int
     size: int
 
 
-class McpIndexFailureItem(BaseModel):
+class McpIndexFailureItem(_DeferredSchema):
     job_id: str
     workspace: str
     path: str
@@ -377,50 +392,50 @@ class McpIndexFailureItem(BaseModel):
     created_at: str
 
 
-class McpIndexFailureListResponse(BaseModel):
+class McpIndexFailureListResponse(_DeferredSchema):
     items: list[McpIndexFailureItem]
     total: int
     page: int
     size: int
 
 
-class RetryFailedJobsRequest(BaseModel):
+class RetryFailedJobsRequest(_RequestSchema):
     workspace: str | None = None
 
 
-class RetryFailedJobsResponse(BaseModel):
+class RetryFailedJobsResponse(_Schema):
     items: list[McpIndexJobItem]
 
 
-class RetryJobFailurePathsRequest(BaseModel):
+class RetryJobFailurePathsRequest(_RequestSchema):
     paths: list[str] = Field(default_factory=list)
 
 
-class CreateUserRequest(BaseModel):
+class CreateUserRequest(_RequestSchema):
     username: str = Field(min_length=3, max_length=32)
     password: str = Field(min_length=6, max_length=128)
     role: str = Field(default="user", min_length=4, max_length=16)
     workspace_names: list[str] = Field(default_factory=list)
 
 
-class UserListResponse(BaseModel):
+class UserListResponse(_DeferredSchema):
     items: list[UserResponse]
 
 
-class DeleteUserResponse(BaseModel):
+class DeleteUserResponse(_Schema):
     user_id: int
     deleted_at: str
 
 
-class UpdateUserWorkspaceAccessRequest(BaseModel):
+class UpdateUserWorkspaceAccessRequest(_RequestSchema):
     workspace_names: list[str] = Field(default_factory=list)
 
 
-class UpdateUserRoleRequest(BaseModel):
+class UpdateUserRoleRequest(_RequestSchema):
     role: str = Field(min_length=4, max_length=16)
 
 
-class LlmConfigBase(BaseModel):
+class LlmConfigBase(_RequestSchema):
     name: str = Field(min_length=1, max_length=64)
     base_url: str | None = None
     auth_token: str | None = None
@@ -434,7 +449,7 @@ class CreateLlmConfigRequest(LlmConfigBase):
     pass
 
 
-class UpdateLlmConfigRequest(BaseModel):
+class UpdateLlmConfigRequest(_RequestSchema):
     name: str | None = Field(default=None, min_length=1, max_length=64)
     base_url: str | None = None
     auth_token: str | None = None
@@ -444,7 +459,7 @@ class UpdateLlmConfigRequest(BaseModel):
     default_opus_model: str | None = None
 
 
-class LlmConfigItem(BaseModel):
+class LlmConfigItem(_Schema):
     id: int
     name: str
     base_url: str | None
@@ -458,11 +473,11 @@ class LlmConfigItem(BaseModel):
     updated_at: str
 
 
-class LlmConfigListResponse(BaseModel):
+class LlmConfigListResponse(_DeferredSchema):
     items: list[LlmConfigItem]
 
 
-class MarkdownNodeItem(BaseModel):
+class MarkdownNodeItem(_DeferredSchema):
     type: str
     name: str
     path: str
@@ -471,13 +486,13 @@ class MarkdownNodeItem(BaseModel):
     children: list["MarkdownNodeItem"] | None = None
 
 
-class MarkdownIndexResponse(BaseModel):
+class MarkdownIndexResponse(_DeferredSchema):
     workspace: str
     generated_at: str
     items: list[MarkdownNodeItem]
 
 
-class MarkdownContentResponse(BaseModel):
+class MarkdownContentResponse(_DeferredSchema):
     workspace: str
     path: str
     name: str
@@ -486,7 +501,7 @@ class MarkdownContentResponse(BaseModel):
     content: str
 
 
-class FileNodeItem(BaseModel):
+class FileNodeItem(_DeferredSchema):
     type: str
     name: str
     path: str
@@ -495,13 +510,13 @@ class FileNodeItem(BaseModel):
     children: list["FileNodeItem"] | None = None
 
 
-class FileIndexResponse(BaseModel):
+class FileIndexResponse(_DeferredSchema):
     workspace: str
     generated_at: str
     items: list[FileNodeItem]
 
 
-class FileContentResponse(BaseModel):
+class FileContentResponse(_DeferredSchema):
     workspace: str
     path: str
     name: str
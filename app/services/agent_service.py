@@ -1,4 +1,5 @@
 from collections.abc import AsyncGenerator
+import functools
 from pathlib import Path
 import logging
 import os
@@ -24,6 +25,7 @@ MAX_STDERR_LINES = 40
 WRITE_LIKE_TOOL_NAMES = {"write", "edit", "multiedit", "notebookedit"}
 
 
+@functools.lru_cache(maxsize=1)
 def _resolve_agent_max_turns() -> int:
     raw = os.getenv("CLAUDE_AGENT_MAX_TURNS", str(DEFAULT_AGENT_MAX_TURNS))
     try:
@@ -35,6 +37,7 @@ def _resolve_agent_max_turns() -> int:
         return DEFAULT_AGENT_MAX_TURNS
 
 
+@functools.lru_cache(maxsize=1)
 def _resolve_allowed_tools() -> list[str]:
     raw = os.getenv("CLAUDE_AGENT_ALLOWED_TOOLS", "")
     parsed = [item.strip() for item in raw.split(",") if item.strip()]
@@ -43,6 +46,7 @@ def _resolve_allowed_tools() -> list[str]:
     return DEFAULT_READ_ONLY_TOOLS
 
 
+@functools.lru_cache(maxsize=1)
 def _resolve_personal_allowed_tools() -> list[str]:
     raw = os.getenv("CLAUDE_AGENT_ALLOWED_PERSONAL_TOOLS", "")
     parsed = [item.strip() for item in raw.split(",") if item.strip()]
@@ -51,12 +55,17 @@ def _resolve_personal_allowed_tools() -> list[str]:
     return DEFAULT_PERSONAL_WRITE_TOOLS
 
 
-def _tool_use_name(block: Any) -> str | None:
-    if block.__class__.__name__ == "ToolUseBlock":
-        name = getattr(block, "name", None)
-        if isinstance(name, str) and name:
-            return name
-    return None
+def refresh_env_cache() -> None:
+    """
+    清空 Agent 运行参数的环境变量缓存。
+
+    说明：
+    - 最大轮数与工具白名单只在启动时由环境变量决定，首次解析后缓存，避免每次会话重复读取与拆分。
+    - 运行期修改环境变量（如测试）后调用本函数使其生效。
+    """
+    _resolve_agent_max_turns.cache_clear()
+    _resolve_allowed_tools.cache_clear()
+    _resolve_personal_allowed_tools.cache_clear()
 
 
 def _extract_candidate_paths(payload: Any) -> list[str]:
@@ -190,6 +199,7 @@ async def stream_agent_response(
             PermissionResultDeny,
             ResultMessage,
             TextBlock,
+            ToolUseBlock,
             query,
         )
     except Exception as exc:
@@ -286,11 +296,13 @@ async def stream_agent_response(
             has_partial = False
             has_assistant_text = False
             tool_names: dict[int, str] = {}
-            tool_inputs: dict[int, str] = {}
+            # 工具入参按分片累积，块结束时再拼接，避免每个 delta 复制整段 JSON。
+            tool_inputs: dict[int, list[str]] = {}
 
             query_prompt = _single_prompt_stream(prompt) if enable_workspace_write_guard else prompt
             async for message in query(prompt=query_prompt, options=options):
-                logger.warning(
+                # 流式输出时每个 token 都是一条消息，逐条记录仅在调试级别开启。
+                logger.debug(
                     "[claude-sdk] message type=%s payload=%r",
                     type(message).__name__,
                     message,
@@ -316,14 +328,14 @@ async def stream_agent_response(
                 event_payload = getattr(message, "event", None)
                 if isinstance(event_payload, dict):
                     event_type = event_payload.get("type")
-                    logger.warning("[claude-sdk] stream event=%s", event_payload)
+                    logger.debug("[claude-sdk] stream event=%s", event_payload)
                     if event_type == "content_block_start":
                         block = event_payload.get("content_block", {})
                         if isinstance(block, dict) and block.get("type") == "tool_use":
                             index_id = event_payload.get("index")
                             name = block.get("name")
                             if isinstance(index_id, int):
-                                tool_inputs[index_id] = ""
+                                tool_inputs[index_id] = []
                                 if isinstance(name, str) and name:
                                     tool_names[index_id] = name
                                     yield {
@@ -352,15 +364,18 @@ async def stream_agent_response(
                                 and isinstance(part, str)
                                 and part
                             ):
-                                current = tool_inputs.get(index_id, "")
-                                current += part
-                                tool_inputs[index_id] = current
-                                name = tool_names.get(index_id, "Read")
-                                yield {
-                                    "type": "tool",
-                                    "title": f"调用工具: {name}",
-                                    "data": current,
-                                }
+                                tool_inputs.setdefault(index_id, []).append(part)
+
+                    if event_type == "content_block_stop":
+                        index_id = event_payload.get("index")
+                        parts = tool_inputs.pop(index_id, None) if isinstance(index_id, int) else None
+                        if parts:
+                            name = tool_names.get(index_id, "Read")
+                            yield {
+                                "type": "tool",
+                                "title": f"调用工具: {name}",
+                                "data": "".join(parts),
+                            }
                     continue
 
                 if isinstance(message, AssistantMessage):
@@ -370,14 +385,12 @@ async def stream_agent_response(
                         if isinstance(block, TextBlock) and block.text:
                             has_assistant_text = True
                             yield {"type": "chunk", "data": block.text}
-                        else:
-                            tool_name = _tool_use_name(block)
-                            if tool_name:
-                                yield {
-                                    "type": "tool",
-                                    "title": f"调用工具: {tool_name}",
-                                    "data": str(getattr(block, "input", {})),
-                                }
+                        elif isinstance(block, ToolUseBlock) and block.name:
+                            yield {
+                                "type": "tool",
+                                "title": f"调用工具: {block.name}",
+                                "data": str(block.input),
+                            }
                     continue
 
                 if isinstance(message, ResultMessage):
@@ -1,13 +1,16 @@
+import base64
+import binascii
 import hashlib
 import hmac
 import os
 import re
 import secrets
 import sqlite3
-from contextlib import closing
+import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.core.errors import (
     AppError,
@@ -17,9 +20,51 @@ from app.core.errors import (
     UserAlreadyExistsError,
     UserBootstrapNotAllowedError,
 )
+from app.core.sqlite_pool import SQLiteConnectionPool
 
-_USERNAME_PATTERN = re.compile(r"^[a-zA-Z0-9_.-]{3,32}$")
+# fullmatch 整串匹配：`$` 会放过末尾换行（"alice\n"），不再依赖锚点。
+_USERNAME_PATTERN = re.compile(r"[a-zA-Z0-9_.-]{3,32}")
 _ALLOWED_ASSIGNABLE_ROLES = {"user", "admin"}
+# scrypt(n=2**15, r=8, p=1) 需要约 32 MiB 内存，单次耗时约为原 PBKDF2(120k) 的两倍多，
+# 内存硬度显著抬高 GPU/ASIC 暴力破解成本；maxmem 需高于 OpenSSL 默认的 32 MiB 上限。
+_SCRYPT_N = 2**15
+_SCRYPT_R = 8
+_SCRYPT_P = 1
+_SCRYPT_DKLEN = 32
+_SCRYPT_MAXMEM = 64 * 1024 * 1024
+# 登录态缓存：token -> (过期的单调时钟时刻, 账号数据版本, 用户)。
+_TOKEN_CACHE_MAXSIZE = 4096
+_TOKEN_CACHE_TTL_SECONDS = 300
+# 登录 token 为 128 位随机数：库中以 16 字节 BLOB 存储，对外为 22 位 base64url 文本。
+_AUTH_TOKEN_BYTES = 16
+_AUTH_TOKEN_TEXT_LENGTH = 22
+
+
+def _new_auth_token() -> str:
+    return _encode_auth_token(secrets.token_bytes(_AUTH_TOKEN_BYTES))
+
+
+def _auth_token_key(token: str) -> str | bytes:
+    """
+    将客户端持有的 token 转为 auth_tokens.token 的存储键。
+
+    说明：
+    - 新 token 解码为 16 字节 BLOB，主键索引更紧凑；列本身沿用 TEXT 亲和性，无需重建表。
+    - 严格解码并要求回编码结果与原串一致：末位字符的低位不参与解码，否则多个写法会映射到同一个键。
+    - 升级前签发的 64 位文本 token 原样作为键，已登录会话继续有效直至过期。
+    """
+    if len(token) == _AUTH_TOKEN_TEXT_LENGTH:
+        try:
+            raw = base64.b64decode(token + "==", altchars=b"-_", validate=True)
+        except (binascii.Error, ValueError):
+            return token
+        if len(raw) == _AUTH_TOKEN_BYTES and _encode_auth_token(raw) == token:
+            return raw
+    return token
+
+
+def _encode_auth_token(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
 
 
 @dataclass
@@ -40,11 +85,42 @@ class AuthUser:
 class AuthService:
     def __init__(self, db_path: str, token_ttl_hours: int = 24 * 7) -> None:
         self._db_path = db_path
+        # 登录态校验、授权查询调用频繁，按线程复用连接，省去每次 connect 与页缓存重建。
+        self._pool = SQLiteConnectionPool(db_path)
         self._token_ttl_hours = token_ttl_hours
+        self._revision = 0
+        # 单个用户的资料版本（飞书昵称/头像刷新），只让该用户的缓存条目失效。
+        self._profile_revisions: dict[int, int] = {}
+        # 任一用户资料刷新即递增；查库前后比对，避免把刷新前读到的资料写入缓存。
+        self._profile_epoch = 0
+        self._token_cache: TTLCache[str, tuple[float, int, int, AuthUser]] = TTLCache(
+            maxsize=_TOKEN_CACHE_MAXSIZE,
+            ttl_seconds=_TOKEN_CACHE_TTL_SECONDS,
+        )
+
+    @property
+    def revision(self) -> int:
+        """
+        账号数据版本号。
+
+        改角色、改密码、删用户、调整工作空间授权等操作完成后递增，
+        上层的登录态/授权缓存据此判定失效。
+        """
+        return self._revision
+
+    def profile_revision(self, user_id: int) -> int:
+        """
+        单个用户的资料版本号。
+
+        说明：
+        - 飞书登录刷新昵称/头像时只递增该用户的版本，不影响其他用户的登录态/授权缓存。
+        - 缓存了 AuthUser 的上层需要同时比对 revision 与本值。
+        """
+        return self._profile_revisions.get(user_id, 0)
 
     def init_db(self) -> None:
         os.makedirs(os.path.dirname(self._db_path), exist_ok=True)
-        with closing(sqlite3.connect(self._db_path)) as conn:
+        with self._pool.connection() as conn:
             conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS users (
@@ -65,6 +141,7 @@ class AuthService:
                     user_id INTEGER NOT NULL,
                     created_at TEXT NOT NULL,
                     expires_at TEXT NOT NULL,
+                    expires_at_epoch INTEGER,
                     FOREIGN KEY (user_id) REFERENCES users(id)
                 )
                 """
@@ -82,10 +159,11 @@ class AuthService:
                 """
             )
             self._ensure_user_extension_columns(conn)
+            self._ensure_auth_token_columns(conn)
             conn.commit()
 
     def requires_bootstrap(self) -> bool:
-        with closing(sqlite3.connect(self._db_path)) as conn:
+        with self._pool.connection() as conn:
             row = conn.execute("SELECT COUNT(1) AS c FROM users").fetchone()
             return (row[0] if row else 0) == 0
 
@@ -99,7 +177,7 @@ class AuthService:
         now = datetime.now(timezone.utc).isoformat()
         password_hash = self._hash_password(password)
 
-        with closing(sqlite3.connect(self._db_path)) as conn:
+        with self._pool.connection() as conn:
             cursor = conn.execute(
                 """
                 INSERT INTO users (username, password_hash, role, created_at)
@@ -119,7 +197,7 @@ class AuthService:
         )
 
     def login(self, username: str, password: str) -> tuple[str, AuthUser]:
-        with closing(sqlite3.connect(self._db_path)) as conn:
+        with self._pool.connection() as conn:
             conn.row_factory = sqlite3.Row
             row = conn.execute(
                 """
@@ -132,20 +210,22 @@ class AuthService:
                 (username,),
             ).fetchone()
 
-            if row is None or not self._verify_password(password, row["password_hash"]):
+            # 用户不存在时也完整执行一次 KDF，避免按响应耗时枚举用户名。
+            encoded = row["password_hash"] if row is not None else ""
+            if not self._verify_password(password, encoded) or row is None:
                 raise AuthInvalidCredentialsError()
 
-            token = secrets.token_urlsafe(48)
+            token = _new_auth_token()
             now = datetime.now(timezone.utc)
             expires = now + timedelta(hours=self._token_ttl_hours)
 
-            conn.execute(
-                """
-                INSERT INTO auth_tokens (token, user_id, created_at, expires_at)
-                VALUES (?, ?, ?, ?)
-                """,
-                (token, row["id"], now.isoformat(), expires.isoformat()),
-            )
+            if self._password_needs_rehash(row["password_hash"]):
+                # 历史 PBKDF2 记录在明文可得的这一次登录时升级为 scrypt。
+                conn.execute(
+                    "UPDATE users SET password_hash = ? WHERE id = ?",
+                    (self._hash_password(password), row["id"]),
+                )
+            self._insert_auth_token(conn, token, row["id"], now, expires)
             conn.commit()
 
             user = AuthUser(
@@ -174,26 +254,25 @@ class AuthService:
         now = datetime.now(timezone.utc)
         now_text = now.isoformat()
         first_login = False
-        with closing(sqlite3.connect(self._db_path)) as conn:
+        with self._pool.connection() as conn:
             conn.row_factory = sqlite3.Row
             self._ensure_user_extension_columns(conn)
+            # 老用户是常见路径：一条 UPDATE ... RETURNING 同时完成刷新资料与取回账号。
             row = conn.execute(
                 """
-                SELECT id, username, role, created_at,
-                       created_by, has_local_password, display_name, avatar_url,
-                       feishu_union_id, feishu_open_id
-                FROM users
+                UPDATE users
+                SET display_name = ?, avatar_url = ?, feishu_open_id = ?
                 WHERE feishu_union_id = ?
-                LIMIT 1
+                RETURNING id, username, role, created_at, created_by, has_local_password
                 """,
-                (union_id,),
+                (name, avatar_url, open_id, union_id),
             ).fetchone()
 
             if row is None:
-                first_login = True
                 username = self._generate_unique_feishu_username(conn, union_id)
                 password_hash = self._hash_password(secrets.token_urlsafe(32))
-                cursor = conn.execute(
+                # 并发首登时另一请求可能已建号：冲突则退化为资料刷新，不再抛唯一约束错误。
+                row = conn.execute(
                     """
                     INSERT INTO users (
                         username, password_hash, role, created_at,
@@ -201,6 +280,12 @@ class AuthService:
                         feishu_union_id, feishu_open_id
                     )
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(feishu_union_id) WHERE feishu_union_id IS NOT NULL
+                    DO UPDATE SET
+                        display_name = excluded.display_name,
+                        avatar_url = excluded.avatar_url,
+                        feishu_open_id = excluded.feishu_open_id
+                    RETURNING id, username, role, created_at, created_by, has_local_password
                     """,
                     (
                         username,
@@ -214,10 +299,12 @@ class AuthService:
                         union_id,
                         open_id,
                     ),
-                )
-                user_id = int(cursor.lastrowid)
+                ).fetchone()
+                first_login = row["username"] == username
+
+            if first_login:
                 workspace_rows = [
-                    (user_id, workspace, now_text, now_text)
+                    (row["id"], workspace, now_text, now_text)
                     for workspace in sorted(set(default_workspace_names or []))
                     if workspace.strip()
                 ]
@@ -231,76 +318,76 @@ class AuthService:
                         """,
                         workspace_rows,
                     )
-                user = AuthUser(
-                    id=user_id,
-                    username=username,
-                    role="user",
-                    created_at=now_text,
-                    created_by=None,
-                    has_local_password=False,
-                    display_name=name,
-                    avatar_url=avatar_url,
-                    feishu_union_id=union_id,
-                    feishu_open_id=open_id,
-                )
-            else:
-                conn.execute(
-                    """
-                    UPDATE users
-                    SET display_name = ?, avatar_url = ?, feishu_open_id = ?
-                    WHERE id = ?
-                    """,
-                    (name, avatar_url, open_id, row["id"]),
-                )
-                user = AuthUser(
-                    id=row["id"],
-                    username=row["username"],
-                    role=row["role"],
-                    created_at=row["created_at"],
-                    created_by=row["created_by"],
-                    has_local_password=bool(row["has_local_password"]),
-                    display_name=name,
-                    avatar_url=avatar_url,
-                    feishu_union_id=row["feishu_union_id"],
-                    feishu_open_id=open_id,
-                )
+            user = AuthUser(
+                id=row["id"],
+                username=row["username"],
+                role=row["role"],
+                created_at=row["created_at"],
+                created_by=row["created_by"],
+                has_local_password=bool(row["has_local_password"]),
+                display_name=name,
+                avatar_url=avatar_url,
+                feishu_union_id=union_id,
+                feishu_open_id=open_id,
+            )
 
-            token = secrets.token_urlsafe(48)
+            token = _new_auth_token()
             expires = now + timedelta(hours=self._token_ttl_hours)
-            conn.execute(
-                """
-                INSERT INTO auth_tokens (token, user_id, created_at, expires_at)
-                VALUES (?, ?, ?, ?)
-                """,
-                (token, user.id, now_text, expires.isoformat()),
-            )
+            self._insert_auth_token(conn, token, user.id, now, expires)
             conn.commit()
+        if not first_login:
+            # 飞书资料（昵称/头像）已刷新，仅让该用户的缓存失效；角色与授权未变，无需全局递增。
+            self._bump_profile_revision(user.id)
         return token, user, first_login
 
+    def get_cached_user_by_token(self, token: str) -> AuthUser | None:
+        """
+        仅从内存缓存解析 token，不访问数据库。
+
+        说明：
+        - 供事件循环内的快速路径使用；未命中时由调用方改走 get_user_by_token()。
+        - 账号数据版本变化（改角色/改密/删用户）、该用户资料刷新或 token 到期后条目即失效。
+        """
+        cached = self._token_cache.get(token)
+        if cached is None:
+            return None
+        deadline, revision, profile_revision, user = cached
+        if (
+            revision != self._revision
+            or profile_revision != self.profile_revision(user.id)
+            or time.monotonic() >= deadline
+        ):
+            self._token_cache.pop(token)
+            return None
+        return user
+
     def get_user_by_token(self, token: str) -> AuthUser:
-        with closing(sqlite3.connect(self._db_path)) as conn:
+        cached = self.get_cached_user_by_token(token)
+        if cached is not None:
+            return cached
+        # 先取版本号再查库：查询期间发生的账号变更会使本次写入的缓存立即失效。
+        revision = self._revision
+        profile_epoch = self._profile_epoch
+        with self._pool.connection() as conn:
             conn.row_factory = sqlite3.Row
+            now_epoch = time.time()
+            # 过期判断在 SQL 中以整数比较完成；过期记录由登录时的批量清理回收。
             row = conn.execute(
                 """
-                SELECT u.id, u.username, u.role, u.created_at, t.expires_at,
+                SELECT u.id, u.username, u.role, u.created_at, t.expires_at_epoch,
                        u.created_by, u.has_local_password, u.display_name, u.avatar_url,
                        u.feishu_union_id, u.feishu_open_id
                 FROM auth_tokens t
                 JOIN users u ON u.id = t.user_id
-                WHERE t.token = ?
+                WHERE t.token = ? AND t.expires_at_epoch > ?
                 """,
-                (token,),
+                (_auth_token_key(token), int(now_epoch)),
             ).fetchone()
 
             if row is None:
                 raise AuthRequiredError()
 
-            if datetime.fromisoformat(row["expires_at"]) < datetime.now(timezone.utc):
-                conn.execute("DELETE FROM auth_tokens WHERE token = ?", (token,))
-                conn.commit()
-                raise AuthRequiredError()
-
-            return AuthUser(
+            user = AuthUser(
                 id=row["id"],
                 username=row["username"],
                 role=row["role"],
@@ -312,9 +399,14 @@ class AuthService:
                 feishu_union_id=row["feishu_union_id"],
                 feishu_open_id=row["feishu_open_id"],
             )
+        profile_revision = self.profile_revision(user.id)
+        if profile_epoch == self._profile_epoch:
+            deadline = time.monotonic() + (row["expires_at_epoch"] - now_epoch)
+            self._token_cache.set(token, (deadline, revision, profile_revision, user))
+        return user
 
     def get_user_by_id(self, user_id: int) -> AuthUser:
-        with closing(sqlite3.connect(self._db_path)) as conn:
+        with self._pool.connection() as conn:
             conn.row_factory = sqlite3.Row
             row = conn.execute(
                 """
@@ -368,7 +460,7 @@ class AuthService:
         password_hash = self._hash_password(password)
 
         try:
-            with closing(sqlite3.connect(self._db_path)) as conn:
+            with self._pool.connection() as conn:
                 cursor = conn.execute(
                     """
                 INSERT INTO users (
@@ -416,17 +508,23 @@ class AuthService:
         if current_user.role not in {"superadmin", "admin"}:
             raise AuthForbiddenError()
 
-        with closing(sqlite3.connect(self._db_path)) as conn:
+        with self._pool.connection() as conn:
             conn.row_factory = sqlite3.Row
+            # 授权列表在 SQL 内按用户聚合（走 (user_id, workspace) 主键索引），
+            # 管理员拥有全局权限、无需查询；分隔符用不会出现在名称中的 \x1f。
             rows = conn.execute(
                 """
-                SELECT id, username, role, created_at, created_by,
-                       has_local_password, display_name
-                FROM users
-                ORDER BY id ASC
+                SELECT u.id, u.username, u.role, u.created_at, u.created_by,
+                       u.has_local_password, u.display_name,
+                       CASE WHEN u.role IN ('superadmin', 'admin') THEN NULL ELSE (
+                           SELECT GROUP_CONCAT(a.workspace, char(31))
+                           FROM user_workspace_access a
+                           WHERE a.user_id = u.id
+                       ) END AS workspaces
+                FROM users u
+                ORDER BY u.id ASC
                 """
             ).fetchall()
-            access_map = self._query_user_workspace_access_map(conn)
             return [
                 AuthUser(
                     id=row["id"],
@@ -436,13 +534,64 @@ class AuthService:
                     created_at=row["created_at"],
                     created_by=row["created_by"],
                     has_local_password=bool(row["has_local_password"]),
-                    accessible_workspaces=[]
-                    if row["role"] in {"superadmin", "admin"}
-                    else access_map.get(row["id"], []),
+                    # GROUP_CONCAT 不保证顺序，按名称排序与原先 ORDER BY workspace 一致。
+                    accessible_workspaces=sorted(row["workspaces"].split("\x1f"))
+                    if row["workspaces"]
+                    else [],
                 )
                 for row in rows
             ]
 
+    def get_user(self, current_user: AuthUser, user_id: int) -> AuthUser | None:
+        """
+        按 id 读取单个用户，字段与 list_users 的条目一致。
+
+        说明：
+        - 账号管理接口写操作后只需回显目标用户，避免为找一条记录加载全部用户与 ACL。
+        - 用户不存在时返回 None。
+        """
+        if current_user.role not in {"superadmin", "admin"}:
+            raise AuthForbiddenError()
+
+        with self._pool.connection() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute(
+                """
+                SELECT id, username, role, created_at, created_by,
+                       has_local_password, display_name
+                FROM users
+                WHERE id = ?
+                LIMIT 1
+                """,
+                (user_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            accessible: list[str] = []
+            if row["role"] not in {"superadmin", "admin"}:
+                accessible = [
+                    str(item["workspace"])
+                    for item in conn.execute(
+                        """
+                        SELECT workspace
+                        FROM user_workspace_access
+                        WHERE user_id = ?
+                        ORDER BY workspace ASC
+                        """,
+                        (user_id,),
+                    ).fetchall()
+                ]
+            return AuthUser(
+                id=row["id"],
+                username=row["username"],
+                display_name=row["display_name"],
+                role=row["role"],
+                created_at=row["created_at"],
+                created_by=row["created_by"],
+                has_local_password=bool(row["has_local_password"]),
+                accessible_workspaces=accessible,
+            )
+
     def set_local_password(self, *, current_user: AuthUser, new_password: str) -> None:
         """
         为当前登录用户设置/重设本地密码。
@@ -453,7 +602,7 @@ class AuthService:
         """
         self._validate_password(new_password)
 
-        with closing(sqlite3.connect(self._db_path)) as conn:
+        with self._pool.connection() as conn:
             conn.row_factory = sqlite3.Row
             row = conn.execute(
                 "SELECT id FROM users WHERE id = ? LIMIT 1",
@@ -467,6 +616,7 @@ class AuthService:
                 new_password=new_password,
             )
             conn.commit()
+        self._bump_revision()
 
     def admin_reset_user_password(
         self,
@@ -486,7 +636,7 @@ class AuthService:
             raise AuthForbiddenError()
         self._validate_password(new_password)
 
-        with closing(sqlite3.connect(self._db_path)) as conn:
+        with self._pool.connection() as conn:
             conn.row_factory = sqlite3.Row
             row = conn.execute(
                 "SELECT id, role FROM users WHERE id = ? LIMIT 1",
@@ -513,6 +663,7 @@ class AuthService:
                 new_password=new_password,
             )
             conn.commit()
+        self._bump_revision()
 
     def set_user_workspace_access(
         self,
@@ -525,7 +676,7 @@ class AuthService:
 
         normalized = sorted(set(workspace_names))
         now = datetime.now(timezone.utc).isoformat()
-        with closing(sqlite3.connect(self._db_path)) as conn:
+        with self._pool.connection() as conn:
             conn.row_factory = sqlite3.Row
             user_row = conn.execute(
                 "SELECT id, role FROM users WHERE id = ?",
@@ -563,6 +714,7 @@ class AuthService:
                     rows,
                 )
             conn.commit()
+        self._bump_revision()
         return normalized
 
     def set_user_role(
@@ -575,7 +727,7 @@ class AuthService:
         if current_user.role != "superadmin":
             raise AuthForbiddenError()
         normalized_role = self._normalize_assignable_role(role)
-        with closing(sqlite3.connect(self._db_path)) as conn:
+        with self._pool.connection() as conn:
             conn.row_factory = sqlite3.Row
             row = conn.execute(
                 """
@@ -607,6 +759,7 @@ class AuthService:
                 (normalized_role, user_id),
             )
             conn.commit()
+            self._bump_revision()
             return AuthUser(
                 id=row["id"],
                 username=row["username"],
@@ -628,7 +781,7 @@ class AuthService:
         workspace: str,
     ) -> None:
         now = datetime.now(timezone.utc).isoformat()
-        with closing(sqlite3.connect(self._db_path)) as conn:
+        with self._pool.connection() as conn:
             conn.execute(
                 """
                 INSERT INTO user_workspace_access
@@ -640,38 +793,47 @@ class AuthService:
                 (user_id, workspace, now, now),
             )
             conn.commit()
+        self._bump_revision()
 
     def get_accessible_workspaces(self, user: AuthUser) -> list[str]:
         if user.role in {"superadmin", "admin"}:
             return []
-        with closing(sqlite3.connect(self._db_path)) as conn:
-            conn.row_factory = sqlite3.Row
-            rows = conn.execute(
-                """
-                SELECT workspace
-                FROM user_workspace_access
-                WHERE user_id = ?
-                ORDER BY workspace ASC
-                """,
-                (user.id,),
-            ).fetchall()
-            from_acl = {str(row["workspace"]) for row in rows}
-            # 个人工作空间由 owner 自动可见，不依赖 ACL 显式分配。
-            personal_rows = self._query_owned_personal_workspaces(conn, user.id)
-            accessible = from_acl.union(personal_rows)
-            # 兜底过滤：若 ACL 中误配置了他人 personal workspace，这里自动剔除。
-            return sorted(
-                workspace
-                for workspace in accessible
-                if self._is_workspace_accessible_for_user(conn, user.id, workspace)
-            )
+        with self._pool.connection() as conn:
+            return self._accessible_workspaces(conn, user.id)
+
+    def get_accessible_workspace_set(self, user: AuthUser) -> frozenset[str] | None:
+        """
+        返回用于过滤工作空间列表的可访问集合。
+
+        说明：
+        - 管理员返回 None，表示不限制，且不访问数据库。
+        - 普通用户返回 frozenset，调用方可直接用于成员判断，无需再次转换。
+        """
+        if user.role in {"superadmin", "admin"}:
+            return None
+        return frozenset(self.get_accessible_workspaces(user))
 
     def can_access_workspace(self, user: AuthUser, workspace: str) -> bool:
         if user.role in {"superadmin", "admin"}:
             return True
-        with closing(sqlite3.connect(self._db_path)) as conn:
+        with self._pool.connection() as conn:
             return self._is_workspace_accessible_for_user(conn, user.id, workspace)
 
+    def require_workspace_access(self, user: AuthUser, workspace: str) -> set[str] | None:
+        """
+        校验工作空间访问权，并返回普通用户可访问的工作空间集合。
+
+        说明：
+        - 合并 can_access_workspace 与 get_accessible_workspaces，两次查询共用一个连接。
+        - 管理员返回 None，表示不限制；无权访问时抛出 AuthForbiddenError。
+        """
+        if user.role in {"superadmin", "admin"}:
+            return None
+        with self._pool.connection() as conn:
+            if not self._is_workspace_accessible_for_user(conn, user.id, workspace):
+                raise AuthForbiddenError()
+            return set(self._accessible_workspaces(conn, user.id))
+
     def delete_user(
         self,
         *,
@@ -681,7 +843,7 @@ class AuthService:
         if current_user.role not in {"superadmin", "admin"}:
             raise AuthForbiddenError()
 
-        with closing(sqlite3.connect(self._db_path)) as conn:
+        with self._pool.connection() as conn:
             conn.row_factory = sqlite3.Row
             target = conn.execute(
                 """
@@ -751,9 +913,10 @@ class AuthService:
                 )
             conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
             conn.commit()
+        self._bump_revision()
 
     def remove_workspace_access_for_all_users(self, workspace: str) -> None:
-        with closing(sqlite3.connect(self._db_path)) as conn:
+        with self._pool.connection() as conn:
             conn.execute(
                 """
                 DELETE FROM user_workspace_access
@@ -767,12 +930,13 @@ class AuthService:
                 (workspace, workspace),
             )
             conn.commit()
+        self._bump_revision()
 
     def remove_workspace_access_for_user(self, user_id: int, workspace: str) -> None:
         """
         清理单个用户对某个 workspace 的授权残留（兼容 id/name 双键）。
         """
-        with closing(sqlite3.connect(self._db_path)) as conn:
+        with self._pool.connection() as conn:
             conn.execute(
                 """
                 DELETE FROM user_workspace_access
@@ -789,23 +953,14 @@ class AuthService:
                 (user_id, workspace, workspace),
             )
             conn.commit()
+        self._bump_revision()
 
-    def _query_user_workspace_access_map(
-        self, conn: sqlite3.Connection
-    ) -> dict[int, list[str]]:
-        conn.row_factory = sqlite3.Row
-        rows = conn.execute(
-            """
-            SELECT user_id, workspace
-            FROM user_workspace_access
-            ORDER BY workspace ASC
-            """
-        ).fetchall()
-        result: dict[int, list[str]] = {}
-        for row in rows:
-            user_id = int(row["user_id"])
-            result.setdefault(user_id, []).append(str(row["workspace"]))
-        return result
+    def _bump_revision(self) -> None:
+        self._revision += 1
+
+    def _bump_profile_revision(self, user_id: int) -> None:
+        self._profile_revisions[user_id] = self._profile_revisions.get(user_id, 0) + 1
+        self._profile_epoch += 1
 
     def _query_owned_personal_workspaces(
         self,
@@ -825,6 +980,28 @@ class AuthService:
         ).fetchall()
         return {str(row["workspace_id"]) for row in rows}
 
+    def _accessible_workspaces(self, conn: sqlite3.Connection, user_id: int) -> list[str]:
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(
+            """
+            SELECT workspace
+            FROM user_workspace_access
+            WHERE user_id = ?
+            ORDER BY workspace ASC
+            """,
+            (user_id,),
+        ).fetchall()
+        from_acl = {str(row["workspace"]) for row in rows}
+        # 个人工作空间由 owner 自动可见，不依赖 ACL 显式分配。
+        personal_rows = self._query_owned_personal_workspaces(conn, user_id)
+        accessible = from_acl.union(personal_rows)
+        # 兜底过滤：若 ACL 中误配置了他人 personal workspace，这里自动剔除。
+        return sorted(
+            workspace
+            for workspace in accessible
+            if self._is_workspace_accessible_for_user(conn, user_id, workspace)
+        )
+
     def _is_workspace_accessible_for_user(
         self,
         conn: sqlite3.Connection,
@@ -883,7 +1060,7 @@ class AuthService:
         return row is not None
 
     def _validate_username(self, username: str) -> None:
-        if not _USERNAME_PATTERN.match(username):
+        if not _USERNAME_PATTERN.fullmatch(username):
             raise AuthInvalidCredentialsError(
                 message="用户名格式不合法（3-32位，字母数字_.-）"
             )
@@ -905,29 +1082,57 @@ class AuthService:
 
     def _hash_password(self, password: str) -> str:
         salt = secrets.token_bytes(16)
-        iterations = 120_000
-        digest = hashlib.pbkdf2_hmac(
-            "sha256", password.encode("utf-8"), salt, iterations
-        )
-        return "pbkdf2_sha256${}${}${}".format(
-            iterations, salt.hex(), digest.hex()
+        digest = self._scrypt(password, salt, _SCRYPT_N, _SCRYPT_R, _SCRYPT_P)
+        return "scrypt${}${}${}${}${}".format(
+            _SCRYPT_N, _SCRYPT_R, _SCRYPT_P, salt.hex(), digest.hex()
         )
 
     def _verify_password(self, password: str, encoded: str) -> bool:
+        """
+        校验密码。
+
+        说明：
+        - 新格式：scrypt$n$r$p$salt$digest。
+        - 兼容历史 pbkdf2_sha256$iterations$salt$digest 记录，登录成功后按新格式重写。
+        - 记录缺失或无法解析时仍按当前参数执行一次 scrypt 再返回 False，
+          耗时与正常校验一致，不泄露“用户不存在/哈希损坏”。
+        """
+        algo, _, params = encoded.partition("$")
         try:
-            algo, iter_str, salt_hex, digest_hex = encoded.split("$")
-            if algo != "pbkdf2_sha256":
-                return False
-            iterations = int(iter_str)
-            salt = bytes.fromhex(salt_hex)
-            expected = bytes.fromhex(digest_hex)
+            if algo == "scrypt":
+                n_str, r_str, p_str, salt_hex, digest_hex = params.split("$")
+                salt = bytes.fromhex(salt_hex)
+                expected = bytes.fromhex(digest_hex)
+                actual = self._scrypt(password, salt, int(n_str), int(r_str), int(p_str))
+                return hmac.compare_digest(actual, expected)
+            if algo == "pbkdf2_sha256":
+                iter_str, salt_hex, digest_hex = params.split("$")
+                salt = bytes.fromhex(salt_hex)
+                expected = bytes.fromhex(digest_hex)
+                actual = hashlib.pbkdf2_hmac(
+                    "sha256", password.encode("utf-8"), salt, int(iter_str)
+                )
+                return hmac.compare_digest(actual, expected)
         except Exception:
-            return False
+            pass
+        self._scrypt(password, bytes(16), _SCRYPT_N, _SCRYPT_R, _SCRYPT_P)
+        return False
+
+    def _password_needs_rehash(self, encoded: str) -> bool:
+        return not encoded.startswith(
+            "scrypt${}${}${}$".format(_SCRYPT_N, _SCRYPT_R, _SCRYPT_P)
+        )
 
-        actual = hashlib.pbkdf2_hmac(
-            "sha256", password.encode("utf-8"), salt, iterations
+    def _scrypt(self, password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+        return hashlib.scrypt(
+            password.encode("utf-8"),
+            salt=salt,
+            n=n,
+            r=r,
+            p=p,
+            maxmem=_SCRYPT_MAXMEM,
+            dklen=_SCRYPT_DKLEN,
         )
-        return hmac.compare_digest(actual, expected)
 
     def _ensure_user_extension_columns(self, conn: sqlite3.Connection) -> None:
         """
@@ -971,6 +1176,58 @@ class AuthService:
             """
         )
 
+    def _ensure_auth_token_columns(self, conn: sqlite3.Connection) -> None:
+        """
+        为 auth_tokens 补充整数过期时间列并回填历史数据（可重复执行）。
+
+        说明：
+        - 登录态校验按 expires_at_epoch 做整数比较，不再逐次解析 ISO 时间字符串。
+        - expires_at 文本列继续写入，保持历史结构兼容。
+        """
+        rows = conn.execute("PRAGMA table_info(auth_tokens)").fetchall()
+        if "expires_at_epoch" not in {str(row[1]) for row in rows}:
+            conn.execute("ALTER TABLE auth_tokens ADD COLUMN expires_at_epoch INTEGER")
+        conn.execute(
+            """
+            UPDATE auth_tokens
+            SET expires_at_epoch = CAST(strftime('%s', expires_at) AS INTEGER)
+            WHERE expires_at_epoch IS NULL
+            """
+        )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_auth_tokens_expires_at_epoch
+            ON auth_tokens(expires_at_epoch)
+            """
+        )
+
+    def _insert_auth_token(
+        self,
+        conn: sqlite3.Connection,
+        token: str,
+        user_id: int,
+        now: datetime,
+        expires: datetime,
+    ) -> None:
+        # 顺带按索引清理已过期的登录态，避免表无限增长。
+        conn.execute(
+            "DELETE FROM auth_tokens WHERE expires_at_epoch <= ?",
+            (int(now.timestamp()),),
+        )
+        conn.execute(
+            """
+            INSERT INTO auth_tokens (token, user_id, created_at, expires_at, expires_at_epoch)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (
+                _auth_token_key(token),
+                user_id,
+                now.isoformat(),
+                expires.isoformat(),
+                int(expires.timestamp()),
+            ),
+        )
+
     def _generate_unique_feishu_username(
         self, conn: sqlite3.Connection, union_id: str
     ) -> str:
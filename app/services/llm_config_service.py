@@ -3,10 +3,16 @@ from dataclasses import dataclass
 from datetime import datetime, timezone
 import sqlite3
 
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.core.errors import AppError, AuthForbiddenError
 from app.services.auth_service import AuthUser
 
+# 每条会话消息都会读取激活配置生成运行环境变量；配置只在管理端改动，
+# 短 TTL 缓存即可省去重复的 SQLite 查询，本进程内写操作后主动失效。
+_ACTIVE_ENV_CACHE_TTL_SECONDS = 5.0
+_ACTIVE_ENV_CACHE_KEY = "active_env"
+
 
 class LlmConfigNotFoundError(AppError):
     def __init__(self, config_id: int):
@@ -36,6 +42,10 @@ class LlmConfig:
 class LlmConfigService:
     def __init__(self, db_path: str) -> None:
         self._db_path = db_path
+        self._env_cache: TTLCache[str, dict[str, str]] = TTLCache(
+            maxsize=1,
+            ttl_seconds=_ACTIVE_ENV_CACHE_TTL_SECONDS,
+        )
 
     def init_db(self) -> None:
         with closing(sqlite3.connect(self._db_path)) as conn:
@@ -178,6 +188,7 @@ class LlmConfigService:
                     status_code=409,
                 ) from exc
             conn.commit()
+        self._env_cache.clear()
         return self.get_config(current_user, config_id)
 
     def activate_config(self, current_user: AuthUser, config_id: int) -> LlmConfig:
@@ -192,6 +203,7 @@ class LlmConfigService:
             if cursor.rowcount == 0:
                 raise LlmConfigNotFoundError(config_id)
             conn.commit()
+        self._env_cache.clear()
         return self.get_config(current_user, config_id)
 
     def delete_config(self, current_user: AuthUser, config_id: int) -> None:
@@ -199,8 +211,9 @@ class LlmConfigService:
         with closing(sqlite3.connect(self._db_path)) as conn:
             cursor = conn.execute("DELETE FROM llm_configs WHERE id=?", (config_id,))
             conn.commit()
-            if cursor.rowcount == 0:
-                raise LlmConfigNotFoundError(config_id)
+        self._env_cache.clear()
+        if cursor.rowcount == 0:
+            raise LlmConfigNotFoundError(config_id)
 
     def get_config(self, current_user: AuthUser, config_id: int) -> LlmConfig:
         self._ensure_superadmin(current_user)
@@ -221,6 +234,14 @@ class LlmConfigService:
             return self._row_to_config(row)
 
     def get_active_env(self) -> dict[str, str]:
+        cached = self._env_cache.get(_ACTIVE_ENV_CACHE_KEY)
+        if cached is None:
+            cached = self._load_active_env()
+            self._env_cache.set(_ACTIVE_ENV_CACHE_KEY, cached)
+        # 返回副本，避免调用方改动污染缓存。
+        return dict(cached)
+
+    def _load_active_env(self) -> dict[str, str]:
         with closing(sqlite3.connect(self._db_path)) as conn:
             conn.row_factory = sqlite3.Row
             row = conn.execute(
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime, timezone
+import os
 from pathlib import Path
 
 from app.core.errors import AppError
@@ -71,7 +72,7 @@ class MarkdownContent:
 
 class MarkdownService:
     def build_index(self, workspace: str, workspace_path: Path) -> list[MarkdownNode]:
-        return self._walk_dir(workspace_path, workspace_path)
+        return self._walk_dir(workspace_path)
 
     def read_markdown_content(
         self,
@@ -103,37 +104,41 @@ class MarkdownService:
             content=content,
         )
 
-    def _walk_dir(self, root: Path, current: Path) -> list[MarkdownNode]:
+    def _walk_dir(self, current: Path, rel_prefix: str = "") -> list[MarkdownNode]:
+        # os.scandir 的 DirEntry 自带类型缓存，排序与分支判断不再重复 stat；
+        # 相对路径按字符串拼接，省去每个条目的 relative_to 计算。
+        with os.scandir(current) as iterator:
+            entries = sorted(
+                ((entry.is_dir(), entry) for entry in iterator),
+                key=lambda item: (not item[0], item[1].name.lower()),
+            )
         nodes: list[MarkdownNode] = []
-        entries = sorted(
-            current.iterdir(),
-            key=lambda p: (not p.is_dir(), p.name.lower()),
-        )
-        for entry in entries:
-            if entry.is_dir():
+        for is_dir, entry in entries:
+            relative = rel_prefix + entry.name
+            if is_dir:
                 if entry.name in IGNORED_DIRS:
                     continue
-                children = self._walk_dir(root, entry)
+                children = self._walk_dir(Path(entry.path), relative + "/")
                 if not children:
                     continue
                 nodes.append(
                     MarkdownNode(
                         type="dir",
                         name=entry.name,
-                        path=entry.relative_to(root).as_posix(),
+                        path=relative,
                         children=children,
                     )
                 )
                 continue
 
-            if entry.suffix.lower() not in MARKDOWN_SUFFIXES:
+            if Path(entry.name).suffix.lower() not in MARKDOWN_SUFFIXES:
                 continue
             stat = entry.stat()
             nodes.append(
                 MarkdownNode(
                     type="file",
                     name=entry.name,
-                    path=entry.relative_to(root).as_posix(),
+                    path=relative,
                     size=stat.st_size,
                     mtime=datetime.fromtimestamp(
                         stat.st_mtime,
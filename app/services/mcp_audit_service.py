@@ -1,13 +1,24 @@
 from __future__ import annotations
 
+import logging
 import os
+import queue
 import sqlite3
+import threading
+import time
 from contextlib import closing
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+# 后台批量落库：攒满一批或等待窗口结束即写入一次。
+_AUDIT_BATCH_SIZE = 64
+_AUDIT_BATCH_WINDOW_SECONDS = 0.1
+_AUDIT_QUEUE_MAXSIZE = 4096
+
 
 @dataclass(frozen=True)
 class McpAuditRecord:
@@ -22,6 +33,12 @@ class McpAuditRecord:
 class McpAuditService:
     def __init__(self, db_path: str) -> None:
         self._db_path = db_path
+        # 队列元素为 (审计记录, 入队时间)；None 为停止信号。
+        self._queue: queue.Queue[tuple[McpAuditRecord, str] | None] = queue.Queue(
+            maxsize=_AUDIT_QUEUE_MAXSIZE
+        )
+        self._writer: threading.Thread | None = None
+        self._writer_lock = threading.Lock()
 
     def init_db(self) -> None:
         os.makedirs(os.path.dirname(self._db_path), exist_ok=True)
@@ -43,24 +60,113 @@ class McpAuditService:
             conn.commit()
 
     def append(self, record: McpAuditRecord) -> None:
+        self.append_many([record])
+
+    def append_many(self, records: list[McpAuditRecord]) -> None:
         now = datetime.now(timezone.utc).isoformat()
+        self._insert([(record, now) for record in records])
+
+    def enqueue(self, record: McpAuditRecord) -> None:
+        """
+        异步记录审计日志。
+
+        说明：
+        - 后台写入线程运行时只做入队，请求不再等待 SQLite 写入。
+        - 写入线程未启动（或正在停止）、队列已满时退化为同步写入，保证记录不丢失。
+        - 判断与入队在同一把锁内完成，停止信号之后不会再有记录入队。
+        """
+        created_at = datetime.now(timezone.utc).isoformat()
+        with self._writer_lock:
+            if self._writer is not None:
+                try:
+                    self._queue.put_nowait((record, created_at))
+                    return
+                except queue.Full:
+                    pass
+        self._insert([(record, created_at)])
+
+    def start_writer(self) -> None:
+        with self._writer_lock:
+            if self._writer is not None:
+                return
+            thread = threading.Thread(
+                target=self._writer_loop,
+                name="mcp-audit-writer",
+                daemon=True,
+            )
+            self._writer = thread
+            thread.start()
+
+    def stop_writer(self, timeout: float = 5.0) -> None:
+        """停止后台写入线程，退出前写完队列中剩余的记录。"""
+        with self._writer_lock:
+            thread = self._writer
+            if thread is None:
+                return
+            self._writer = None
+            self._queue.put(None)
+        thread.join(timeout)
+        # 写入线程超时未退出时，队列里可能仍有记录，由当前线程补写。
+        leftover: list[tuple[McpAuditRecord, str]] = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                leftover.append(item)
+        self._insert(leftover)
+
+    def _writer_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stopping = False
+            deadline = time.monotonic() + _AUDIT_BATCH_WINDOW_SECONDS
+            while len(batch) < _AUDIT_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                self._insert(batch)
+            except Exception:
+                logger.exception("mcp audit batch write failed size=%s", len(batch))
+            if stopping:
+                return
+
+    def _insert(self, rows: list[tuple[McpAuditRecord, str]]) -> None:
+        if not rows:
+            return
         with closing(sqlite3.connect(self._db_path)) as conn:
-            conn.execute(
+            conn.executemany(
                 """
                 INSERT INTO mcp_audit_logs (
                     user_id, tool_name, workspace, path_or_query,
                     elapsed_ms, status, created_at
                 ) VALUES (?, ?, ?, ?, ?, ?, ?)
                 """,
-                (
-                    record.user_id,
-                    record.tool_name,
-                    record.workspace,
-                    record.path_or_query,
-                    record.elapsed_ms,
-                    record.status,
-                    now,
-                ),
+                [
+                    (
+                        record.user_id,
+                        record.tool_name,
+                        record.workspace,
+                        record.path_or_query,
+                        record.elapsed_ms,
+                        record.status,
+                        created_at,
+                    )
+                    for record, created_at in rows
+                ],
             )
             conn.commit()
 
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 from contextvars import ContextVar
 import logging
 from typing import Annotated, Any
@@ -105,8 +106,7 @@ class _McpAuthMiddleware(BaseHTTPMiddleware):
 
             if not raw_token:
                 raise AuthRequiredError()
-            user_id = mcp_token_service.verify_token(raw_token)
-            current_user = auth_service.get_user_by_id(user_id)
+            current_user = await asyncio.to_thread(_load_mcp_user, raw_token)
         except AppError as exc:
             return JSONResponse(
                 status_code=exc.status_code,
@@ -131,6 +131,11 @@ class _McpAuthMiddleware(BaseHTTPMiddleware):
             _CURRENT_MCP_USER.reset(token)
 
 
+def _load_mcp_user(raw_token: str) -> AuthUser:
+    user_id = mcp_token_service.verify_token(raw_token)
+    return auth_service.get_user_by_id(user_id)
+
+
 def _require_current_user() -> AuthUser:
     current_user = _CURRENT_MCP_USER.get()
     if current_user is None:
@@ -138,10 +143,13 @@ def _require_current_user() -> AuthUser:
     return current_user
 
 
-def _safe_tool_call(name: str, arguments: dict[str, Any]) -> dict[str, Any]:
+async def _safe_tool_call(name: str, arguments: dict[str, Any]) -> dict[str, Any]:
     current_user = _require_current_user()
     bound_workspace = _CURRENT_BOUND_WORKSPACE.get()
-    data = execute_mcp_tool(
+    # FastMCP 在事件循环内直接调用同步工具函数；文件遍历/读盘/git 查询放到线程池，
+    # 使并发的工具调用可以重叠 I/O 等待。
+    data = await asyncio.to_thread(
+        execute_mcp_tool,
         current_user=current_user,
         tool=name,
         arguments=arguments,
@@ -176,11 +184,11 @@ def build_fastmcp_asgi_app():
             "在绑定工作空间模式下仅返回当前绑定 workspace，并附带绑定模式提示。"
         ),
     )
-    def list_workspaces(workspace: str | None = None) -> dict[str, Any]:
+    async def list_workspaces(workspace: str | None = None) -> dict[str, Any]:
         arguments: dict[str, Any] = {}
         if workspace:
             arguments["workspace"] = workspace
-        return _safe_tool_call("list_workspaces", arguments)
+        return await _safe_tool_call("list_workspaces", arguments)
 
     @mcp.tool(
         name="list_files",
@@ -189,7 +197,7 @@ def build_fastmcp_asgi_app():
             "适合先做目录探测，再决定 read_file/grep_files 的目标路径。"
         ),
     )
-    def list_files(
+    async def list_files(
         workspace: Annotated[
             str | None,
             Field(
@@ -215,7 +223,7 @@ def build_fastmcp_asgi_app():
             ),
         ] = False,
     ) -> dict[str, Any]:
-        return _safe_tool_call(
+        return await _safe_tool_call(
             "list_files",
             {
                 "workspace": workspace,
@@ -232,7 +240,7 @@ def build_fastmcp_asgi_app():
             "返回内容包含行号范围，便于后续精确引用。"
         ),
     )
-    def read_file(
+    async def read_file(
         path: Annotated[
             str,
             Field(
@@ -254,7 +262,7 @@ def build_fastmcp_asgi_app():
             Field(description="结束行号（包含该行）。"),
         ] = 300,
     ) -> dict[str, Any]:
-        return _safe_tool_call(
+        return await _safe_tool_call(
             "read_file",
             {
                 "workspace": workspace,
@@ -271,7 +279,7 @@ def build_fastmcp_asgi_app():
             "适合做快速定位，再配合 read_file 读取上下文。"
         ),
     )
-    def grep_files(
+    async def grep_files(
         pattern: Annotated[
             str,
             Field(
@@ -297,7 +305,7 @@ def build_fastmcp_asgi_app():
             Field(description="最多返回匹配条数，默认 20。"),
         ] = 20,
     ) -> dict[str, Any]:
-        return _safe_tool_call(
+        return await _safe_tool_call(
             "grep_files",
             {
                 "workspace": workspace,
@@ -314,7 +322,7 @@ def build_fastmcp_asgi_app():
             "当问题是自然语言描述时优先使用，适合跨文件语义召回。"
         ),
     )
-    def semantic_search(
+    async def semantic_search(
         query: Annotated[
             str,
             Field(description="语义检索查询文本（必填）。"),
@@ -330,7 +338,7 @@ def build_fastmcp_asgi_app():
             Field(description="返回结果数量，默认 8。"),
         ] = 8,
         ) -> dict[str, Any]:
-        return _safe_tool_call(
+        return await _safe_tool_call(
             "semantic_search",
             {
                 "workspace": workspace,
@@ -353,7 +361,7 @@ def build_fastmcp_asgi_app():
             "若需要查看具体改动，请继续调用 get_git_commit_detail。"
         ),
     )
-    def search_git_commits(
+    async def search_git_commits(
         start_time: Annotated[
             str,
             Field(
@@ -393,7 +401,7 @@ def build_fastmcp_asgi_app():
             Field(description="作者名过滤，非必填；用于缩小候选提交范围。"),
         ] = None,
     ) -> dict[str, Any]:
-        return _safe_tool_call(
+        return await _safe_tool_call(
             "search_git_commits",
             {
                 "workspace": workspace,
@@ -416,7 +424,7 @@ def build_fastmcp_asgi_app():
             "返回内容中的 patch 可能因体积过大而被截断，若已截断应结合 changed_files 继续缩小分析范围。"
         ),
     )
-    def get_git_commit_detail(
+    async def get_git_commit_detail(
         commit_id: Annotated[
             str,
             Field(
@@ -441,7 +449,7 @@ def build_fastmcp_asgi_app():
             ),
         ] = None,
     ) -> dict[str, Any]:
-        return _safe_tool_call(
+        return await _safe_tool_call(
             "get_git_commit_detail",
             {
                 "workspace": workspace,
@@ -457,7 +465,7 @@ def build_fastmcp_asgi_app():
             "当语义检索结果不稳定时，可用该工具提升精确命中率。"
         ),
     )
-    def hybrid_search(
+    async def hybrid_search(
         query: Annotated[
             str,
             Field(description="混合检索查询文本（必填）。"),
@@ -473,7 +481,7 @@ def build_fastmcp_asgi_app():
             Field(description="返回结果数量，默认 8。"),
         ] = 8,
     ) -> dict[str, Any]:
-        return _safe_tool_call(
+        return await _safe_tool_call(
             "hybrid_search",
             {
                 "workspace": workspace,
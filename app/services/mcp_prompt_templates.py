@@ -77,13 +77,18 @@ def prompt_list_for_rpc(*, bound_workspace: str | None = None) -> list[dict[str,
 
     bound_workspace 不为空时，表示当前入口已经绑定工作空间；
     为避免重复输入，list 展示时会隐藏 workspace 参数。
+    结果与具体 workspace 无关，两种形态在导入时预先构建，调用方不得修改返回值。
     """
 
+    return _BOUND_PROMPT_LIST if bound_workspace else _GENERAL_PROMPT_LIST
+
+
+def _build_prompt_list(*, hide_workspace: bool) -> list[dict[str, Any]]:
     result: list[dict[str, Any]] = []
     for template in PROMPT_TEMPLATES.values():
         args = []
         for arg in template.arguments:
-            if bound_workspace and arg.name == "workspace":
+            if hide_workspace and arg.name == "workspace":
                 continue
             args.append(
                 {
@@ -102,6 +107,10 @@ def prompt_list_for_rpc(*, bound_workspace: str | None = None) -> list[dict[str,
     return result
 
 
+_GENERAL_PROMPT_LIST = _build_prompt_list(hide_workspace=False)
+_BOUND_PROMPT_LIST = _build_prompt_list(hide_workspace=True)
+
+
 def render_prompt_text(
     *,
     name: str,
@@ -6,14 +6,26 @@ import hmac
 import os
 import secrets
 import sqlite3
+import time
 from contextlib import closing
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from urllib.parse import urlparse
 
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.core.errors import AppError
 
+# 配置读取位于每个请求的热路径（入口中间件解析 MCP path、工具调用开关检查），
+# 短 TTL 缓存即可消除重复的 SQLite 查询与解密；本进程内更新时主动失效。
+_SETTINGS_CACHE_TTL_SECONDS = 2.0
+_SETTINGS_CACHE_KEY = "settings"
+# 入口中间件每个请求都要读取 MCP path：保存一份带过期时间的快照，命中时只做一次单调时钟比较，
+# 不再进入 TTLCache 的锁。
+_BASE_PATH_SNAPSHOT_TTL_SECONDS = 5.0
+# 前端构建产物目录；入口中间件对这些前缀直接放行，MCP path 不能设在其下。
+STATIC_ASSET_PREFIXES = ("/assets/", "/canvaskit/", "/icons/", "/vendor/")
+
 
 @dataclass(frozen=True)
 class McpSettings:
@@ -84,6 +96,12 @@ class McpSettingsService:
 
     def __init__(self, db_path: str) -> None:
         self._db_path = db_path
+        self._settings_cache: TTLCache[str, McpSettings] = TTLCache(
+            maxsize=1,
+            ttl_seconds=_SETTINGS_CACHE_TTL_SECONDS,
+        )
+        # (过期时间, mcp_base_path)；整体替换元组，读取无需加锁。
+        self._base_path_snapshot: tuple[float, str] | None = None
 
     def init_db(self) -> None:
         os.makedirs(os.path.dirname(self._db_path), exist_ok=True)
@@ -100,62 +118,22 @@ class McpSettingsService:
             )
             conn.commit()
 
-    def get_settings(self) -> McpSettings:
-        all_values = self._get_all_settings()
+    def get_cached_settings(self) -> McpSettings | None:
+        """
+        仅从内存缓存读取设置，不访问数据库。
 
-        encrypted_api_key = self._normalize(
-            all_values.get(self._KEY_EMBEDDING_API_KEY_ENCRYPTED)
-        )
-        api_key = self._decrypt(encrypted_api_key) if encrypted_api_key else None
+        说明：
+        - 供事件循环内的快速路径使用；未命中时由调用方在线程池中改走 get_settings()。
+        """
+        return self._settings_cache.get(_SETTINGS_CACHE_KEY)
 
-        return McpSettings(
-            mcp_enabled=self._to_bool(all_values.get(self._KEY_MCP_ENABLED), True),
-            mcp_base_path=self._normalize_mcp_path(
-                self._normalize(all_values.get(self._KEY_MCP_BASE_PATH)) or "/mcp"
-            ),
-            mcp_public_base_url=self._normalize_base_url(
-                self._normalize(all_values.get(self._KEY_MCP_PUBLIC_BASE_URL))
-            ),
-            kb_enable_vector=self._to_bool(
-                all_values.get(self._KEY_KB_ENABLE_VECTOR),
-                True,
-            ),
-            kb_chroma_dir=self._normalize(all_values.get(self._KEY_KB_CHROMA_DIR))
-            or "./data/chroma",
-            kb_vector_topk_default=self._to_int(
-                all_values.get(self._KEY_KB_VECTOR_TOPK_DEFAULT),
-                8,
-                min_value=1,
-                max_value=50,
-            ),
-            kb_file_max_bytes=self._to_int(
-                all_values.get(self._KEY_KB_FILE_MAX_BYTES),
-                1_048_576,
-                min_value=1024,
-                max_value=20_971_520,
-            ),
-            kb_read_max_lines=self._to_int(
-                all_values.get(self._KEY_KB_READ_MAX_LINES),
-                2000,
-                min_value=10,
-                max_value=20_000,
-            ),
-            embedding_backend=self._normalize(
-                all_values.get(self._KEY_EMBEDDING_BACKEND)
-            )
-            or "openai_compatible",
-            embedding_base_url=self._normalize_base_url(
-                self._normalize(all_values.get(self._KEY_EMBEDDING_BASE_URL))
-            ),
-            embedding_model=self._normalize(all_values.get(self._KEY_EMBEDDING_MODEL)),
-            embedding_batch_size=self._to_int(
-                all_values.get(self._KEY_EMBEDDING_BATCH_SIZE),
-                32,
-                min_value=1,
-                max_value=512,
-            ),
-            embedding_api_key=api_key,
-        )
+    def get_settings(self) -> McpSettings:
+        cached = self._settings_cache.get(_SETTINGS_CACHE_KEY)
+        if cached is not None:
+            return cached
+        settings_value = self._load_settings()
+        self._settings_cache.set(_SETTINGS_CACHE_KEY, settings_value)
+        return settings_value
 
     def get_settings_view(self, *, is_superadmin: bool) -> McpSettingsView:
         settings_value = self.get_settings()
@@ -212,10 +190,18 @@ class McpSettingsService:
                     conn, self._KEY_MCP_ENABLED, "true" if mcp_enabled else "false", now
                 )
             if mcp_base_path is not None:
+                normalized_base_path = self._normalize_mcp_path(mcp_base_path)
+                if f"{normalized_base_path}/".startswith(STATIC_ASSET_PREFIXES):
+                    raise AppError(
+                        code="MCP_SETTINGS_INVALID",
+                        message="mcp_base_path conflicts with frontend static assets",
+                        details={"mcp_base_path": mcp_base_path},
+                        status_code=400,
+                    )
                 self._upsert_setting(
                     conn,
                     self._KEY_MCP_BASE_PATH,
-                    self._normalize_mcp_path(mcp_base_path),
+                    normalized_base_path,
                     now,
                 )
             if mcp_public_base_url is not None:
@@ -304,13 +290,20 @@ class McpSettingsService:
                 )
 
             conn.commit()
+        self._settings_cache.clear()
+        self._base_path_snapshot = None
 
         return self.get_settings_view(is_superadmin=is_superadmin)
 
     def resolve_mcp_base_path(self) -> str:
         """运行时读取当前 MCP path，支持修改后立即生效。"""
-        settings_value = self.get_settings()
-        return settings_value.mcp_base_path
+        now = time.monotonic()
+        snapshot = self._base_path_snapshot
+        if snapshot is not None and now < snapshot[0]:
+            return snapshot[1]
+        base_path = self.get_settings().mcp_base_path
+        self._base_path_snapshot = (now + _BASE_PATH_SNAPSHOT_TTL_SECONDS, base_path)
+        return base_path
 
     def build_mcp_url(self, host_base_url: str) -> tuple[str, str]:
         cfg = self.get_settings()
@@ -354,6 +347,63 @@ class McpSettingsService:
             (key, value, now, now),
         )
 
+    def _load_settings(self) -> McpSettings:
+        all_values = self._get_all_settings()
+
+        encrypted_api_key = self._normalize(
+            all_values.get(self._KEY_EMBEDDING_API_KEY_ENCRYPTED)
+        )
+        api_key = self._decrypt(encrypted_api_key) if encrypted_api_key else None
+
+        return McpSettings(
+            mcp_enabled=self._to_bool(all_values.get(self._KEY_MCP_ENABLED), True),
+            mcp_base_path=self._normalize_mcp_path(
+                self._normalize(all_values.get(self._KEY_MCP_BASE_PATH)) or "/mcp"
+            ),
+            mcp_public_base_url=self._normalize_base_url(
+                self._normalize(all_values.get(self._KEY_MCP_PUBLIC_BASE_URL))
+            ),
+            kb_enable_vector=self._to_bool(
+                all_values.get(self._KEY_KB_ENABLE_VECTOR),
+                True,
+            ),
+            kb_chroma_dir=self._normalize(all_values.get(self._KEY_KB_CHROMA_DIR))
+            or "./data/chroma",
+            kb_vector_topk_default=self._to_int(
+                all_values.get(self._KEY_KB_VECTOR_TOPK_DEFAULT),
+                8,
+                min_value=1,
+                max_value=50,
+            ),
+            kb_file_max_bytes=self._to_int(
+                all_values.get(self._KEY_KB_FILE_MAX_BYTES),
+                1_048_576,
+                min_value=1024,
+                max_value=20_971_520,
+            ),
+            kb_read_max_lines=self._to_int(
+                all_values.get(self._KEY_KB_READ_MAX_LINES),
+                2000,
+                min_value=10,
+                max_value=20_000,
+            ),
+            embedding_backend=self._normalize(
+                all_values.get(self._KEY_EMBEDDING_BACKEND)
+            )
+            or "openai_compatible",
+            embedding_base_url=self._normalize_base_url(
+                self._normalize(all_values.get(self._KEY_EMBEDDING_BASE_URL))
+            ),
+            embedding_model=self._normalize(all_values.get(self._KEY_EMBEDDING_MODEL)),
+            embedding_batch_size=self._to_int(
+                all_values.get(self._KEY_EMBEDDING_BATCH_SIZE),
+                32,
+                min_value=1,
+                max_value=512,
+            ),
+            embedding_api_key=api_key,
+        )
+
     def _get_all_settings(self) -> dict[str, str]:
         with closing(sqlite3.connect(self._db_path)) as conn:
             conn.row_factory = sqlite3.Row
@@ -40,6 +40,12 @@ class McpTokenService:
 
     def __init__(self, db_path: str) -> None:
         self._db_path = db_path
+        self._revision = 0
+
+    @property
+    def revision(self) -> int:
+        """令牌数据版本号；重置令牌后递增，供上层缓存判定失效。"""
+        return self._revision
 
     def init_db(self) -> None:
         os.makedirs(os.path.dirname(self._db_path), exist_ok=True)
@@ -121,6 +127,7 @@ class McpTokenService:
                 (user_id, token_hash, token_encrypted, prefix, now, now),
             )
             conn.commit()
+        self._revision += 1
 
         return McpResetTokenResult(token=token, token_hint=prefix, updated_at=now)
 
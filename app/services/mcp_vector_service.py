@@ -8,6 +8,8 @@ from pathlib import Path
 import re
 import sqlite3
 import subprocess
+import threading
+from concurrent.futures import Future
 from contextlib import closing
 from dataclasses import dataclass
 from datetime import datetime, timezone
@@ -22,6 +24,10 @@ from app.services.workspace_service import workspace_service
 
 logger = logging.getLogger(__name__)
 
+# 查询向量化的合并窗口与单批上限：并发检索在窗口内合并为一次 embedding 请求。
+_QUERY_EMBED_WINDOW_SECONDS = 0.02
+_QUERY_EMBED_MAX_BATCH = 16
+
 
 @dataclass(frozen=True)
 class IndexProgress:
@@ -86,6 +92,13 @@ class McpVectorService:
 
     def __init__(self, db_path: str) -> None:
         self._db_path = db_path
+        self._query_batcher = _QueryEmbeddingBatcher(
+            lambda texts: self._embed_texts(texts),
+            window_seconds=_QUERY_EMBED_WINDOW_SECONDS,
+            max_batch=_QUERY_EMBED_MAX_BATCH,
+            # 与索引路径一致，遵守管理员配置的单次 embedding 条数上限。
+            batch_limit=lambda: mcp_settings_service.get_settings().embedding_batch_size,
+        )
 
     def init_db(self) -> None:
         os.makedirs(os.path.dirname(self._db_path), exist_ok=True)
@@ -305,7 +318,7 @@ class McpVectorService:
                 status_code=400,
             )
 
-        query_vector = self._embed_texts([query])[0]
+        query_vector = self._query_batcher.embed(query)
         collection = self._collection()
         result = collection.query(
             query_embeddings=[query_vector],
@@ -1020,4 +1033,70 @@ class McpVectorService:
         return int((datetime.now(timezone.utc) - started).total_seconds() * 1000)
 
 
+class _QueryEmbeddingBatcher:
+    """
+    合并并发的查询向量化请求。
+
+    说明：
+    - 工具调用运行在线程池中；首个到达的线程作为本批次发起者，等待一个短窗口
+      （或凑满一批）后，用一次 embedding 请求处理窗口内的全部查询。
+    - 其余线程只等待各自的 Future；批量请求失败时，异常传递给该批次的所有调用方。
+    - 单批条数取 max_batch 与 batch_limit()（服务端配置）中的较小值，超出部分拆成多次请求。
+    """
+
+    def __init__(
+        self,
+        embed_many: Callable[[list[str]], list[list[float]]],
+        *,
+        window_seconds: float,
+        max_batch: int,
+        batch_limit: Callable[[], int] | None = None,
+    ) -> None:
+        self._embed_many = embed_many
+        self._window_seconds = window_seconds
+        self._max_batch = max_batch
+        self._batch_limit = batch_limit
+        self._lock = threading.Lock()
+        self._pending: list[tuple[str, Future[list[float]]]] = []
+        self._batch_full = threading.Event()
+        self._collecting = False
+
+    def embed(self, text: str) -> list[float]:
+        future: Future[list[float]] = Future()
+        max_batch = self._batch_size()
+        with self._lock:
+            self._pending.append((text, future))
+            leader = not self._collecting
+            if leader:
+                self._collecting = True
+                self._batch_full.clear()
+            elif len(self._pending) >= max_batch:
+                self._batch_full.set()
+
+        if leader:
+            self._batch_full.wait(self._window_seconds)
+            with self._lock:
+                batch = self._pending
+                self._pending = []
+                self._collecting = False
+            for start in range(0, len(batch), max_batch):
+                self._run_batch(batch[start : start + max_batch])
+        return future.result()
+
+    def _batch_size(self) -> int:
+        if self._batch_limit is None:
+            return self._max_batch
+        return max(1, min(self._max_batch, self._batch_limit()))
+
+    def _run_batch(self, batch: list[tuple[str, Future[list[float]]]]) -> None:
+        try:
+            vectors = self._embed_many([text for text, _ in batch])
+        except BaseException as exc:
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+        for (_, future), vector in zip(batch, vectors):
+            future.set_result(vector)
+
+
 mcp_vector_service = McpVectorService(str(settings.sqlite_db_path))
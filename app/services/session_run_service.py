@@ -2,11 +2,14 @@ import asyncio
 import json
 from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
+from functools import cached_property
 from pathlib import Path
 from threading import RLock
 import shutil
 from uuid import uuid4
 
+import orjson
+
 from app.core.config import settings
 from app.core.errors import AppError
 
@@ -32,6 +35,16 @@ class SessionRunEvent:
     title: str | None = None
     message: str | None = None
 
+    @cached_property
+    def json_bytes(self) -> bytes:
+        """
+        事件的 JSON 编码（UTF-8 字节），首次访问时生成并缓存。
+
+        说明：
+        - 落盘的 events.jsonl 行与 SSE 推送的 data 共用同一份编码，逐块输出时每个事件只序列化一次。
+        """
+        return orjson.dumps(asdict(self))
+
 
 @dataclass
 class SessionRunData:
@@ -60,7 +73,10 @@ class SessionRunService:
         self._root_dir.mkdir(parents=True, exist_ok=True)
         self._lock = RLock()
         # 内存订阅队列仅用于“实时推送”，历史回放依赖磁盘事件日志。
-        self._subscribers: dict[str, list[asyncio.Queue[SessionRunEvent]]] = {}
+        # 记录队列所属事件循环：append_event 可能在线程池中执行，需跨线程投递。
+        self._subscribers: dict[
+            str, list[tuple[asyncio.Queue[SessionRunEvent], asyncio.AbstractEventLoop]]
+        ] = {}
 
     def create_run(self, *, session_id: str, user_id: int, prompt: str) -> SessionRunData:
         now = datetime.now(timezone.utc).isoformat()
@@ -143,6 +159,7 @@ class SessionRunService:
 
         注意：
         - 先落盘再广播，确保前端即使断线也可用 after_seq 回放。
+        - 可在线程池中调用：广播经 call_soon_threadsafe 投递到订阅者所在的事件循环。
         """
         with self._lock:
             run = self._load_run(session_id=session_id, user_id=user_id, run_id=run_id)
@@ -170,11 +187,11 @@ class SessionRunService:
             subscribers = list(self._subscribers.get(run_id, []))
 
         # 广播不持锁，避免慢消费者阻塞写盘。
-        for queue in subscribers:
+        for queue, loop in subscribers:
             try:
-                queue.put_nowait(event)
-            except asyncio.QueueFull:
-                # 队列满时丢弃实时通知；客户端可通过 after_seq 回放补齐。
+                loop.call_soon_threadsafe(_offer_event, queue, event)
+            except RuntimeError:
+                # 订阅方事件循环已关闭，忽略即可。
                 continue
         return event
 
@@ -207,17 +224,20 @@ class SessionRunService:
             return events
 
     def subscribe(self, run_id: str) -> asyncio.Queue[SessionRunEvent]:
+        """
+        订阅 run 的实时事件；须在事件循环内调用。
+        """
         queue: asyncio.Queue[SessionRunEvent] = asyncio.Queue(maxsize=200)
+        loop = asyncio.get_running_loop()
         with self._lock:
-            self._subscribers.setdefault(run_id, []).append(queue)
+            self._subscribers.setdefault(run_id, []).append((queue, loop))
         return queue
 
     def unsubscribe(self, run_id: str, queue: asyncio.Queue[SessionRunEvent]) -> None:
         with self._lock:
-            queues = self._subscribers.get(run_id, [])
-            if queue in queues:
-                queues.remove(queue)
-            if not queues and run_id in self._subscribers:
+            entries = self._subscribers.get(run_id, [])
+            entries[:] = [entry for entry in entries if entry[0] is not queue]
+            if not entries and run_id in self._subscribers:
                 self._subscribers.pop(run_id, None)
 
     def has_running_run(self, *, session_id: str, user_id: int) -> bool:
@@ -295,9 +315,8 @@ class SessionRunService:
         event: SessionRunEvent,
     ) -> None:
         event_file = self._event_file(session_id=session_id, user_id=user_id, run_id=run_id)
-        serialized = json.dumps(asdict(event), ensure_ascii=False)
-        with event_file.open("a", encoding="utf-8") as fp:
-            fp.write(serialized + "\n")
+        with event_file.open("ab") as fp:
+            fp.write(event.json_bytes + b"\n")
 
     def _payload_to_run(self, payload: dict) -> SessionRunData:
         return SessionRunData(
@@ -323,4 +342,12 @@ class SessionRunService:
         )
 
 
+def _offer_event(queue: asyncio.Queue[SessionRunEvent], event: SessionRunEvent) -> None:
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        # 队列满时丢弃实时通知；客户端可通过 after_seq 回放补齐。
+        pass
+
+
 session_run_service = SessionRunService()
@@ -1,4 +1,5 @@
 import json
+import os
 from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
 from pathlib import Path
@@ -32,6 +33,8 @@ class SessionData:
 class SessionService:
     def __init__(self) -> None:
         self._store: dict[str, SessionData] = {}
+        # session_id -> 最近一次读写时会话文件的 (mtime_ns, size)，用于判定内存副本是否仍然有效。
+        self._file_stamps: dict[str, tuple[int, int]] = {}
         self._session_dir = (settings.data_dir / "sessions").resolve()
         self._session_dir.mkdir(parents=True, exist_ok=True)
 
@@ -126,7 +129,7 @@ class SessionService:
         if not user_dir.exists():
             return sessions
         for session_file in user_dir.glob("*.json"):
-            data = self._load_session_by_file(session_file)
+            data = self._load_session_if_changed(session_file)
             if data is None:
                 continue
             self._store[data.session_id] = data
@@ -161,6 +164,7 @@ class SessionService:
         if session_file.exists():
             session_file.unlink()
         self._store.pop(session_id, None)
+        self._file_stamps.pop(session_id, None)
         return session
 
     def _workspace_session_dir(self, workspace: str, create: bool = True) -> Path:
@@ -196,10 +200,12 @@ class SessionService:
                 for message in session.messages
             ],
         }
-        self._session_file(session.workspace, session.user_id, session.session_id).write_text(
+        session_file = self._session_file(session.workspace, session.user_id, session.session_id)
+        session_file.write_text(
             json.dumps(payload, ensure_ascii=False, indent=2),
             encoding="utf-8",
         )
+        self._file_stamps[session.session_id] = self._file_stamp(session_file.stat())
 
     def _load_session(self, session_id: str, user_id: int) -> SessionData | None:
         session_file = self._find_session_file(session_id=session_id, user_id=user_id)
@@ -214,6 +220,31 @@ class SessionService:
             return None
         return matches[0]
 
+    def _load_session_if_changed(self, session_file: Path) -> SessionData | None:
+        """
+        读取会话文件；文件自上次读写后未变化时直接复用内存中的会话。
+
+        说明：
+        - 会话列表每次都要遍历用户目录下全部会话文件，逐个读盘并解析完整消息历史。
+        - 以 (mtime_ns, size) 判定文件是否变化，其他进程写入后会自动重新加载。
+        """
+        try:
+            stamp = self._file_stamp(session_file.stat())
+        except FileNotFoundError:
+            return None
+        cached = self._store.get(session_file.stem)
+        if cached is not None and self._file_stamps.get(cached.session_id) == stamp:
+            return cached
+        data = self._load_session_by_file(session_file)
+        if data is not None:
+            # 先取 stamp 再读内容：读取期间若文件又被改写，下次比对不一致会再次加载。
+            self._file_stamps[data.session_id] = stamp
+        return data
+
+    @staticmethod
+    def _file_stamp(stat_result: os.stat_result) -> tuple[int, int]:
+        return stat_result.st_mtime_ns, stat_result.st_size
+
     def _load_session_by_file(self, session_file: Path) -> SessionData | None:
         if not session_file.exists():
             return None
@@ -1,3 +1,4 @@
+from collections.abc import Set
 from contextlib import closing, contextmanager
 import logging
 import os
@@ -13,6 +14,7 @@ from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from uuid import uuid4
 
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.core.errors import (
     WorkspaceAlreadyExistsError,
@@ -146,6 +148,8 @@ class WorkspaceService:
             self._personal_root_relative,
             "personal-agent",
         }
+        # workspace 引用 -> 已解析的工作空间目录；注册表增删后整体清空。
+        self._path_cache: TTLCache[str, Path] = TTLCache(maxsize=256, ttl_seconds=60)
 
     def init_db(self) -> None:
         with closing(sqlite3.connect(self._db_path)) as conn:
@@ -153,7 +157,7 @@ class WorkspaceService:
             self._backfill_legacy_workspaces(conn)
             conn.commit()
 
-    def list_workspaces(self, allowed_workspaces: set[str] | None = None) -> list[WorkspaceItem]:
+    def list_workspaces(self, allowed_workspaces: Set[str] | None = None) -> list[WorkspaceItem]:
         meta_map = self._workspace_meta_map()
         credential_map = (
             self._credential_service.list_workspace_credentials()
@@ -209,12 +213,19 @@ class WorkspaceService:
         return sorted(items, key=lambda x: x.name)
 
     def get_workspace_path(self, workspace_ref: str) -> Path:
+        # 命中缓存时跳过注册表查询与 resolve，仅保留一次目录存在性检查。
+        cached = self._path_cache.get(workspace_ref)
+        if cached is not None and cached.is_dir():
+            return cached
+
         meta = self.get_workspace_meta(workspace_ref)
         target = self._resolve_workspace_path(meta)
 
         if not target.exists() or not target.is_dir():
+            self._path_cache.pop(workspace_ref)
             raise WorkspaceNotFoundError(workspace_ref)
 
+        self._path_cache.set(workspace_ref, target)
         return target
 
     def get_workspace_meta(self, workspace_ref: str) -> WorkspaceMeta:
@@ -235,7 +246,7 @@ class WorkspaceService:
         self,
         workspace_ref: str,
         *,
-        allowed_workspace_ids: set[str] | None = None,
+        allowed_workspace_ids: Set[str] | None = None,
     ) -> WorkspaceMeta:
         """
         将前端/接口传入的 workspace 标识解析为唯一 workspace。
@@ -386,6 +397,8 @@ class WorkspaceService:
                 relative_path=target.relative_to(self._root_dir).as_posix(),
             )
             conn.commit()
+        # 新增同名个人空间可能让按名称的引用产生歧义，已缓存的解析结果需要作废。
+        self._path_cache.clear()
 
         normalized_url = git_url.strip() if git_url and git_url.strip() else None
         normalized_user = git_username.strip() if git_username and git_username.strip() else None
@@ -944,6 +957,7 @@ class WorkspaceService:
             ),
         )
         conn.commit()
+        self._path_cache.clear()
 
     def pull_workspace(
         self,
@@ -1244,6 +1258,7 @@ class WorkspaceService:
             raise WorkspaceDeleteError(workspace, str(exc)) from exc
 
         self._delete_workspace_registry(meta.workspace_id)
+        self._path_cache.clear()
         return WorkspaceDeleteResult(
             workspace=meta.workspace_name,
             deleted_at=datetime.now(timezone.utc).isoformat(),
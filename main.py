@@ -1,4 +1,10 @@
-from app.main import app
+def __getattr__(name: str):
+    # 按需导入：`python main.py` 的 reload 监督进程不构建应用，仅由 worker 子进程导入 app.main。
+    if name == "app":
+        from app.main import app
+
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
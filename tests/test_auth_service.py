@@ -1,3 +1,10 @@
+import base64
+from datetime import datetime, timedelta, timezone
+import hashlib
+import sqlite3
+import string
+import time
+
 import pytest
 
 from app.core.errors import (
@@ -162,6 +169,10 @@ def test_admin_can_update_normal_user_workspace_access(tmp_path):
     )
 
     assert updated == ["alpha", "beta"]
+    listed = {item.id: item for item in service.list_users(manager)}
+    assert service.get_user(manager, user.id) == listed[user.id]
+    assert service.get_user(manager, manager.id) == listed[manager.id]
+    assert service.get_user(manager, 9999) is None
 
 
 def test_admin_cannot_update_admin_workspace_access(tmp_path):
@@ -208,6 +219,7 @@ def test_admin_has_global_workspace_access(tmp_path):
 
     assert service.get_accessible_workspaces(manager) == []
     assert service.can_access_workspace(manager, "any-workspace") is True
+    assert service.get_accessible_workspace_set(manager) is None
 
 
 def test_admin_can_delete_self_created_normal_user(tmp_path):
@@ -356,6 +368,7 @@ def test_feishu_first_login_assigns_default_workspaces(tmp_path):
 
     assert first_login is True
     assert service.get_accessible_workspaces(user) == ["alpha", "beta"]
+    assert service.get_accessible_workspace_set(user) == frozenset({"alpha", "beta"})
 
 
 def test_set_local_password_enables_password_login_and_revokes_tokens(tmp_path):
@@ -407,3 +420,183 @@ def test_superadmin_can_reset_user_password_and_revoke_user_tokens(tmp_path):
 
     _, user_after_reset = service.login("user02", "newpass123")
     assert user_after_reset.has_local_password is True
+
+
+def test_login_upgrades_legacy_pbkdf2_hash(tmp_path):
+    db_path = tmp_path / "app.db"
+    service = AuthService(str(db_path))
+    service.init_db()
+    service.bootstrap_superadmin("admin", "password123")
+
+    salt = bytes(16)
+    digest = hashlib.pbkdf2_hmac("sha256", b"password123", salt, 1000)
+    legacy = f"pbkdf2_sha256$1000${salt.hex()}${digest.hex()}"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE users SET password_hash = ? WHERE username = 'admin'", (legacy,))
+
+    with pytest.raises(AuthInvalidCredentialsError):
+        service.login("admin", "wrong-password")
+    service.login("admin", "password123")
+
+    with sqlite3.connect(db_path) as conn:
+        stored = conn.execute("SELECT password_hash FROM users WHERE username = 'admin'").fetchone()[0]
+    assert stored.startswith("scrypt$")
+    service.login("admin", "password123")
+
+
+def test_login_runs_kdf_for_unknown_user(tmp_path, monkeypatch):
+    service = AuthService(str(tmp_path / "app.db"))
+    service.init_db()
+    calls = []
+    original = service._scrypt
+
+    def _counting_scrypt(*args):
+        calls.append(args)
+        return original(*args)
+
+    monkeypatch.setattr(service, "_scrypt", _counting_scrypt)
+    with pytest.raises(AuthInvalidCredentialsError):
+        service.login("nobody", "password123")
+    assert len(calls) == 1
+    assert service._verify_password("password123", "garbage$") is False
+    assert len(calls) == 2
+
+
+def test_feishu_relogin_only_invalidates_that_users_cached_session(tmp_path):
+    service = AuthService(str(tmp_path / "app.db"))
+    service.init_db()
+    service.bootstrap_superadmin("admin", "password123")
+    admin_token, _ = service.login("admin", "password123")
+    feishu_token, _, _ = service.login_by_feishu(
+        union_id="on_test_union_001",
+        open_id="ou_test_open_001",
+        name="飞书张三",
+        avatar_url=None,
+    )
+    admin_user = service.get_user_by_token(admin_token)
+    service.get_user_by_token(feishu_token)
+    revision = service.revision
+
+    service.login_by_feishu(
+        union_id="on_test_union_001",
+        open_id="ou_test_open_001",
+        name="飞书李四",
+        avatar_url=None,
+    )
+
+    # Profile refreshes leave the global revision and other users' sessions alone.
+    assert service.revision == revision
+    assert service.get_cached_user_by_token(admin_token) is admin_user
+    assert service.get_cached_user_by_token(feishu_token) is None
+    assert service.get_user_by_token(feishu_token).display_name == "飞书李四"
+
+
+def test_token_cache_honours_revision_and_expiry(tmp_path, monkeypatch):
+    service = AuthService(str(tmp_path / "app.db"), token_ttl_hours=1)
+    service.init_db()
+    admin = service.bootstrap_superadmin("admin", "password123")
+    user = service.create_user(admin, "user01", "password123")
+    token, _ = service.login("user01", "password123")
+
+    assert service.get_cached_user_by_token(token) is None
+    first = service.get_user_by_token(token)
+    assert service.get_cached_user_by_token(token) is first
+
+    # Account changes bump the revision and drop cached sessions.
+    service.set_user_role(current_user=admin, user_id=user.id, role="admin")
+    assert service.get_cached_user_by_token(token) is None
+    assert service.get_user_by_token(token).role == "admin"
+
+    real_monotonic = time.monotonic
+    monkeypatch.setattr(
+        "app.services.auth_service.time.monotonic", lambda: real_monotonic() + 3600
+    )
+    assert service.get_cached_user_by_token(token) is None
+
+
+def test_init_db_backfills_token_expiry_epoch(tmp_path):
+    db_path = tmp_path / "app.db"
+    service = AuthService(str(db_path))
+    service.init_db()
+    service.bootstrap_superadmin("admin", "password123")
+
+    now = datetime.now(timezone.utc)
+    with sqlite3.connect(db_path) as conn:
+        # Recreate the pre-migration table layout with one live and one expired token.
+        conn.execute("DROP TABLE auth_tokens")
+        conn.execute(
+            """
+            CREATE TABLE auth_tokens (
+                token TEXT PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                created_at TEXT NOT NULL,
+                expires_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.executemany(
+            "INSERT INTO auth_tokens VALUES (?, 1, ?, ?)",
+            [
+                ("live", now.isoformat(), (now + timedelta(hours=1)).isoformat()),
+                ("expired", now.isoformat(), (now - timedelta(hours=1)).isoformat()),
+            ],
+        )
+
+    service.init_db()
+    assert service.get_user_by_token("live").username == "admin"
+    with pytest.raises(AuthRequiredError):
+        service.get_user_by_token("expired")
+
+    service.login("admin", "password123")
+    with sqlite3.connect(db_path) as conn:
+        tokens = {row[0] for row in conn.execute("SELECT token FROM auth_tokens")}
+    assert "expired" not in tokens
+    assert "live" in tokens
+
+
+def test_login_token_is_stored_as_16_byte_blob(tmp_path):
+    db_path = tmp_path / "app.db"
+    service = AuthService(str(db_path))
+    service.init_db()
+    service.bootstrap_superadmin("admin", "password123")
+
+    token, _ = service.login("admin", "password123")
+    assert len(token) == 22
+
+    with sqlite3.connect(db_path) as conn:
+        stored = conn.execute("SELECT token FROM auth_tokens").fetchone()[0]
+    assert isinstance(stored, bytes) and len(stored) == 16
+
+    fresh = AuthService(str(db_path))
+    assert fresh.get_user_by_token(token).username == "admin"
+
+
+def test_create_user_rejects_username_with_trailing_newline(tmp_path):
+    service = AuthService(str(tmp_path / "app.db"))
+    service.init_db()
+    service.bootstrap_superadmin("admin", "password123")
+    _, admin = service.login("admin", "password123")
+
+    with pytest.raises(AuthInvalidCredentialsError):
+        service.create_user(
+            current_user=admin,
+            username="alice\n",
+            password="password123",
+        )
+
+
+def test_login_token_rejects_non_canonical_encoding(tmp_path):
+    service = AuthService(str(tmp_path / "app.db"))
+    service.init_db()
+    service.bootstrap_superadmin("admin", "password123")
+    token, _ = service.login("admin", "password123")
+
+    # The low bits of the last character are unused; flipping one still decodes
+    # to the same 16 bytes under lenient base64, but must not authenticate.
+    alphabet = string.ascii_uppercase + string.ascii_lowercase + string.digits + "-_"
+    sibling = token[:-1] + alphabet[alphabet.index(token[-1]) ^ 1]
+    assert base64.urlsafe_b64decode(sibling + "==") == base64.urlsafe_b64decode(token + "==")
+
+    with pytest.raises(AuthRequiredError):
+        service.get_user_by_token(sibling)
+    assert service.get_user_by_token(token).username == "admin"
@@ -0,0 +1,81 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.api import branch_routes
+from app.core.errors import AppError
+
+
+def test_listing_started_before_checkout_is_not_cached(monkeypatch):
+    workspace_path = "/tmp/ws"
+    current = {"branch": "main"}
+
+    async def _access(workspace, current_user):
+        return workspace_path
+
+    def _list_branches(**kwargs):
+        branch = current["branch"]
+        # Simulate a slow git call that observes the pre-checkout state.
+        time.sleep(0.05)
+        return branch, [branch]
+
+    def _checkout_branch(**kwargs):
+        current["branch"] = kwargs["branch"]
+        return SimpleNamespace(
+            repo_key=kwargs["repo_key"],
+            before_branch="main",
+            after_branch=kwargs["branch"],
+            discarded_changes=False,
+            summary="",
+        )
+
+    monkeypatch.setattr(branch_routes, "_require_workspace_access", _access)
+    monkeypatch.setattr(branch_routes.workspace_branch_service, "list_branches", _list_branches)
+    monkeypatch.setattr(
+        branch_routes.workspace_branch_service, "checkout_branch", _checkout_branch
+    )
+    branch_routes._branch_list_cache.clear()
+
+    async def _refs():
+        return await branch_routes.list_workspace_repo_refs(
+            "ws", "repo", branch_routes.Response(), None, None
+        )
+
+    async def _run():
+        stale = asyncio.create_task(_refs())
+        await asyncio.sleep(0.01)
+        await branch_routes.checkout_workspace_repo_branch(
+            "ws", "repo", SimpleNamespace(branch="dev", discard_changes=False), None
+        )
+        # A request arriving after checkout must not join the stale in-flight listing.
+        fresh = await _refs()
+        return await stale, fresh
+
+    stale, fresh = asyncio.run(_run())
+    assert stale["current_branch"] == "main"
+    assert fresh["current_branch"] == "dev"
+    assert branch_routes._branch_list_cache.get((workspace_path, "repo"))[0] == "dev"
+
+
+def test_checkout_of_unknown_repo_does_not_record_generation(monkeypatch):
+    async def _access(workspace, current_user):
+        return "/tmp/ws"
+
+    def _checkout_branch(**kwargs):
+        raise AppError(code="REPO_NOT_FOUND", message="仓库不存在", status_code=404)
+
+    monkeypatch.setattr(branch_routes, "_require_workspace_access", _access)
+    monkeypatch.setattr(
+        branch_routes.workspace_branch_service, "checkout_branch", _checkout_branch
+    )
+    branch_routes._list_generations.clear()
+
+    with pytest.raises(AppError):
+        asyncio.run(
+            branch_routes.checkout_workspace_repo_branch(
+                "ws", "made-up", SimpleNamespace(branch="dev", discard_changes=False), None
+            )
+        )
+    assert len(branch_routes._list_generations) == 0
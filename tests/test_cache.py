@@ -0,0 +1,38 @@
+import asyncio
+
+from app.core.cache import SingleFlight, TTLCache
+
+
+def test_ttl_cache_expires_and_evicts(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.core.cache.time.monotonic", lambda: now[0])
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl_seconds=10)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    # "b" 最久未使用，超过容量时被淘汰。
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    now[0] += 10
+    assert cache.get("a") is None
+    assert cache.get("c") is None
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    calls = 0
+
+    async def _load() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    async def _run() -> list[int]:
+        flight = SingleFlight()
+        return await asyncio.gather(*(flight.do("k", _load) for _ in range(5)))
+
+    assert asyncio.run(_run()) == [1, 1, 1, 1, 1]
+    assert calls == 1
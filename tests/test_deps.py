@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from app.api import deps
+from app.api.deps_common import bearer_token
+from app.core.errors import AuthForbiddenError, AuthRequiredError
+from app.services.auth_service import AuthService
+
+
+@pytest.fixture()
+def auth(tmp_path, monkeypatch):
+    service = AuthService(str(tmp_path / "app.db"))
+    service.init_db()
+    monkeypatch.setattr(deps, "auth_service", service)
+    deps._failed_token_cache.clear()
+    yield service
+    deps._failed_token_cache.clear()
+
+
+def test_get_current_user_reuses_cached_user(auth, monkeypatch):
+    auth.bootstrap_superadmin("admin", "password123")
+    token, _ = auth.login("admin", "password123")
+
+    first = _current_user(token)
+
+    def _fail(_token):
+        raise AssertionError("token should be served from cache")
+
+    monkeypatch.setattr(auth, "get_user_by_token", _fail)
+    second = _current_user(token)
+    assert second is first
+
+
+def test_get_current_user_cache_invalidated_by_account_change(auth):
+    admin = auth.bootstrap_superadmin("admin", "password123")
+    auth.create_user(admin, "user01", "password123")
+    token, user = auth.login("user01", "password123")
+
+    assert _current_user(token).role == "user"
+
+    auth.set_user_role(current_user=admin, user_id=user.id, role="admin")
+    assert _current_user(token).role == "admin"
+
+    auth.admin_reset_user_password(
+        current_user=admin,
+        user_id=user.id,
+        new_password="password456",
+    )
+    with pytest.raises(AuthRequiredError):
+        _current_user(token)
+
+
+def test_get_current_user_short_circuits_known_bad_token(auth, monkeypatch):
+    with pytest.raises(AuthRequiredError):
+        _current_user("not-a-token")
+
+    def _fail(_token):
+        raise AssertionError("failed token should not hit the database again")
+
+    monkeypatch.setattr(auth, "get_user_by_token", _fail)
+    with pytest.raises(AuthRequiredError):
+        _current_user("not-a-token")
+
+
+def test_require_superadmin_rejects_other_roles(auth):
+    superadmin = auth.bootstrap_superadmin("admin", "password123")
+    manager = auth.create_user(superadmin, "manager01", "password123", role="admin")
+
+    assert asyncio.run(deps.require_superadmin(superadmin)) is superadmin
+    with pytest.raises(AuthForbiddenError):
+        asyncio.run(deps.require_superadmin(manager))
+
+
+@pytest.mark.parametrize("header", [None, "", "Basic abc", "Bearer ", "Bearer    "])
+def test_bearer_token_rejects_missing_or_malformed(header):
+    with pytest.raises(AuthRequiredError):
+        asyncio.run(bearer_token(header))
+
+
+def test_bearer_token_strips_whitespace():
+    assert asyncio.run(bearer_token("Bearer  abc ")) == "abc"
+
+
+def _current_user(token):
+    return asyncio.run(deps.get_current_user(token))
@@ -0,0 +1,49 @@
+from app.services.auth_service import AuthService
+from app.services.llm_config_service import LlmConfigService
+
+
+def _config_fields(**overrides) -> dict:
+    fields = {
+        "base_url": None,
+        "auth_token": None,
+        "model": None,
+        "default_sonnet_model": None,
+        "default_haiku_model": None,
+        "default_opus_model": None,
+    }
+    fields.update(overrides)
+    return fields
+
+
+def test_active_env_is_cached_until_config_changes(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "app.db")
+    auth = AuthService(db_path)
+    auth.init_db()
+    superadmin = auth.bootstrap_superadmin("admin", "password123")
+    service = LlmConfigService(db_path)
+    service.init_db()
+
+    assert service.get_active_env() == {}
+
+    item = service.create_config(
+        superadmin,
+        name="default",
+        **_config_fields(auth_token="token-1", model="model-a"),
+    )
+    service.activate_config(superadmin, item.id)
+    first = service.get_active_env()
+    assert first == {"ANTHROPIC_AUTH_TOKEN": "token-1", "ANTHROPIC_MODEL": "model-a"}
+
+    def _fail():
+        raise AssertionError("active env should be served from cache")
+
+    monkeypatch.setattr(service, "_load_active_env", _fail)
+    first["ANTHROPIC_MODEL"] = "mutated"
+    assert service.get_active_env()["ANTHROPIC_MODEL"] == "model-a"
+    monkeypatch.undo()
+
+    service.update_config(superadmin, item.id, name=None, **_config_fields(model="model-b"))
+    assert service.get_active_env()["ANTHROPIC_MODEL"] == "model-b"
+
+    service.delete_config(superadmin, item.id)
+    assert service.get_active_env() == {}
@@ -0,0 +1,35 @@
+import logging
+
+from app.core.log_queue import start_queue_logging, stop_queue_logging
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__(level=logging.WARNING)
+        self.messages: list[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.messages.append(record.getMessage())
+
+
+def test_queue_logging_forwards_to_original_handlers():
+    root = logging.getLogger()
+    handler = _ListHandler()
+    root.addHandler(handler)
+    original = list(root.handlers)
+    try:
+        start_queue_logging()
+        start_queue_logging()
+        assert handler not in root.handlers
+
+        logger = logging.getLogger("tests.log_queue")
+        logger.warning("queued %s", 1)
+        logger.info("below handler level")
+        stop_queue_logging()
+
+        # 停止时写完队列，并遵循原 handler 的级别过滤。
+        assert handler.messages == ["queued 1"]
+        assert root.handlers == original
+    finally:
+        stop_queue_logging()
+        root.removeHandler(handler)
@@ -0,0 +1,66 @@
+import sqlite3
+import threading
+
+from app.services.mcp_audit_service import McpAuditRecord, McpAuditService
+
+
+def _record(idx: int) -> McpAuditRecord:
+    return McpAuditRecord(
+        user_id=1,
+        tool_name=f"tool-{idx}",
+        workspace="demo",
+        path_or_query=None,
+        elapsed_ms=idx,
+        status="ok",
+    )
+
+
+def _tool_names(db_path) -> list[str]:
+    conn = sqlite3.connect(str(db_path))
+    rows = conn.execute("SELECT tool_name FROM mcp_audit_logs ORDER BY id").fetchall()
+    conn.close()
+    return [row[0] for row in rows]
+
+
+def test_enqueue_without_writer_appends_inline(tmp_path):
+    db_path = tmp_path / "app.db"
+    service = McpAuditService(str(db_path))
+    service.init_db()
+
+    service.enqueue(_record(1))
+
+    assert _tool_names(db_path) == ["tool-1"]
+
+
+def test_writer_flushes_queued_records_on_stop(tmp_path):
+    db_path = tmp_path / "app.db"
+    service = McpAuditService(str(db_path))
+    service.init_db()
+    service.start_writer()
+
+    for idx in range(100):
+        service.enqueue(_record(idx))
+    service.stop_writer()
+
+    assert _tool_names(db_path) == [f"tool-{idx}" for idx in range(100)]
+
+    # 停止后回到同步写入。
+    service.enqueue(_record(100))
+    assert _tool_names(db_path)[-1] == "tool-100"
+
+
+def test_stop_writer_drains_queue_when_join_times_out(tmp_path, monkeypatch):
+    db_path = tmp_path / "app.db"
+    service = McpAuditService(str(db_path))
+    service.init_db()
+    release = threading.Event()
+    # A stuck writer that never consumes the queue.
+    monkeypatch.setattr(service, "_writer_loop", release.wait)
+    service.start_writer()
+
+    for idx in range(3):
+        service.enqueue(_record(idx))
+    service.stop_writer(timeout=0.05)
+    release.set()
+
+    assert _tool_names(db_path) == ["tool-0", "tool-1", "tool-2"]
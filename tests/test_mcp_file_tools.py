@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import os
+import re
+import shutil
+from types import SimpleNamespace
+
+import pytest
+
+from app.api import mcp_routes
+from app.core.errors import AppError
+
+
+@pytest.fixture()
+def workspace_root(tmp_path, monkeypatch):
+    root = tmp_path / "demo"
+    (root / "src" / "pkg").mkdir(parents=True)
+    (root / ".git").mkdir()
+    (root / ".hidden").mkdir()
+    (root / "README.md").write_text("hello world\nbye\n", encoding="utf-8")
+    (root / "src" / "main.py").write_text("import os\nprint('hello')\n", encoding="utf-8")
+    (root / "src" / "pkg" / "util.py").write_text("def hello():\n    pass\n", encoding="utf-8")
+    (root / ".hidden" / "note.txt").write_text("hello hidden\n", encoding="utf-8")
+    (root / ".git" / "config").write_text("hello git\n", encoding="utf-8")
+    (root / ".gitignore").write_text("*.py\n", encoding="utf-8")
+    monkeypatch.setattr(
+        mcp_routes,
+        "workspace_service",
+        SimpleNamespace(get_workspace_path=lambda _workspace: root.resolve()),
+    )
+    return root.resolve()
+
+
+def _grep(root, glob_pattern: str = "**/*", top_k: int = 50) -> list[tuple[str, int, str]]:
+    result = mcp_routes._grep_files(
+        "demo",
+        root,
+        pattern="hello",
+        glob_pattern=glob_pattern,
+        top_k=top_k,
+    )
+    return sorted((item["path"], item["line"], item["text"]) for item in result["matches"])
+
+
+@pytest.mark.parametrize("glob_pattern", ["**/*", "src/*.py", "src/**", "*.md"])
+def test_grep_files_python_fallback(workspace_root, monkeypatch, glob_pattern):
+    monkeypatch.setattr(mcp_routes, "_RG_BIN", None)
+    matches = _grep(workspace_root, glob_pattern)
+
+    expected = {
+        "**/*": [
+            (".hidden/note.txt", 1, "hello hidden"),
+            ("README.md", 1, "hello world"),
+            ("src/main.py", 2, "print('hello')"),
+            ("src/pkg/util.py", 1, "def hello():"),
+        ],
+        "src/*.py": [("src/main.py", 2, "print('hello')")],
+        "src/**": [
+            ("src/main.py", 2, "print('hello')"),
+            ("src/pkg/util.py", 1, "def hello():"),
+        ],
+        "*.md": [("README.md", 1, "hello world")],
+    }
+    assert matches == expected[glob_pattern]
+
+
+@pytest.mark.skipif(shutil.which("rg") is None, reason="ripgrep is not installed")
+@pytest.mark.parametrize("glob_pattern", ["**/*", "src/*.py", "src/**", "*.md"])
+def test_grep_files_ripgrep_matches_python_fallback(workspace_root, monkeypatch, glob_pattern):
+    monkeypatch.setattr(mcp_routes, "_RG_BIN", None)
+    expected = _grep(workspace_root, glob_pattern)
+
+    monkeypatch.setattr(mcp_routes, "_RG_BIN", shutil.which("rg"))
+    assert _grep(workspace_root, glob_pattern) == expected
+
+
+@pytest.mark.skipif(shutil.which("rg") is None, reason="ripgrep is not installed")
+def test_grep_files_ripgrep_matches_python_on_symlinks_and_binary(workspace_root, monkeypatch):
+    (workspace_root / "linked.txt").symlink_to(workspace_root / "README.md")
+    (workspace_root / "linked_dir").symlink_to(workspace_root / "src", target_is_directory=True)
+    (workspace_root / "broken.txt").symlink_to(workspace_root / "missing.txt")
+    (workspace_root / "nul.bin").write_bytes(b"hello\x00nul\n")
+    (workspace_root / "latin1.txt").write_bytes(b"hello latin\ncaf\xe9\n")
+    monkeypatch.setattr(mcp_routes, "_RG_BIN", None)
+    expected = _grep(workspace_root)
+    assert ("linked.txt", 1, "hello world") in expected
+    assert ("nul.bin", 1, "hello\x00nul") in expected
+
+    monkeypatch.setattr(mcp_routes, "_RG_BIN", shutil.which("rg"))
+    assert _grep(workspace_root) == expected
+
+
+@pytest.mark.skipif(shutil.which("rg") is None, reason="ripgrep is not installed")
+def test_grep_files_ripgrep_top_k_is_deterministic(workspace_root, monkeypatch):
+    monkeypatch.setattr(mcp_routes, "_RG_BIN", shutil.which("rg"))
+    for idx in range(20):
+        (workspace_root / f"f{idx:02d}.txt").write_text("hello\n", encoding="utf-8")
+    first = _grep(workspace_root, top_k=5)
+    assert all(_grep(workspace_root, top_k=5) == first for _ in range(5))
+
+
+def test_grep_files_respects_top_k(workspace_root, monkeypatch):
+    monkeypatch.setattr(mcp_routes, "_RG_BIN", shutil.which("rg"))
+    assert len(_grep(workspace_root, top_k=2)) == 2
+
+
+def test_grep_files_falls_back_when_ripgrep_rejects_pattern(workspace_root, monkeypatch):
+    monkeypatch.setattr(mcp_routes, "_RG_BIN", shutil.which("rg"))
+    result = mcp_routes._grep_files(
+        "demo",
+        workspace_root,
+        pattern=r"hel(?=lo w)",
+        glob_pattern="**/*",
+        top_k=10,
+    )
+    assert [(item["path"], item["line"]) for item in result["matches"]] == [("README.md", 1)]
+
+
+@pytest.mark.parametrize("block_chars", [1, 4, 1 << 20])
+@pytest.mark.parametrize("pattern", [r"^$", r"b\s*c", r"a[^x]", r"^\s*c$", r"c$"])
+def test_grep_block_scan_matches_line_scan(tmp_path, monkeypatch, block_chars, pattern):
+    monkeypatch.setattr(mcp_routes, "_GREP_BLOCK_CHARS", block_chars)
+    target = tmp_path / "sample.txt"
+    target.write_text("ab\n\n  c\nb\nc\na", encoding="utf-8")
+    regex = re.compile(pattern, re.MULTILINE)
+
+    expected = mcp_routes._grep_file_lines(str(target), "sample.txt", regex, limit=50)
+    assert mcp_routes._grep_file_blocks(str(target), "sample.txt", regex, limit=50) == expected
+
+
+def test_list_files_prunes_depth_and_hidden_entries(workspace_root):
+    result = mcp_routes._list_files(
+        "demo",
+        workspace_root,
+        path=".",
+        depth=2,
+        include_hidden=False,
+    )
+    assert [(item["path"], item["type"]) for item in result["items"]] == [
+        ("README.md", "file"),
+        ("src", "dir"),
+        ("src/main.py", "file"),
+        ("src/pkg", "dir"),
+    ]
+    readme = result["items"][0]
+    assert readme["size"] == len("hello world\nbye\n")
+    assert result["items"][1]["size"] is None
+
+    nested = mcp_routes._list_files(
+        "demo",
+        workspace_root,
+        path="src/pkg",
+        depth=1,
+        include_hidden=True,
+    )
+    assert [item["path"] for item in nested["items"]] == ["src/pkg/util.py"]
+
+    hidden = mcp_routes._list_files(
+        "demo",
+        workspace_root,
+        path=".hidden",
+        depth=2,
+        include_hidden=False,
+    )
+    assert hidden["items"] == []
+
+
+@pytest.mark.parametrize(
+    ("mtime_ns", "expected"),
+    [
+        (1_700_000_000_000_000_000, "2023-11-14T22:13:20+00:00"),
+        (1_700_000_000_123_456_789, "2023-11-14T22:13:20.123456+00:00"),
+    ],
+)
+def test_list_files_formats_mtime_like_isoformat(workspace_root, mtime_ns, expected):
+    os.utime(workspace_root / "README.md", ns=(mtime_ns, mtime_ns))
+    result = mcp_routes._list_files(
+        "demo",
+        workspace_root,
+        path=".",
+        depth=1,
+        include_hidden=False,
+    )
+    readme = next(item for item in result["items"] if item["path"] == "README.md")
+    assert readme["mtime"] == expected
+
+
+def test_read_file_streams_requested_window(workspace_root, monkeypatch):
+    (workspace_root / "big.txt").write_text(
+        "".join(f"line {idx}\n" for idx in range(1, 101)),
+        encoding="utf-8",
+    )
+    (workspace_root / "binary.bin").write_bytes(b"\xff\xfe\x00\x01")
+    monkeypatch.setattr(
+        mcp_routes,
+        "mcp_settings_service",
+        SimpleNamespace(
+            get_settings=lambda: SimpleNamespace(kb_file_max_bytes=1_000_000, kb_read_max_lines=3)
+        ),
+    )
+
+    window = mcp_routes._read_file(
+        "demo",
+        workspace_root,
+        path="big.txt",
+        start_line=10,
+        end_line=12,
+    )
+    assert window["content"] == "line 10\nline 11\nline 12"
+    assert (window["end_line"], window["truncated"]) == (12, False)
+
+    truncated = mcp_routes._read_file(
+        "demo",
+        workspace_root,
+        path="big.txt",
+        start_line=99,
+        end_line=300,
+    )
+    assert truncated["content"] == "line 99\nline 100"
+    assert truncated["truncated"] is False
+
+    limited = mcp_routes._read_file(
+        "demo",
+        workspace_root,
+        path="big.txt",
+        start_line=1,
+        end_line=50,
+    )
+    assert limited["content"] == "line 1\nline 2\nline 3"
+    assert (limited["end_line"], limited["truncated"]) == (3, True)
+
+    with pytest.raises(AppError) as exc_info:
+        mcp_routes._read_file(
+        "demo",
+        workspace_root,
+        path="binary.bin",
+        start_line=1,
+        end_line=10,
+    )
+    assert exc_info.value.code == "FILE_ENCODING_UNSUPPORTED"
+
+
+def test_semantic_fallback_scores_lines_by_matched_tokens(workspace_root):
+    (workspace_root / "notes.txt").write_text(
+        "Hello World\nworld only\nnothing here\n",
+        encoding="utf-8",
+    )
+    result = mcp_routes._semantic_fallback("demo", query="hello  WORLD", top_k=20)
+    scored = [(hit["path"], hit["start_line"], hit["score"]) for hit in result["hits"]]
+    assert scored[:2] == [("README.md", 1, 2), ("notes.txt", 1, 2)]
+    assert ("notes.txt", 2, 1) in scored
+    assert all(path != "notes.txt" or line != 3 for path, line, _ in scored)
+    assert not any(path.startswith(".git/") for path, _, _ in scored)
@@ -0,0 +1,76 @@
+import pytest
+
+from app.core.errors import AppError
+from app.services.mcp_settings_service import McpSettingsService
+
+
+def _update(service: McpSettingsService, **overrides) -> None:
+    fields = {
+        "mcp_enabled": None,
+        "mcp_base_path": None,
+        "mcp_public_base_url": None,
+        "kb_enable_vector": None,
+        "kb_chroma_dir": None,
+        "kb_vector_topk_default": None,
+        "kb_file_max_bytes": None,
+        "kb_read_max_lines": None,
+        "embedding_backend": None,
+        "embedding_base_url": None,
+        "embedding_model": None,
+        "embedding_batch_size": None,
+        "embedding_api_key": None,
+        "clear_embedding_api_key": None,
+    }
+    fields.update(overrides)
+    service.update_settings(is_superadmin=True, **fields)
+
+
+def test_get_settings_is_cached_until_update(tmp_path, monkeypatch):
+    service = McpSettingsService(str(tmp_path / "app.db"))
+    service.init_db()
+
+    first = service.get_settings()
+    assert first.mcp_enabled is True
+
+    def _fail():
+        raise AssertionError("settings should be served from cache")
+
+    monkeypatch.setattr(service, "_get_all_settings", _fail)
+    assert service.get_settings() is first
+    monkeypatch.undo()
+
+    _update(service, mcp_enabled=False, kb_read_max_lines=50)
+    refreshed = service.get_settings()
+    assert refreshed.mcp_enabled is False
+    assert refreshed.kb_read_max_lines == 50
+
+
+def test_resolve_mcp_base_path_uses_snapshot_until_update(tmp_path, monkeypatch):
+    service = McpSettingsService(str(tmp_path / "app.db"))
+    service.init_db()
+
+    assert service.resolve_mcp_base_path() == "/mcp"
+
+    def _fail():
+        raise AssertionError("base path should be served from the snapshot")
+
+    monkeypatch.setattr(service, "get_settings", _fail)
+    assert service.resolve_mcp_base_path() == "/mcp"
+    monkeypatch.undo()
+
+    _update(service, mcp_base_path="/kb-mcp")
+    assert service.resolve_mcp_base_path() == "/kb-mcp"
+
+
+def test_update_settings_rejects_base_path_under_static_assets(tmp_path):
+    service = McpSettingsService(str(tmp_path / "app.db"))
+    service.init_db()
+
+    for path in ("/assets", "/assets/mcp", "icons/kb"):
+        with pytest.raises(AppError) as exc_info:
+            _update(service, mcp_base_path=path)
+        assert exc_info.value.code == "MCP_SETTINGS_INVALID"
+    assert service.get_settings().mcp_base_path == "/mcp"
+
+    _update(service, mcp_base_path="/assets-mcp")
+    assert service.get_settings().mcp_base_path == "/assets-mcp"
@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+from app.core.errors import AppError
+from app.services.mcp_vector_service import _QueryEmbeddingBatcher
+
+
+def _run_concurrently(batcher: _QueryEmbeddingBatcher, texts: list[str]) -> dict[str, object]:
+    results: dict[str, object] = {}
+    barrier = threading.Barrier(len(texts))
+
+    def _worker(text: str) -> None:
+        barrier.wait()
+        try:
+            results[text] = batcher.embed(text)
+        except Exception as exc:
+            results[text] = exc
+
+    threads = [threading.Thread(target=_worker, args=(text,)) for text in texts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_queries_share_one_embedding_request():
+    calls: list[list[str]] = []
+
+    def _embed_many(texts: list[str]) -> list[list[float]]:
+        calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    batcher = _QueryEmbeddingBatcher(_embed_many, window_seconds=0.2, max_batch=16)
+    texts = [f"query-{'x' * idx}" for idx in range(8)]
+    results = _run_concurrently(batcher, texts)
+
+    assert results == {text: [float(len(text))] for text in texts}
+    assert len(calls) < len(texts)
+    assert sorted(text for batch in calls for text in batch) == sorted(texts)
+
+
+def test_batch_failure_is_raised_to_every_caller():
+    def _embed_many(texts: list[str]) -> list[list[float]]:
+        raise AppError(code="MCP_EMBEDDING_REQUEST_FAILED", message="boom", status_code=502)
+
+    batcher = _QueryEmbeddingBatcher(_embed_many, window_seconds=0.2, max_batch=16)
+    results = _run_concurrently(batcher, ["a", "b", "c"])
+
+    assert all(isinstance(value, AppError) for value in results.values())
+    with pytest.raises(AppError):
+        batcher.embed("single")
+
+
+def test_batches_respect_configured_embedding_batch_size():
+    calls: list[list[str]] = []
+
+    def _embed_many(texts: list[str]) -> list[list[float]]:
+        calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    batcher = _QueryEmbeddingBatcher(
+        _embed_many,
+        window_seconds=0.2,
+        max_batch=16,
+        batch_limit=lambda: 1,
+    )
+    texts = [f"query-{'x' * idx}" for idx in range(5)]
+    results = _run_concurrently(batcher, texts)
+
+    assert results == {text: [float(len(text))] for text in texts}
+    assert all(len(batch) == 1 for batch in calls)
+    assert sorted(text for batch in calls for text in batch) == sorted(texts)
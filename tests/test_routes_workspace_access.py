@@ -1,6 +1,12 @@
 from pathlib import Path
+import threading
+
+import pytest
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
 
 from app.api import routes
+from app.core.errors import AuthForbiddenError
 from app.services.auth_service import AuthUser, AuthService
 from app.services.workspace_service import WorkspaceService
 
@@ -33,3 +39,69 @@ def test_admin_resolve_workspace_with_access_accepts_workspace_id(tmp_path, monk
 
     assert meta.workspace_id == item.workspace_id
     assert Path(resolved_path) == data_dir / "demo"
+
+
+def test_user_resolve_workspace_with_access_checks_acl(tmp_path, monkeypatch):
+    db_path = tmp_path / "app.db"
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+
+    auth = AuthService(str(db_path))
+    auth.init_db()
+    superadmin = auth.bootstrap_superadmin("admin", "password123")
+
+    workspace_service = WorkspaceService(data_dir)
+    workspace_service._db_path = str(db_path)
+    granted = workspace_service.create_workspace("demo", mode="team", creator_user_id=superadmin.id)
+    other = workspace_service.create_workspace("other", mode="team", creator_user_id=superadmin.id)
+    member = auth.create_user(
+        superadmin,
+        "member01",
+        "password123",
+        workspace_names=[granted.workspace_id],
+    )
+
+    monkeypatch.setattr(routes, "auth_service", auth)
+    monkeypatch.setattr(routes, "workspace_service", workspace_service)
+
+    meta, resolved_path = routes._resolve_workspace_with_access(granted.workspace_id, member)
+    assert meta.workspace_id == granted.workspace_id
+    assert Path(resolved_path) == data_dir / "demo"
+
+    with pytest.raises(AuthForbiddenError):
+        routes._resolve_workspace_with_access(other.workspace_id, member)
+
+
+def test_route_schemas_are_built_at_import():
+    # Only models outside route validation may use defer_build; the rest must
+    # be complete so the first request does not pay for the schema build.
+    for route in routes.router.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        for field in (route.response_field, route.body_field):
+            model = getattr(field, "type_", None)
+            if isinstance(model, type) and issubclass(model, BaseModel):
+                assert model.__pydantic_complete__, (route.path, model.__name__)
+
+
+def test_session_run_start_lock_is_per_session_and_pruned():
+    entered = threading.Event()
+    release = threading.Event()
+
+    def hold_session_a():
+        with routes._session_run_start_lock("a"):
+            entered.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold_session_a)
+    holder.start()
+    assert entered.wait(5)
+    try:
+        # Another session is not blocked while "a" is being started.
+        with routes._session_run_start_lock("b"):
+            assert set(routes._run_start_locks) == {"a", "b"}
+    finally:
+        release.set()
+        holder.join(5)
+
+    assert routes._run_start_locks == {}
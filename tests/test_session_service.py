@@ -75,3 +75,25 @@ def test_delete_session_removes_file_and_store(tmp_path: Path) -> None:
     assert deleted.session_id == session.session_id
     assert not session_file.exists()
     assert session.session_id not in service._store  # noqa: SLF001 - 校验内存态一致性
+
+
+def test_list_sessions_reuses_unchanged_files(tmp_path: Path, monkeypatch) -> None:
+    workspace = tmp_path / "ws"
+    workspace.mkdir()
+    service = _build_service(tmp_path)
+    session = service.create_session(user_id=5, workspace="demo", workspace_path=workspace)
+    service.append_message(session.session_id, user_id=5, role="user", text="hello")
+
+    def _fail(_session_file):
+        raise AssertionError("unchanged session files should not be re-read")
+
+    monkeypatch.setattr(service, "_load_session_by_file", _fail)
+    listed = service.list_workspace_sessions(user_id=5, workspace="demo")
+    assert [len(item.messages) for item in listed] == [1]
+    monkeypatch.undo()
+
+    # A write from another process changes the file stamp and forces a reload.
+    other_process = _build_service(tmp_path)
+    other_process.append_message(session.session_id, user_id=5, role="assistant", text="hi there")
+    listed = service.list_workspace_sessions(user_id=5, workspace="demo")
+    assert [message.text for message in listed[0].messages] == ["hello", "hi there"]
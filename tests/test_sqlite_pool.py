@@ -0,0 +1,43 @@
+import sqlite3
+import threading
+
+from app.core.sqlite_pool import SQLiteConnectionPool
+
+
+def test_pool_reuses_connection_per_thread_and_resets_state(tmp_path):
+    pool = SQLiteConnectionPool(str(tmp_path / "app.db"))
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE items (name TEXT)")
+        conn.commit()
+        first = conn
+
+    with pool.connection() as conn:
+        assert conn is first
+        conn.row_factory = sqlite3.Row
+        conn.execute("INSERT INTO items (name) VALUES ('pending')")
+        # 嵌套取用拿到独立连接，看不到外层未提交的写入。
+        with pool.connection() as nested:
+            assert nested is not conn
+            assert nested.execute("SELECT COUNT(1) FROM items").fetchone()[0] == 0
+
+    with pool.connection() as conn:
+        assert conn.row_factory is None
+        # 未提交的写入在归还时回滚，与短连接关闭时的行为一致。
+        assert conn.execute("SELECT COUNT(1) FROM items").fetchone()[0] == 0
+
+    other: list[sqlite3.Connection] = []
+
+    def _worker() -> None:
+        with pool.connection() as conn:
+            other.append(conn)
+
+    thread = threading.Thread(target=_worker)
+    thread.start()
+    thread.join()
+    assert other[0] is not first
+
+    pool.close()
+    with pool.connection() as conn:
+        assert conn is not first
+        assert conn.execute("SELECT COUNT(1) FROM items").fetchone()[0] == 0
+    pool.close()
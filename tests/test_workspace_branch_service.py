@@ -1,9 +1,19 @@
 from __future__ import annotations
 
+from dataclasses import fields
 import subprocess
 from pathlib import Path
 
-from app.services.workspace_branch_service import WorkspaceBranchService
+from app.models import branch_schemas
+from app.models.branch_schemas import (
+    WorkspaceBranchCheckoutResponse,
+    WorkspaceBranchRepoItem,
+)
+from app.services.workspace_branch_service import (
+    BranchCheckoutResult,
+    BranchRepoStatus,
+    WorkspaceBranchService,
+)
 
 
 def _run_git(cwd: Path, *args: str) -> str:
@@ -92,3 +102,27 @@ def test_list_branches_recovers_from_single_branch_fetch_config(tmp_path: Path)
     assert current_branch == 'master'
     assert 'master' in branches
     assert 'dev' in branches
+
+
+def test_branch_service_results_match_response_schemas() -> None:
+    # 路由层把服务层 dataclass 字段直接平铺成响应 dict，不再逐条建模；
+    # 两侧字段一旦漂移需要在这里暴露。
+    assert {item.name for item in fields(BranchRepoStatus)} == set(
+        WorkspaceBranchRepoItem.model_fields
+    )
+    assert {item.name for item in fields(BranchCheckoutResult)} == set(
+        WorkspaceBranchCheckoutResponse.model_fields
+    ) - {'workspace'}
+
+
+def test_branch_schemas_are_built_at_import() -> None:
+    # Pydantic v2 在类定义时即完成 schema 构建；若引入前向引用或 defer_build，
+    # 首个请求会承担构建开销，这里提前暴露。
+    for model in (
+        branch_schemas.WorkspaceBranchRepoItem,
+        branch_schemas.WorkspaceBranchRepoListResponse,
+        branch_schemas.WorkspaceBranchRefListResponse,
+        branch_schemas.WorkspaceBranchCheckoutRequest,
+        branch_schemas.WorkspaceBranchCheckoutResponse,
+    ):
+        assert model.__pydantic_complete__
@@ -1,5 +1,8 @@
 from pathlib import Path
 
+import pytest
+
+from app.core.errors import WorkspaceNotFoundError
 from app.services.workspace_service import WorkspaceService
 
 
@@ -71,3 +74,19 @@ def test_resolve_personal_agent_workspace_roots(tmp_path: Path) -> None:
 
     assert main_root == (tmp_path / "personal" / "9" / "workspace")
     assert qa_root == (tmp_path / "personal" / "9" / "workspace-qa")
+
+
+def test_get_workspace_path_cache_tracks_delete_and_recreate(tmp_path: Path) -> None:
+    service = WorkspaceService(tmp_path)
+    item = service.create_workspace("cached")
+
+    first = service.get_workspace_path(item.workspace_id)
+    assert service.get_workspace_path(item.workspace_id) == first
+
+    service.delete_workspace(item.workspace_id)
+    with pytest.raises(WorkspaceNotFoundError):
+        service.get_workspace_path(item.workspace_id)
+
+    recreated = service.create_workspace("cached")
+    assert service.get_workspace_path("cached") == tmp_path / "cached"
+    assert recreated.workspace_id != item.workspace_id